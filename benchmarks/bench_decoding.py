@@ -0,0 +1,39 @@
+"""Decode throughput of the available JSON decoders over websocket frames.
+
+Usage: python -m benchmarks.bench_decoding [frames]
+"""
+
+import sys
+from time import perf_counter
+
+from benchmarks.frames import make_frames
+from src.backpack_tf.decoding import DECODERS
+
+
+def main(count: int = 200) -> None:
+    frames = make_frames(count)
+    texts = [frame.decode() for frame in frames]
+    megabytes = sum(map(len, frames)) / 1e6
+
+    for name, loads in DECODERS.items():
+        for kind, data in [("str", texts), ("bytes", frames)]:
+            start = perf_counter()
+
+            for frame in data:
+                loads(frame)
+
+            elapsed = perf_counter() - start
+            print(f"{name:<8} {kind:<6} {megabytes / elapsed:>8.1f} MB/s")
+
+    # what receiving as str costs on top of decoding bytes
+    start = perf_counter()
+
+    for frame in frames:
+        frame.decode()
+
+    elapsed = perf_counter() - start
+    print(f"{'utf-8':<8} {'copy':<6} {megabytes / elapsed:>8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,51 @@
+"""Time and retained memory per websocket event, dicts + Listing compared to
+typed events.
+
+Usage: python -m benchmarks.bench_events [frames]
+"""
+
+import sys
+import tracemalloc
+from time import perf_counter
+
+from benchmarks.frames import make_frames
+from src.backpack_tf import Listing, decode_events
+from src.backpack_tf.decoding import loads
+
+
+def as_listings(frame: bytes) -> list[Listing]:
+    return [Listing(**event["payload"]) for event in loads(frame)]
+
+
+def bench(name: str, decode, frames: list[bytes], events: int) -> None:
+    start = perf_counter()
+
+    for frame in frames:
+        decode(frame)
+
+    elapsed = perf_counter() - start
+
+    tracemalloc.start()
+    kept = [decode(frame) for frame in frames]
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+
+    # typed events keep the frame alive through their raw fields, frames are
+    # allocated up front and not counted
+    print(
+        f"{name:<16} {elapsed / events * 1e6:>7.2f} us/event"
+        f" {retained / events:>8.0f} bytes/event"
+    )
+
+
+def main(count: int = 200) -> None:
+    frames = make_frames(count)
+    events = count * 50
+
+    bench("dict + Listing", as_listings, frames, events)
+    bench("decode_events", decode_events, frames, events)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
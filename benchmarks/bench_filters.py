@@ -0,0 +1,46 @@
+"""Cost per frame of decoding everything compared to filtering events
+before they are fully decoded.
+
+Usage: python -m benchmarks.bench_filters [frames]
+"""
+
+import sys
+from time import perf_counter
+
+from benchmarks.frames import ITEMS, make_frames
+from src.backpack_tf import EventFilter, decode_events
+from src.backpack_tf.decoding import loads
+from src.backpack_tf.filters import FilteredDecoder
+
+FILTERS = {
+    "sell": EventFilter(intents={"sell"}),
+    "one item": EventFilter(items={ITEMS[0][1]}),
+    "absent": EventFilter(items={"Bill's Hat"}),
+    # too many names to scan for, filtered per event
+    "500 items": EventFilter(items={f"item {i}" for i in range(499)} | {ITEMS[0][1]}),
+}
+
+
+def main(count: int = 500) -> None:
+    frames = make_frames(count)
+    megabytes = sum(map(len, frames)) / 1e6
+
+    for kind, decoder in [("dicts", loads), ("typed", decode_events)]:
+        decoders = {"none": decoder}
+        decoders.update(
+            (name, FilteredDecoder(event_filter, decoder))
+            for name, event_filter in FILTERS.items()
+        )
+
+        for name, decode in decoders.items():
+            start = perf_counter()
+            kept = sum(len(decode(frame)) for frame in frames)
+            elapsed = perf_counter() - start
+            print(
+                f"{kind:<6} {name:<10} {megabytes / elapsed:>8.1f} MB/s"
+                f" {kept:>8} of {count * 50} events kept"
+            )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,87 @@
+"""Throughput of websocket ingest in one process compared to sharded over
+1, 2, 4 and 8 worker processes, applying replayed frames to an order book.
+
+Usage: python -m benchmarks.bench_ingest [frames] [items]
+"""
+
+import json
+import random
+import sys
+from time import perf_counter
+
+from benchmarks.frames import make_event
+from src.backpack_tf import BackpackTFWebsocket, OrderBook, ShardedBackpackTFWebsocket
+from src.backpack_tf.ingest import split_frame
+
+# one per process, workers apply their shard to their own book
+BOOK = OrderBook()
+
+
+def apply(events: list) -> None:
+    BOOK.apply_events(events)
+
+
+def make_frames(count: int, items: int, batch_size: int = 50) -> list[bytes]:
+    """Frames with events spread over ``items`` items, so shards get evenly
+    loaded"""
+    rng = random.Random(0)
+    frames = []
+
+    for i in range(count):
+        events = []
+
+        for j in range(batch_size):
+            event = make_event(i * batch_size + j, rng)
+            event["payload"]["item"]["name"] += f" #{rng.randrange(items)}"
+            events.append(event)
+
+        frames.append(json.dumps(events).encode())
+
+    return frames
+
+
+def report(name: str, events: int, megabytes: float, elapsed: float) -> None:
+    print(
+        f"{name:<10} {events / elapsed:>12,.0f} events/s"
+        f" {megabytes / elapsed:>8.1f} MB/s"
+    )
+
+
+def main(count: int = 2000, items: int = 1000) -> None:
+    frames = make_frames(count, items)
+    events = count * 50
+    megabytes = sum(map(len, frames)) / 1e6
+
+    socket = BackpackTFWebsocket(apply, as_solo_entries=False, typed=True)
+    start = perf_counter()
+
+    for frame in frames:
+        socket._process_messages(frame)
+
+    report("inline", events, megabytes, perf_counter() - start)
+
+    # the most the reading process can route, whatever the number of workers
+    start = perf_counter()
+
+    for frame in frames:
+        split_frame(frame, 8)
+
+    report("route", events, megabytes, perf_counter() - start)
+
+    for workers in (1, 2, 4, 8):
+        socket = ShardedBackpackTFWebsocket(
+            apply, workers, as_solo_entries=False, typed=True
+        )
+        socket.start()
+        start = perf_counter()
+
+        for frame in frames:
+            socket.feed(frame)
+
+        # waits for the workers to drain their pipes
+        socket.close()
+        report(f"{workers} workers", events, megabytes, perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
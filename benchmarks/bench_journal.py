@@ -0,0 +1,39 @@
+"""Write and replay throughput of the journal, buffered and fsynced.
+
+Usage: python -m benchmarks.bench_journal [frames]
+"""
+
+import sys
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from benchmarks.frames import make_frames
+from src.backpack_tf.journal import Journal, replay
+
+
+def main(count: int = 2000) -> None:
+    frames = make_frames(count)
+    megabytes = sum(map(len, frames)) / 1e6
+
+    for sync in (False, True):
+        with TemporaryDirectory() as directory:
+            start = perf_counter()
+
+            with Journal(directory, sync=sync) as journal:
+                for frame in frames:
+                    journal.append_frame(frame)
+
+            elapsed = perf_counter() - start
+            name = "fsync" if sync else "buffered"
+            print(f"write  {name:<9} {megabytes / elapsed:>8.1f} MB/s")
+
+            start = perf_counter()
+            replayed = sum(1 for _ in replay(directory))
+            elapsed = perf_counter() - start
+
+            assert replayed == count
+            print(f"replay {name:<9} {megabytes / elapsed:>8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
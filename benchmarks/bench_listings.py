@@ -0,0 +1,59 @@
+"""Retained memory per Listing, the old dict based dataclass compared to the
+slotted classes with typed nested fields.
+
+Usage: python -m benchmarks.bench_listings [listings]
+"""
+
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Any
+
+from benchmarks.frames import make_frames
+from src.backpack_tf import Listing
+from src.backpack_tf.decoding import loads
+
+
+@dataclass
+class DictListing:
+    """Listing as it was before it was slotted"""
+
+    id: str
+    steamid: str
+    appid: int
+    currencies: dict[str, Any]
+    value: dict
+    details: str
+    listedAt: int
+    bumpedAt: int
+    intent: str
+    count: int
+    status: str
+    source: str
+    item: dict[str, Any]
+    user: dict = field(default_factory=dict)
+    userAgent: dict = field(default_factory=dict)
+    tradeOffersPreferred: bool = None
+    buyoutOnly: bool = None
+    archived: bool = field(default=False)
+
+
+def bench(name: str, parse, frames: list[bytes], listings: int) -> None:
+    tracemalloc.start()
+    kept = [parse(event["payload"]) for frame in frames for event in loads(frame)]
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+
+    print(f"{name:<12} {retained / listings:>8.0f} bytes/listing")
+
+
+def main(listings: int = 10_000) -> None:
+    frames = make_frames(listings // 50)
+
+    bench("before", lambda payload: DictListing(**payload), frames, listings)
+    bench("after", Listing.from_dict, frames, listings)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,76 @@
+"""Apply-event and query throughput of the order book.
+
+Usage: python -m benchmarks.bench_orderbook [listings]
+"""
+
+import random
+import sys
+from time import perf_counter
+
+from src.backpack_tf import OrderBook
+
+
+def make_listings(count: int, items: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"440_{i}",
+            "steamid": str(76561198000000000 + rng.randrange(count // 10 + 1)),
+            "intent": rng.choice(["buy", "sell"]),
+            "value": {"raw": rng.randrange(1, 10_000) / 9},
+            "item": {"name": f"item {rng.randrange(items)}"},
+        }
+        for i in range(count)
+    ]
+
+
+def report(name: str, operations: int, elapsed: float) -> None:
+    print(f"{name:<8} {operations / elapsed:>12,.0f} ops/s")
+
+
+def main(count: int = 1_000_000, items: int = 20_000) -> None:
+    listings = make_listings(count, items)
+    book = OrderBook()
+
+    start = perf_counter()
+
+    for listing in listings:
+        book.apply("listing-update", listing)
+
+    report("add", count, perf_counter() - start)
+
+    keys = [f"item {i}" for i in range(items)]
+    start = perf_counter()
+
+    for key in keys:
+        book.best_bid(key)
+        book.best_ask(key)
+
+    report("best", 2 * items, perf_counter() - start)
+
+    start = perf_counter()
+
+    for key in keys:
+        book.top_asks(key, 10)
+
+    report("top 10", items, perf_counter() - start)
+
+    updates = random.Random(1).sample(listings, count // 10)
+    start = perf_counter()
+
+    for listing in updates:
+        book.apply("listing-update", {**listing, "value": {"raw": 1.0}})
+
+    report("update", len(updates), perf_counter() - start)
+
+    start = perf_counter()
+
+    for listing in updates:
+        book.apply("listing-delete", listing)
+
+    report("delete", len(updates), perf_counter() - start)
+    print(f"{len(book):,} listings left")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,88 @@
+"""Per-SKU price statistics, a pure Python dict loop compared to the
+vectorized pricing module.
+
+Usage: python -m benchmarks.bench_pricing [listings] [skus]
+"""
+
+import random
+import sys
+from time import perf_counter
+
+from src.backpack_tf.pricing import ListingColumns, get_price_stats
+
+KEY_PRICE = 60.0
+QUANTILES = (0.25, 0.5, 0.75)
+TRIM = 0.1
+
+
+def make_snapshots(listings: int, skus: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    snapshots = [{"sku": f"item {i}", "listings": []} for i in range(skus)]
+
+    for _ in range(listings):
+        rng.choice(snapshots)["listings"].append(
+            {
+                "intent": rng.choice(["buy", "sell"]),
+                "currencies": {
+                    "keys": rng.randrange(3),
+                    "metal": rng.randrange(500) / 9,
+                },
+                "bump": 1_700_000_000 + rng.randrange(86_400),
+            }
+        )
+
+    return snapshots
+
+
+def quantile(values: list[float], q: float) -> float:
+    position = q * (len(values) - 1)
+    below = int(position)
+    above = min(below + 1, len(values) - 1)
+    return values[below] + (values[above] - values[below]) * (position - below)
+
+
+def dict_loop(snapshots: list[dict]) -> dict:
+    groups = {}
+
+    for snapshot in snapshots:
+        for listing in snapshot["listings"]:
+            currencies = listing["currencies"]
+            price = currencies.get("keys", 0) * KEY_PRICE + currencies.get("metal", 0)
+            groups.setdefault((snapshot["sku"], listing["intent"]), []).append(price)
+
+    stats = {}
+
+    for group, prices in groups.items():
+        prices.sort()
+        cut = int(len(prices) * TRIM)
+
+        if len(prices) - 2 * cut > 0:
+            prices = prices[cut : len(prices) - cut]
+
+        stats[group] = [quantile(prices, q) for q in QUANTILES]
+
+    return stats
+
+
+def main(listings: int = 1_000_000, skus: int = 5_000) -> None:
+    snapshots = make_snapshots(listings, skus)
+
+    start = perf_counter()
+    dict_loop(snapshots)
+    loop = perf_counter() - start
+
+    start = perf_counter()
+    columns = ListingColumns.from_snapshots(snapshots)
+    load = perf_counter() - start
+
+    start = perf_counter()
+    get_price_stats(columns, KEY_PRICE, QUANTILES, TRIM)
+    vectorized = perf_counter() - start
+
+    print(f"dict loop    {loop * 1e3:>8.1f} ms")
+    print(f"load columns {load * 1e3:>8.1f} ms (once per snapshot sweep)")
+    print(f"vectorized   {vectorized * 1e3:>8.1f} ms ({loop / vectorized:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,38 @@
+"""Per-call latency of pooled sessions compared to one-off requests.
+
+Usage: python -m benchmarks.bench_session [calls]
+"""
+
+import sys
+from time import perf_counter
+
+import requests
+
+from benchmarks.stub_server import StubServer
+from src.backpack_tf import BackpackTF
+
+
+def bench(name: str, func, calls: int) -> None:
+    start = perf_counter()
+
+    for _ in range(calls):
+        func()
+
+    elapsed = perf_counter() - start
+    print(f"{name:<12} {elapsed / calls * 1e6:>10.1f} us/call")
+
+
+def main(calls: int = 1000) -> None:
+    with StubServer() as server:
+        url = server.url + "/agent/status"
+
+        def unpooled() -> None:
+            requests.request("POST", url, params={"token": "token"}).json()
+
+        with BackpackTF("token", "76561198253325712", base_url=server.url) as bptf:
+            bench("unpooled", unpooled, calls)
+            bench("pooled", bptf.get_user_agent_status, calls)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,30 @@
+import pytest
+
+from benchmarks.frames import make_frames
+from benchmarks.stub_server import STEAM_ID, StubServer, StubWebsocketServer
+from src.backpack_tf import BackpackTF
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture(scope="session")
+def stub_server():
+    with StubServer() as server:
+        yield server
+
+
+@pytest.fixture
+def bptf(stub_server: StubServer):
+    with BackpackTF("token", STEAM_ID, base_url=stub_server.url) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def frames() -> list[bytes]:
+    return make_frames(100, 50)
+
+
+@pytest.fixture
+def websocket_server(frames: list[bytes]):
+    with StubWebsocketServer(frames) as server:
+        yield server
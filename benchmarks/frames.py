@@ -0,0 +1,93 @@
+"""Websocket event frames shaped like the ones sent by ws.backpack.tf"""
+
+import json
+import random
+
+QUALITIES = [
+    {"id": 6, "name": "Unique", "color": "#FFD700"},
+    {"id": 11, "name": "Strange", "color": "#CF6A32"},
+    {"id": 5, "name": "Unusual", "color": "#8650AC"},
+]
+ITEMS = [
+    (5021, "Mann Co. Supply Crate Key"),
+    (263, "Ellis' Cap"),
+    (30745, "Siberian Sweater"),
+    (378, "Team Captain"),
+    (5002, "Refined Metal"),
+]
+
+
+def make_event(index: int, rng: random.Random = random) -> dict:
+    defindex, name = rng.choice(ITEMS)
+    quality = rng.choice(QUALITIES)
+    steamid = str(76561198000000000 + rng.randrange(100_000))
+    intent = rng.choice(["buy", "sell"])
+    listed_at = 1_700_000_000 + index
+    event = "listing-update" if rng.random() < 0.9 else "listing-delete"
+
+    return {
+        "id": f"{index:024x}",
+        "event": event,
+        "payload": {
+            "id": f"440_{steamid}_{index:032x}",
+            "steamid": steamid,
+            "appid": 440,
+            "currencies": {"keys": rng.randrange(3), "metal": rng.randrange(500) / 9},
+            "value": {"raw": 12.5, "short": "0.2 keys", "long": "12.5 ref"},
+            "tradeOffersPreferred": True,
+            "buyoutOnly": True,
+            "details": f"{intent}ing {name} for the listed price, send an offer!",
+            "listedAt": listed_at,
+            "bumpedAt": listed_at,
+            "intent": intent,
+            "count": 1,
+            "status": "active",
+            "source": "userAgent",
+            "item": {
+                "appid": 440,
+                "baseName": name,
+                "defindex": defindex,
+                "id": str(10_000_000_000 + index),
+                "imageUrl": "https://steamcdn-a.akamaihd.net/apps/440/icons/item.png",
+                "marketName": f"{quality['name']} {name}",
+                "name": name,
+                "origin": None,
+                "originalId": str(9_000_000_000 + index),
+                "price": {},
+                "quality": quality,
+                "summary": "Level 1 Hat",
+                "class": ["Scout", "Soldier"],
+                "slot": "misc",
+                "tradable": True,
+                "craftable": True,
+            },
+            "userAgent": {"client": "superbot5000", "lastPulse": listed_at},
+            "user": {
+                "id": steamid,
+                "name": f"trader {steamid[-5:]}",
+                "avatar": "https://avatars.steamstatic.com/avatar.jpg",
+                "premium": False,
+                "online": True,
+                "banned": False,
+                "tradeOfferUrl": "https://steamcommunity.com/tradeoffer/new/",
+            },
+        },
+    }
+
+
+def make_frames(count: int = 100, batch_size: int = 50, seed: int = 0) -> list[bytes]:
+    """Encoded frames, each a batch of ``batch_size`` events"""
+    rng = random.Random(seed)
+    frames = []
+
+    for i in range(count):
+        events = [make_event(i * batch_size + j, rng) for j in range(batch_size)]
+        frames.append(json.dumps(events).encode())
+
+    return frames
+
+
+def load_frames(path: str) -> list[bytes]:
+    """Frames recorded one per line, e.g. by logging what ws.backpack.tf sent"""
+    with open(path, "rb") as file:
+        return [line.rstrip(b"\r\n") for line in file if line.strip()]
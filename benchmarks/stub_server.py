@@ -0,0 +1,300 @@
+"""Local stand-ins for api.backpack.tf and ws.backpack.tf, used by the
+benchmarks. The HTTP server keeps listings in memory and answers the
+classifieds, snapshot, users/info and agent endpoints, the websocket server
+replays frames at a configurable rate."""
+
+import asyncio
+import json
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Event, Lock, Thread
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.frames import make_event
+from src.backpack_tf.utils import get_buy_listing_id
+
+STEAM_ID = "76561198253325712"
+LISTING_PATH = re.compile(r"^/v2/classifieds/listings/(\d+_[^/]+)$")
+
+
+def make_listing(body: dict, steam_id: str = STEAM_ID) -> dict:
+    """Listing as returned by the API for a listing created from ``body``"""
+    item = body.get("item", {})
+    intent = "sell" if "id" in body else "buy"
+
+    if intent == "sell":
+        listing_id = f"440_{body['id']}"
+    else:
+        listing_id = get_buy_listing_id(steam_id, item.get("baseName", ""))
+
+    now = int(time.time())
+
+    return {
+        "id": listing_id,
+        "steamid": steam_id,
+        "appid": 440,
+        "currencies": body.get("currencies", {}),
+        "value": {},
+        "details": body.get("details", ""),
+        "listedAt": now,
+        "bumpedAt": now,
+        "intent": intent,
+        "count": 1,
+        "status": "active",
+        "source": "userAgent",
+        "item": {**item, "name": item.get("baseName", "")},
+    }
+
+
+def make_snapshot(sku: str, size: int) -> dict:
+    listings = []
+
+    for index in range(size):
+        payload = make_event(index)["payload"]
+        listings.append(
+            {
+                "steamid": payload["steamid"],
+                "offers": 1,
+                "buyout": 1,
+                "details": payload["details"],
+                "intent": payload["intent"],
+                "timestamp": payload["listedAt"],
+                "bump": payload["bumpedAt"],
+                "price": payload["value"]["raw"],
+                "item": payload["item"],
+                "currencies": payload["currencies"],
+                "userAgent": payload["userAgent"],
+            }
+        )
+
+    return {"listings": listings, "appid": 440, "sku": sku, "createdAt": time.time()}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "StubHTTPServer"
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length)) if length else None
+
+    def _send_json(self, data, status: int = 200) -> None:
+        body = json.dumps(data).encode()
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _respond(self) -> None:
+        url = urlsplit(self.path)
+        path = url.path.removeprefix("/api")
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        body = self._read_json()
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        status, data = self.server.route(self.command, path, query, body)
+        self._send_json(data, status)
+
+    do_GET = do_POST = do_PATCH = do_DELETE = _respond
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self, address: tuple[str, int], latency: float, snapshot_size: int
+    ) -> None:
+        super().__init__(address, StubHandler)
+        self.latency = latency
+        self.snapshot_size = snapshot_size
+        self.listings: dict[str, dict] = {}
+        self.requests = 0
+        self._lock = Lock()
+
+    def route(self, method: str, path: str, query: dict, body) -> tuple[int, object]:
+        with self._lock:
+            self.requests += 1
+
+            if path == "/v2/classifieds/listings":
+                return self._listings(method, query, body)
+
+            if path == "/v2/classifieds/listings/batch" and method == "POST":
+                created = [make_listing(listing) for listing in body]
+                self.listings.update((listing["id"], listing) for listing in created)
+                return 200, [{"result": listing} for listing in created]
+
+            match = LISTING_PATH.match(path)
+
+            if match is not None:
+                return self._listing(method, match.group(1), body)
+
+        if path == "/classifieds/listings/snapshot":
+            return 200, make_snapshot(query.get("sku", ""), self.snapshot_size)
+
+        if path == "/users/info/v1":
+            steam_ids = query.get("steamids", "").split(",")
+            return 200, {
+                "users": {steam_id: {"name": steam_id} for steam_id in steam_ids}
+            }
+
+        if path.startswith("/agent/"):
+            return 200, {"status": "active", "client": "stub"}
+
+        return 404, {"message": f"{method} {path} not found"}
+
+    def _listings(self, method: str, query: dict, body) -> tuple[int, object]:
+        # must hold the lock
+        if method == "GET":
+            skip = int(query.get("skip", 0))
+            limit = int(query.get("limit", 100))
+            listings = list(self.listings.values())[skip : skip + limit]
+            cursor = {"skip": skip, "limit": limit, "total": len(self.listings)}
+            return 200, {"results": listings, "cursor": cursor}
+
+        if method == "POST":
+            listing = make_listing(body)
+            self.listings[listing["id"]] = listing
+            return 200, listing
+
+        if method == "DELETE":
+            deleted = len(self.listings)
+            self.listings.clear()
+            return 200, {"deleted": deleted}
+
+        return 405, {"message": "Method not allowed"}
+
+    def _listing(self, method: str, listing_id: str, body) -> tuple[int, object]:
+        # must hold the lock
+        listing = self.listings.get(listing_id)
+
+        if listing is None:
+            return 404, {"message": "Listing not found"}
+
+        if method == "PATCH":
+            listing.update(body)
+            listing["bumpedAt"] = int(time.time())
+        elif method == "DELETE":
+            del self.listings[listing_id]
+            return 200, {}
+
+        return 200, listing
+
+
+class StubServer:
+    """Local stand-in for api.backpack.tf"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        snapshot_size: int = 50,
+    ) -> None:
+        """
+        Args:
+            latency: Seconds every request is delayed by
+            snapshot_size: Number of listings in every snapshot
+        """
+        self._server = StubHTTPServer((host, port), latency, snapshot_size)
+        self._thread = Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    @property
+    def listings(self) -> dict[str, dict]:
+        return self._server.listings
+
+    @property
+    def requests(self) -> int:
+        return self._server.requests
+
+    def __enter__(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class StubWebsocketServer:
+    """Local stand-in for ws.backpack.tf, sends ``frames`` to every client
+    ``repeat`` times, then closes the connection"""
+
+    def __init__(
+        self,
+        frames: list[bytes],
+        rate: float = None,
+        repeat: int = 1,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        """
+        Args:
+            frames: Encoded frames to send
+            rate: Frames sent per second, None to send as fast as possible
+            repeat: How many times the frames are sent
+        """
+        # sent as text, like ws.backpack.tf does
+        self.frames = [frame.decode() for frame in frames]
+        self.rate = rate
+        self.repeat = repeat
+        self._address = (host, port)
+        self._loop = asyncio.new_event_loop()
+        self._started = Event()
+        self._stopped: asyncio.Event | None = None
+        self._thread = Thread(
+            target=self._loop.run_until_complete, args=(self._serve(),)
+        )
+        self._thread.daemon = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._address
+        return f"ws://{host}:{port}"
+
+    async def _send_frames(self, websocket) -> None:
+        interval = 1 / self.rate if self.rate else 0.0
+        next_at = time.monotonic()
+
+        for _ in range(self.repeat):
+            for frame in self.frames:
+                if interval:
+                    next_at += interval
+                    await asyncio.sleep(max(next_at - time.monotonic(), 0))
+
+                await websocket.send(frame)
+
+        await websocket.close()
+
+    async def _serve(self) -> None:
+        from websockets.asyncio.server import serve
+
+        self._stopped = asyncio.Event()
+
+        async with serve(self._send_frames, *self._address, max_size=None) as server:
+            self._address = server.sockets[0].getsockname()[:2]
+            self._started.set()
+            await self._stopped.wait()
+
+    def __enter__(self) -> "StubWebsocketServer":
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._loop.call_soon_threadsafe(self._stopped.set)
+        self._thread.join()
+        self._loop.close()
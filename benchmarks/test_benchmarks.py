@@ -0,0 +1,124 @@
+"""pytest-benchmark suite against the local stub servers.
+
+Usage: python -m pytest benchmarks [--benchmark-autosave]
+"""
+
+import asyncio
+import subprocess
+import sys
+
+from aiohttp import ClientSession
+from websockets.exceptions import ConnectionClosed
+
+from benchmarks.stub_server import STEAM_ID, StubServer, StubWebsocketServer
+from src.backpack_tf import (
+    AsyncBackpackTF,
+    AsyncBackpackTFWebsocket,
+    BackpackTF,
+    BackpackTFWebsocket,
+)
+from src.backpack_tf.utils import construct_listings
+
+SKUS = ["5021;6", "263;6", "30745;6", "378;6", "5002;6"]
+
+
+def make_listings(count: int) -> list[dict]:
+    return [
+        {
+            "sku": SKUS[i % len(SKUS)],
+            "intent": "sell",
+            "currencies": {"keys": 1, "metal": i % 50 / 9},
+            "details": "Selling for the listed price, send an offer!",
+            "asset_id": 10_000_000_000 + i,
+        }
+        for i in range(count)
+    ]
+
+
+def test_import_time(benchmark) -> None:
+    # heavy dependencies are imported lazily, see tests/test_imports.py
+    code = "import src.backpack_tf as bptf; bptf.get_item_hash('Team Captain')"
+    benchmark.pedantic(
+        subprocess.run,
+        args=([sys.executable, "-c", code],),
+        kwargs={"check": True},
+        rounds=5,
+    )
+
+
+def test_request_throughput(benchmark, bptf: BackpackTF) -> None:
+    def send() -> None:
+        for _ in range(100):
+            bptf.get_user_agent_status()
+
+    benchmark(send)
+    benchmark.extra_info["requests"] = 100
+
+
+def test_create_listings(benchmark, bptf: BackpackTF) -> None:
+    listings = make_listings(1000)
+    results = benchmark(bptf.create_listings, listings, concurrency=4)
+
+    assert len(results) == 1000
+    assert not [result for result in results if not hasattr(result, "id")]
+
+
+def test_construct_listings(benchmark) -> None:
+    listings = make_listings(1000)
+    constructed, errors = benchmark(construct_listings, listings)
+
+    assert len(constructed) == 1000
+    assert not errors
+
+
+def test_snapshot_fan_out(benchmark, stub_server: StubServer) -> None:
+    skus = [f"{i};6" for i in range(100)]
+
+    async def fan_out() -> int:
+        async with ClientSession() as session:
+            client = AsyncBackpackTF(
+                session, "token", STEAM_ID, base_url=stub_server.url
+            )
+            results = [snapshot async for _, snapshot in client.get_snapshots(skus, 10)]
+
+        return len(results)
+
+    assert benchmark(lambda: asyncio.run(fan_out())) == len(skus)
+
+
+def test_websocket_ingest(benchmark, frames: list[bytes]) -> None:
+    events = sum(frame.count(b'"event"') for frame in frames)
+
+    def ingest() -> int:
+        received = []
+
+        with StubWebsocketServer(frames) as server:
+            socket = BackpackTFWebsocket(received.append, url=server.url)
+
+            try:
+                socket.listen()
+            except ConnectionClosed:
+                pass
+
+        return len(received)
+
+    assert benchmark.pedantic(ingest, rounds=5) == events
+    benchmark.extra_info["events"] = events
+
+
+def test_async_websocket_ingest(benchmark, frames: list[bytes]) -> None:
+    events = sum(frame.count(b'"event"') for frame in frames)
+
+    def ingest() -> int:
+        received = []
+
+        with StubWebsocketServer(frames) as server:
+            socket = AsyncBackpackTFWebsocket(
+                received.append, typed=True, reconnect=False, url=server.url
+            )
+            asyncio.run(socket.listen())
+
+        return len(received)
+
+    assert benchmark.pedantic(ingest, rounds=5) == events
+    benchmark.extra_info["events"] = events
@@ -1,16 +1,79 @@
-# flake8: noqa: F401, F403
+# flake8: noqa: F401, F403, F405
 __title__ = "backpack-tf"
 __version__ = "0.2.0"
 __author__ = "offish"
 __license__ = "MIT"
 
-from .backpack_tf import AsyncBackpackTF, BackpackTF
-from .classes import Currencies, Entity, ItemDocument, Listing
+from importlib import import_module
+
 from .exceptions import *
-from .utils import (
-    construct_listing,
-    construct_listing_item,
-    get_item_hash,
-    get_sku_item_hash,
-)
-from .websocket import BackpackTFWebsocket
+
+# name to the module defining it, imported on first access so that
+# requests, aiohttp, websockets and tf2-utils only load when they are used
+_LAZY_IMPORTS = {
+    "AsyncBackpackTF": "backpack_tf",
+    "BackpackTF": "backpack_tf",
+    "MicroBatcher": "batching",
+    "ResponseCache": "cache",
+    "Currencies": "classes",
+    "Entity": "classes",
+    "ItemDocument": "classes",
+    "Listing": "classes",
+    "ListingError": "classes",
+    "User": "classes",
+    "ListingEvent": "events",
+    "ListingPayload": "events",
+    "decode_events": "events",
+    "EventFilter": "filters",
+    "ShardedBackpackTFWebsocket": "ingest",
+    "Instrumentation": "instrumentation",
+    "MetricsRecorder": "instrumentation",
+    "OpenTelemetryInstrumentation": "instrumentation",
+    "PrometheusInstrumentation": "instrumentation",
+    "Journal": "journal",
+    "JournalRecord": "journal",
+    "OrderBook": "orderbook",
+    "ListingDiff": "reconcile",
+    "ReconcileResult": "reconcile",
+    "diff_listings": "reconcile",
+    "CircuitBreaker": "resilience",
+    "RetryPolicy": "resilience",
+    "RateLimiter": "ratelimit",
+    "TokenBucket": "ratelimit",
+    "clear_sku_cache": "utils",
+    "construct_listing": "utils",
+    "construct_listing_item": "utils",
+    "get_buy_listing_id": "utils",
+    "get_cache_stats": "utils",
+    "get_item_hash": "utils",
+    "get_listing_id": "utils",
+    "get_sku_item_hash": "utils",
+    "warmup": "utils",
+    "AsyncBackpackTFWebsocket": "websocket",
+    "BackpackTFWebsocket": "websocket",
+}
+
+
+# lazily imported names are only loaded by a star import
+__all__ = [
+    *_LAZY_IMPORTS,
+    "BackpackTFException",
+    "NoTokenProvided",
+    "NeedsAPIKey",
+    "InvalidIntent",
+    "UserNotFound",
+    "CircuitOpen",
+]
+
+
+def __getattr__(name: str):
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(f".{_LAZY_IMPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_LAZY_IMPORTS])
@@ -1,17 +1,105 @@
-import requests
-from aiohttp import ClientSession
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
 
 from . import __title__, __version__
-from .classes import Listing
-from .exceptions import NeedsAPIKey, UserNotFound
+from .cache import ResponseCache
+from .classes import Listing, ListingError
+from .decoding import Decoder, get_decoder
+from .exceptions import CircuitOpen, NeedsAPIKey, UserNotFound
+from .instrumentation import Instrumentation
+from .journal import Journal
+from .ratelimit import RateLimiter
+from .reconcile import ReconcileResult, diff_listings
+from .resilience import RetryPolicy
 from .utils import (
+    chunk_list,
     construct_listing,
+    construct_listings,
     get_item_hash,
+    get_listing_id,
     get_sku_item_hash,
+    merge_batch_results,
     needs_api_key,
     needs_token,
+    parse_batch_response,
 )
 
+# requests and aiohttp are imported when a client first needs them, so
+# using one client does not pay for importing the other
+if TYPE_CHECKING:
+    import requests
+    from aiohttp import ClientSession
+    from requests.adapters import BaseAdapter
+
+API_URL = "https://api.backpack.tf/api"
+MAX_BATCH_SIZE = 100
+MAX_STEAM_IDS = 100
+
+
+def get_cached_users(
+    cache: ResponseCache | None, steam_ids: Iterable[str | int]
+) -> tuple[dict[str, dict], list[str]]:
+    steam_ids = list(dict.fromkeys(str(steam_id) for steam_id in steam_ids))
+
+    if cache is None:
+        return {}, steam_ids
+
+    return cache.get_many("users_info", steam_ids)
+
+
+def get_listing_changes(currencies: dict = None, details: str = None) -> dict:
+    changes = {}
+
+    if currencies is not None:
+        changes["currencies"] = currencies
+
+    if details is not None:
+        changes["details"] = details
+
+    return changes
+
+
+def get_page(
+    response: dict, skip: int, max_listings: int = None
+) -> tuple[list[dict], int | None]:
+    """Listings of a ``get_listings`` page and where the next page starts,
+    None if this was the last page"""
+    results = response.get("results", [])
+    total = response.get("cursor", {}).get("total", 0)
+
+    if max_listings is not None:
+        results = results[: max(max_listings - skip, 0)]
+        total = min(total, max_listings)
+
+    skip += len(results)
+
+    if not results or skip >= total:
+        return results, None
+
+    return results, skip
+
+
+def get_body_size(kwargs: dict) -> int:
+    """Size of the body aiohttp sends for a request"""
+    if "json" in kwargs:
+        return len(json.dumps(kwargs["json"]).encode())
+
+    data = kwargs.get("data")
+    return len(data) if isinstance(data, (bytes, str)) else 0
+
+
+def get_requests_status(error: Exception) -> int | None:
+    response = getattr(error, "response", None)
+    return response.status_code if response is not None else None
+
+
+def get_aiohttp_status(error: Exception) -> int | None:
+    return getattr(error, "status", None)
+
 
 class BackpackTF:
     def __init__(
@@ -20,14 +108,91 @@ class BackpackTF:
         steam_id: str,
         api_key: str = None,
         user_agent: str = "Listing goin' up!",
+        session: "requests.Session" = None,
+        pool_size: int = 10,
+        keep_alive: bool = True,
+        adapter: "BaseAdapter" = None,
+        base_url: str = API_URL,
+        rate_limiter: RateLimiter = None,
+        cache: ResponseCache = None,
+        decoder: str | Decoder = "auto",
+        retry_policy: RetryPolicy = None,
+        instrumentation: Instrumentation = None,
+        journal: Journal = None,
     ) -> None:
+        """
+        Args:
+            token: Backpack.tf user token
+            steam_id: SteamID64 of the account owning the token
+            api_key: Backpack.tf API key, needed for some endpoints
+            user_agent: User agent shown on Backpack.tf
+            session: Existing session to use. Will not be closed by this client
+            pool_size: Maximum number of pooled connections to keep open
+            keep_alive: If connections should be reused between requests
+            adapter: Transport adapter to mount instead of the default
+                ``HTTPAdapter``, e.g. an HTTP/2 capable one
+            base_url: Base URL of the API
+            rate_limiter: Limiter to throttle requests with, can be shared
+                with other clients
+            cache: Cache for snapshots, listings and user info, can be
+                shared with other clients
+            decoder: JSON decoder name ("auto", "orjson", "msgspec", "json")
+                or a callable taking str or bytes
+            retry_policy: Retries, hedging and circuit breaking for failed
+                requests, can be shared with other clients
+            instrumentation: Sink for request timings, statuses and sizes
+            journal: Journal to record successful response bodies in
+        """
         self._token = token
         self._steam_id = steam_id
         self._api_key = api_key
+        self._base_url = base_url
+        self._rate_limiter = rate_limiter
+        self._retry_policy = retry_policy
+        self._instrumentation = instrumentation
+        self._journal = journal
+        self._cache = cache
+        self._loads = get_decoder(decoder)
 
         library = f"{__title__} v{__version__}"
         self._headers = {"User-Agent": f"{user_agent} | {library}"}
 
+        if not keep_alive:
+            self._headers["Connection"] = "close"
+
+        self._owns_session = session is None
+        self._session = session or self._create_session(pool_size, adapter)
+
+    def __enter__(self) -> "BackpackTF":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @staticmethod
+    def _create_session(
+        pool_size: int, adapter: "BaseAdapter" = None
+    ) -> "requests.Session":
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        if adapter is None:
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def close(self) -> None:
+        """Close pooled connections if the session is owned by this client,
+        and the threads of the retry policy"""
+        if self._owns_session:
+            self._session.close()
+
+        if self._retry_policy is not None:
+            self._retry_policy.close()
+
     @needs_token
     def request(self, method: str, endpoint: str, params: dict = {}, **kwargs) -> dict:
         params["token"] = self._token
@@ -35,24 +200,89 @@ class BackpackTF:
         if self._api_key:
             params["key"] = self._api_key
 
-        url = "https://api.backpack.tf/api" + endpoint
+        if self._retry_policy is None:
+            return self._send(method, endpoint, params, **kwargs)
 
-        response = requests.request(
+        import requests
+
+        return self._retry_policy.call(
             method,
-            url,
-            params=params,
-            headers=self._headers,
-            **kwargs,
+            endpoint,
+            lambda: self._send(method, endpoint, params, **kwargs),
+            (requests.ConnectionError, requests.Timeout, requests.HTTPError),
+            get_requests_status,
         )
+
+    def _send(self, method: str, endpoint: str, params: dict, **kwargs) -> dict:
+        url = self._base_url + endpoint
+        limiter = self._rate_limiter
+        metrics = self._instrumentation
+        retries = 0
+
+        while True:
+            if limiter is not None:
+                limiter.acquire(method, endpoint)
+
+            started = time.perf_counter()
+
+            try:
+                response = self._session.request(
+                    method,
+                    url,
+                    params=params,
+                    headers=self._headers,
+                    **kwargs,
+                )
+            except Exception:
+                if metrics is not None:
+                    duration = time.perf_counter() - started
+                    metrics.on_request(method, endpoint, None, duration, 0, 0)
+
+                raise
+
+            if metrics is not None:
+                body = response.request.body
+                metrics.on_request(
+                    method,
+                    endpoint,
+                    response.status_code,
+                    time.perf_counter() - started,
+                    len(body) if body else 0,
+                    len(response.content),
+                )
+
+            if limiter is None:
+                break
+
+            limiter.update(method, endpoint, response.status_code, response.headers)
+
+            if response.status_code != 429 or retries >= limiter.max_retries:
+                break
+
+            retries += 1
+
+            if metrics is not None:
+                metrics.on_retry(method, endpoint, 429)
+
+            delay = limiter.get_retry_delay(method, endpoint, response.headers, retries)
+
+            if delay > 0:
+                time.sleep(delay)
+
         response.raise_for_status()
 
-        return response.json()
+        if self._journal is not None:
+            self._journal.append_response(method, endpoint, response.content)
 
-    @needs_api_key
-    def is_banned(self, steam_id: str | int) -> bool:
-        if isinstance(steam_id, int):
-            steam_id = str(steam_id)
+        return self._loads(response.content)
+
+    def _cached(self, namespace: str, key: str, fetch: Callable[[], dict]) -> dict:
+        if self._cache is None:
+            return fetch()
 
+        return self._cache.get_or_fetch(namespace, key, fetch)
+
+    def _get_user(self, steam_id: str) -> dict:
         endpoint = "/users/info/v1"
         params = {"steamids": steam_id}
         response = self.request("GET", endpoint, params)
@@ -60,17 +290,61 @@ class BackpackTF:
         if "users" not in response or steam_id not in response["users"]:
             raise UserNotFound(f"User {steam_id} not found {response}")
 
-        user = response["users"][steam_id]
+        return response["users"][steam_id]
+
+    def _get_users(self, steam_ids: list[str]) -> dict[str, dict]:
+        endpoint = "/users/info/v1"
+        params = {"steamids": ",".join(steam_ids)}
+        users = self.request("GET", endpoint, params).get("users", {})
+
+        if self._cache is not None:
+            for steam_id, user in users.items():
+                self._cache.set("users_info", steam_id, user)
+
+        return users
+
+    @needs_api_key
+    def is_banned(self, steam_id: str | int) -> bool:
+        if isinstance(steam_id, int):
+            steam_id = str(steam_id)
+
+        user = self._cached("users_info", steam_id, lambda: self._get_user(steam_id))
         return user.get("bans") is not None
 
+    @needs_api_key
+    def are_banned(
+        self, steam_ids: Iterable[str | int], concurrency: int = 4
+    ) -> dict[str, bool]:
+        """Check bans for many users, requesting up to 100 at a time.
+        Users Backpack.tf does not know about are left out"""
+        users, missing = get_cached_users(self._cache, steam_ids)
+        batches = chunk_list(missing, MAX_STEAM_IDS)
+
+        if len(batches) <= 1 or concurrency <= 1:
+            results = [self._get_users(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(min(concurrency, len(batches))) as executor:
+                results = list(executor.map(self._get_users, batches))
+
+        for result in results:
+            users.update(result)
+
+        return {
+            steam_id: user.get("bans") is not None for steam_id, user in users.items()
+        }
+
     def get_snapshot(self, item_name: str) -> list[dict]:
         endpoint = "/classifieds/listings/snapshot"
         params = {"appid": 440, "sku": item_name}
-        return self.request("GET", endpoint, params)
+        return self._cached(
+            "snapshot", item_name, lambda: self.request("GET", endpoint, params)
+        )
 
     def get_listing(self, listing_id: str) -> dict:
         endpoint = f"/v2/classifieds/listings/{listing_id}"
-        return self.request("GET", endpoint)
+        return self._cached(
+            "listing", listing_id, lambda: self.request("GET", endpoint)
+        )
 
     def get_user_trade_url(self, listing_id: str) -> str:
         user = self.get_listing(listing_id).get("user", {})
@@ -81,22 +355,165 @@ class BackpackTF:
             "GET", "/v2/classifieds/listings", {"skip": skip, "limit": limit}
         )
 
+    def iter_listings(
+        self, page_size: int = 100, max_listings: int = None
+    ) -> Iterator[Listing]:
+        """Yield the listings of the account page by page. The next page is
+        requested in the background while the current one is consumed, so
+        only about two pages are held in memory.
+
+        Args:
+            page_size: Listings requested per page
+            max_listings: Stop after this many listings
+        """
+        executor = ThreadPoolExecutor(1)
+        future = executor.submit(self.get_listings, 0, page_size)
+        skip = 0
+
+        try:
+            while future is not None:
+                results, skip = get_page(future.result(), skip, max_listings)
+                future = None
+
+                if skip is not None:
+                    future = executor.submit(self.get_listings, skip, page_size)
+
+                for listing in results:
+                    yield Listing.from_dict(listing)
+        finally:
+            # stopped early, a page nobody will read is left to finish in the
+            # background instead of being waited for
+            executor.shutdown(wait=False, cancel_futures=True)
+
     def create_listing(
         self, sku: str, intent: str, currencies: dict, details: str, asset_id: int = 0
     ) -> Listing:
         listing = construct_listing(sku, intent, currencies, details, asset_id)
         response = self.request("POST", "/v2/classifieds/listings", json=listing)
-        return Listing(**response)
+        return Listing.from_dict(response)
+
+    def _create_listing_batch(
+        self, batch: list[tuple[int, dict]]
+    ) -> list[Listing | ListingError]:
+        import requests
+
+        to_list = [listing for _, listing in batch]
+
+        try:
+            response = self.request(
+                "POST", "/v2/classifieds/listings/batch", json=to_list
+            )
+        except (requests.RequestException, CircuitOpen) as e:
+            status = get_requests_status(e)
+            return [ListingError(listing, str(e), status) for listing in to_list]
+
+        return parse_batch_response(to_list, response)
+
+    def create_listings(
+        self,
+        listings: list[dict],
+        batch_size: int = MAX_BATCH_SIZE,
+        concurrency: int = 4,
+    ) -> list[Listing | ListingError]:
+        """Create listings in batches of ``batch_size``, sending up to
+        ``concurrency`` batches at once. Results are in the same order as
+        ``listings``, with a ``ListingError`` for every listing that failed"""
+        constructed, errors = construct_listings(listings)
+        batches = chunk_list(constructed, batch_size)
+
+        if len(batches) <= 1 or concurrency <= 1:
+            results = [self._create_listing_batch(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(min(concurrency, len(batches))) as executor:
+                results = list(executor.map(self._create_listing_batch, batches))
+
+        return merge_batch_results(len(listings), errors, batches, results)
+
+    def update_listing(
+        self, listing_id: str, currencies: dict = None, details: str = None
+    ) -> Listing:
+        """Change the price or details of a listing without relisting it"""
+        changes = get_listing_changes(currencies, details)
+
+        if self._cache is not None:
+            self._cache.invalidate("listing", listing_id)
+
+        endpoint = f"/v2/classifieds/listings/{listing_id}"
+        response = self.request("PATCH", endpoint, json=changes)
+        return Listing.from_dict(response)
+
+    def _try_update_listing(self, update: tuple[str, dict]) -> Listing | ListingError:
+        import requests
+
+        listing_id, changes = update
+
+        try:
+            return self.update_listing(listing_id, **changes)
+        except (requests.RequestException, CircuitOpen) as e:
+            status = get_requests_status(e)
+            return ListingError({"id": listing_id, **changes}, str(e), status)
+
+    def _try_delete_listing(self, listing_id: str) -> dict | ListingError:
+        import requests
+
+        try:
+            return self.delete_listing(listing_id)
+        except (requests.RequestException, CircuitOpen) as e:
+            status = get_requests_status(e)
+            return ListingError({"id": listing_id}, str(e), status)
+
+    @staticmethod
+    def _map(func: Callable, items: list, concurrency: int) -> list:
+        if len(items) <= 1 or concurrency <= 1:
+            return [func(item) for item in items]
+
+        with ThreadPoolExecutor(min(concurrency, len(items))) as executor:
+            return list(executor.map(func, items))
+
+    def reconcile_listings(
+        self,
+        listings: list[dict],
+        delete: bool = True,
+        batch_size: int = MAX_BATCH_SIZE,
+        concurrency: int = 4,
+    ) -> ReconcileResult:
+        """Make the listings of the account match ``listings``, instead of
+        deleting and creating all of them. Listings which are already up
+        keep their age and are only updated if their price or details
+        changed.
+
+        Args:
+            listings: Keyword arguments of ``create_listing`` for every
+                listing which should be up
+            delete: If listings which are not in ``listings`` are deleted
+            batch_size: Listings created per batch request
+            concurrency: Requests sent at once
+        """
+        live = list(self.iter_listings())
+        diff = diff_listings(self._steam_id, listings, live, delete)
+        result = ReconcileResult(diff)
+
+        if diff.create:
+            result.created = self.create_listings(diff.create, batch_size, concurrency)
+
+        updates = list(diff.update.items())
+        updated = self._map(self._try_update_listing, updates, concurrency)
+        result.updated = dict(zip(diff.update, updated))
+
+        result.deleted = self.delete_listings(diff.delete, concurrency)
 
-    def create_listings(self, listings: list[dict]) -> list[Listing]:
-        to_list = [construct_listing(**listing) for listing in listings]
-        response = self.request("POST", "/v2/classifieds/listings/batch", json=to_list)
-        return [Listing(**listing["result"]) for listing in response]
+        return result
 
     def delete_all_listings(self) -> dict:
+        if self._cache is not None:
+            self._cache.invalidate("listing")
+
         return self.request("DELETE", "/v2/classifieds/listings")
 
     def delete_listing(self, listing_id: str) -> dict:
+        if self._cache is not None:
+            self._cache.invalidate("listing", listing_id)
+
         return self.request("DELETE", f"/v2/classifieds/listings/{listing_id}")
 
     def delete_listing_by_asset_id(self, asset_id: int) -> dict:
@@ -118,6 +535,44 @@ class BackpackTF:
         item_hash = get_sku_item_hash(sku)
         return self.delete_listing_by_item_name(item_hash, is_hash=True)
 
+    def delete_listings(
+        self, listing_ids: Iterable[str], concurrency: int = 4
+    ) -> dict[str, dict | ListingError]:
+        """Delete many listings, sending up to ``concurrency`` requests at
+        once within the rate limit. Returns the response or a
+        ``ListingError`` for every listing id"""
+        listing_ids = list(dict.fromkeys(listing_ids))
+        deleted = self._map(self._try_delete_listing, listing_ids, concurrency)
+        return dict(zip(listing_ids, deleted))
+
+    def _delete_listings_by(self, listing_ids: dict, concurrency: int) -> dict:
+        deleted = self.delete_listings(listing_ids.values(), concurrency)
+        return {key: deleted[listing_id] for key, listing_id in listing_ids.items()}
+
+    def delete_listings_by_asset_id(
+        self, asset_ids: Iterable[int], concurrency: int = 4
+    ) -> dict[int, dict | ListingError]:
+        """Delete sell listings, see ``delete_listings``. Keyed by asset id"""
+        listing_ids = {asset_id: f"440_{asset_id}" for asset_id in asset_ids}
+        return self._delete_listings_by(listing_ids, concurrency)
+
+    def delete_listings_by_item_name(
+        self, item_names: Iterable[str], concurrency: int = 4
+    ) -> dict[str, dict | ListingError]:
+        """Delete buy listings, see ``delete_listings``. Keyed by item name"""
+        listing_ids = {
+            item_name: f"440_{self._steam_id}_{get_item_hash(item_name)}"
+            for item_name in item_names
+        }
+        return self._delete_listings_by(listing_ids, concurrency)
+
+    def delete_listings_by_sku(
+        self, skus: Iterable[str], concurrency: int = 4
+    ) -> dict[str, dict | ListingError]:
+        """Delete buy listings, see ``delete_listings``. Keyed by SKU"""
+        listing_ids = {sku: get_listing_id(self._steam_id, sku, "buy") for sku in skus}
+        return self._delete_listings_by(listing_ids, concurrency)
+
     def register_user_agent(self) -> dict:
         return self.request("POST", "/agent/pulse")
 
@@ -131,16 +586,30 @@ class BackpackTF:
 class AsyncBackpackTF:
     def __init__(
         self,
-        session: ClientSession,
+        session: "ClientSession",
         token: str,
         steam_id: str,
         api_key: str = None,
         user_agent: str = "Listing goin' up!",
+        base_url: str = API_URL,
+        rate_limiter: RateLimiter = None,
+        cache: ResponseCache = None,
+        decoder: str | Decoder = "auto",
+        retry_policy: RetryPolicy = None,
+        instrumentation: Instrumentation = None,
+        journal: Journal = None,
     ) -> None:
         self.session = session
         self._token = token
         self._steam_id = steam_id
         self._api_key = api_key
+        self._base_url = base_url
+        self._rate_limiter = rate_limiter
+        self._retry_policy = retry_policy
+        self._instrumentation = instrumentation
+        self._journal = journal
+        self._cache = cache
+        self._loads = get_decoder(decoder)
 
         library = f"{__title__} v{__version__}"
         self._headers = {"User-Agent": f"{user_agent} | {library}"}
@@ -148,31 +617,93 @@ class AsyncBackpackTF:
     async def request(
         self, method: str, endpoint: str, params: dict = {}, **kwargs
     ) -> dict:
-        url = "https://api.backpack.tf/api" + endpoint
         params["token"] = self._token
 
         if self._api_key:
             params["key"] = self._api_key
 
-        async with self.session.request(
+        if self._retry_policy is None:
+            return await self._send(method, endpoint, params, **kwargs)
+
+        from aiohttp import ClientConnectionError, ClientResponseError
+
+        return await self._retry_policy.call_async(
             method,
-            url,
-            params=params,
-            headers=self._headers,
-            **kwargs,
-        ) as resp:
+            endpoint,
+            lambda: self._send(method, endpoint, params, **kwargs),
+            (ClientConnectionError, ClientResponseError, asyncio.TimeoutError),
+            get_aiohttp_status,
+        )
+
+    async def _send(self, method: str, endpoint: str, params: dict, **kwargs) -> dict:
+        url = self._base_url + endpoint
+        limiter = self._rate_limiter
+        metrics = self._instrumentation
+        retries = 0
+
+        while True:
+            if limiter is not None:
+                await limiter.acquire_async(method, endpoint)
+
+            started = time.perf_counter()
+            status = None
+            body = b""
+
+            try:
+                async with self.session.request(
+                    method,
+                    url,
+                    params=params,
+                    headers=self._headers,
+                    **kwargs,
+                ) as resp:
+                    status = resp.status
+                    body = await resp.read()
+            finally:
+                if metrics is not None:
+                    metrics.on_request(
+                        method,
+                        endpoint,
+                        status,
+                        time.perf_counter() - started,
+                        get_body_size(kwargs),
+                        len(body),
+                    )
+
+            if limiter is not None:
+                limiter.update(method, endpoint, resp.status, resp.headers)
+
+                if resp.status == 429 and retries < limiter.max_retries:
+                    retries += 1
+
+                    if metrics is not None:
+                        metrics.on_retry(method, endpoint, 429)
+
+                    delay = limiter.get_retry_delay(
+                        method, endpoint, resp.headers, retries
+                    )
+
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+                    continue
+
             resp.raise_for_status()
-            response = await resp.json()
 
-        return response
+            if self._journal is not None:
+                self._journal.append_response(method, endpoint, body)
 
-    async def is_banned(self, steam_id: str | int) -> bool:
-        if self._api_key is None:
-            raise NeedsAPIKey("Set an API key to use this method")
+            return self._loads(body)
 
-        if isinstance(steam_id, int):
-            steam_id = str(steam_id)
+    async def _cached(
+        self, namespace: str, key: str, fetch: Callable[[], Awaitable[dict]]
+    ) -> dict:
+        if self._cache is None:
+            return await fetch()
+
+        return await self._cache.get_or_fetch_async(namespace, key, fetch)
 
+    async def _get_user(self, steam_id: str) -> dict:
         endpoint = "/users/info/v1"
         params = {"steamids": steam_id}
         response = await self.request("GET", endpoint, params)
@@ -180,16 +711,129 @@ class AsyncBackpackTF:
         if "users" not in response or steam_id not in response["users"]:
             raise UserNotFound(f"User {steam_id} not found {response}")
 
-        user = response["users"][steam_id]
+        return response["users"][steam_id]
+
+    async def _get_users(
+        self, steam_ids: list[str], semaphore: asyncio.Semaphore
+    ) -> dict[str, dict]:
+        endpoint = "/users/info/v1"
+        params = {"steamids": ",".join(steam_ids)}
+
+        async with semaphore:
+            response = await self.request("GET", endpoint, params)
+
+        users = response.get("users", {})
+
+        if self._cache is not None:
+            for steam_id, user in users.items():
+                self._cache.set("users_info", steam_id, user)
+
+        return users
+
+    async def is_banned(self, steam_id: str | int) -> bool:
+        if self._api_key is None:
+            raise NeedsAPIKey("Set an API key to use this method")
+
+        if isinstance(steam_id, int):
+            steam_id = str(steam_id)
+
+        user = await self._cached(
+            "users_info", steam_id, lambda: self._get_user(steam_id)
+        )
         return user.get("bans") is not None
 
+    async def are_banned(
+        self, steam_ids: Iterable[str | int], concurrency: int = 4
+    ) -> dict[str, bool]:
+        """Check bans for many users, requesting up to 100 at a time.
+        Users Backpack.tf does not know about are left out"""
+        if self._api_key is None:
+            raise NeedsAPIKey("Set an API key to use this method")
+
+        users, missing = get_cached_users(self._cache, steam_ids)
+        semaphore = asyncio.Semaphore(concurrency)
+        results = await asyncio.gather(
+            *[
+                self._get_users(batch, semaphore)
+                for batch in chunk_list(missing, MAX_STEAM_IDS)
+            ]
+        )
+
+        for result in results:
+            users.update(result)
+
+        return {
+            steam_id: user.get("bans") is not None for steam_id, user in users.items()
+        }
+
     async def get_snapshot(self, item_name: str) -> list[dict]:
         endpoint = "/classifieds/listings/snapshot"
         params = {"appid": 440, "sku": item_name}
-        return await self.request("GET", endpoint, params)
+        return await self._cached(
+            "snapshot", item_name, lambda: self.request("GET", endpoint, params)
+        )
+
+    async def get_snapshots(
+        self, skus: Iterable[str], concurrency: int = 10
+    ) -> AsyncIterator[tuple[str, dict | Exception]]:
+        """Get snapshots for many SKUs, yielding ``(sku, snapshot)`` as they
+        complete. If a snapshot could not be fetched the exception is yielded
+        in place of the snapshot. Failed requests are retried by the
+        client's ``retry_policy``.
+
+        Args:
+            skus: SKUs or item names to get snapshots for, consumed lazily
+            concurrency: Maximum amount of requests in flight
+        """
+        skus = iter(skus)
+        queue = asyncio.Queue(concurrency)
+        stopped = False
+
+        async def worker() -> None:
+            try:
+                for sku in skus:
+                    try:
+                        snapshot = await self.get_snapshot(sku)
+                    except Exception as e:
+                        snapshot = e
+
+                    await queue.put((sku, snapshot))
+            except Exception as e:
+                # e.g. iterating skus failed, raised again by the consumer
+                await queue.put(e)
+            finally:
+                # nobody reads the queue once the consumer stopped
+                if not stopped:
+                    await queue.put(None)
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        running = len(workers)
+
+        try:
+            while running:
+                result = await queue.get()
+
+                if result is None:
+                    running -= 1
+                    continue
+
+                if isinstance(result, Exception):
+                    raise result
+
+                yield result
+        finally:
+            stopped = True
+
+            for task in workers:
+                task.cancel()
+
+            await asyncio.gather(*workers, return_exceptions=True)
 
     async def get_listing(self, listing_id: str) -> dict:
-        return await self.request("GET", f"/v2/classifieds/listings/{listing_id}")
+        endpoint = f"/v2/classifieds/listings/{listing_id}"
+        return await self._cached(
+            "listing", listing_id, lambda: self.request("GET", endpoint)
+        )
 
     async def get_user_trade_url(self, listing_id: str) -> str:
         listing = await self.get_listing(listing_id)
@@ -201,23 +845,167 @@ class AsyncBackpackTF:
         params = {"skip": skip, "limit": limit}
         return await self.request("GET", endpoint, params)
 
+    async def aiter_listings(
+        self, page_size: int = 100, max_listings: int = None
+    ) -> AsyncIterator[Listing]:
+        """Yield the listings of the account page by page. The next page is
+        requested while the current one is consumed, so only about two
+        pages are held in memory.
+
+        Args:
+            page_size: Listings requested per page
+            max_listings: Stop after this many listings
+        """
+        task = asyncio.ensure_future(self.get_listings(0, page_size))
+        skip = 0
+
+        try:
+            while task is not None:
+                results, skip = get_page(await task, skip, max_listings)
+                task = None
+
+                if skip is not None:
+                    task = asyncio.ensure_future(self.get_listings(skip, page_size))
+
+                for listing in results:
+                    yield Listing.from_dict(listing)
+        finally:
+            # stopped early, the prefetched page is not needed
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
     async def create_listing(
         self, sku: str, intent: str, currencies: dict, details: str, asset_id: int = 0
     ) -> Listing:
         listing = construct_listing(sku, intent, currencies, details, asset_id)
         response = await self.request("POST", "/v2/classifieds/listings", json=listing)
-        return Listing(**response)
+        return Listing.from_dict(response)
+
+    async def _create_listing_batch(
+        self, batch: list[tuple[int, dict]], semaphore: asyncio.Semaphore
+    ) -> list[Listing | ListingError]:
+        from aiohttp import ClientError
 
-    async def create_listings(self, listings: list[dict]) -> list[Listing]:
         endpoint = "/v2/classifieds/listings/batch"
-        to_list = [construct_listing(**listing) for listing in listings]
-        response = await self.request("POST", endpoint, json=to_list)
-        return [Listing(**listing["result"]) for listing in response]
+        to_list = [listing for _, listing in batch]
+
+        try:
+            async with semaphore:
+                response = await self.request("POST", endpoint, json=to_list)
+        except (ClientError, asyncio.TimeoutError, CircuitOpen) as e:
+            status = get_aiohttp_status(e)
+            return [ListingError(listing, str(e), status) for listing in to_list]
+
+        return parse_batch_response(to_list, response)
+
+    async def create_listings(
+        self,
+        listings: list[dict],
+        batch_size: int = MAX_BATCH_SIZE,
+        concurrency: int = 4,
+    ) -> list[Listing | ListingError]:
+        """Create listings in batches of ``batch_size``, sending up to
+        ``concurrency`` batches at once. Results are in the same order as
+        ``listings``, with a ``ListingError`` for every listing that failed"""
+        semaphore = asyncio.Semaphore(concurrency)
+        return await self._create_listings(listings, batch_size, semaphore)
+
+    async def _create_listings(
+        self, listings: list[dict], batch_size: int, semaphore: asyncio.Semaphore
+    ) -> list[Listing | ListingError]:
+        constructed, errors = construct_listings(listings)
+        batches = chunk_list(constructed, batch_size)
+        results = await asyncio.gather(
+            *[self._create_listing_batch(batch, semaphore) for batch in batches]
+        )
+
+        return merge_batch_results(len(listings), errors, batches, results)
+
+    async def update_listing(
+        self, listing_id: str, currencies: dict = None, details: str = None
+    ) -> Listing:
+        """Change the price or details of a listing without relisting it"""
+        changes = get_listing_changes(currencies, details)
+
+        if self._cache is not None:
+            self._cache.invalidate("listing", listing_id)
+
+        endpoint = f"/v2/classifieds/listings/{listing_id}"
+        response = await self.request("PATCH", endpoint, json=changes)
+        return Listing.from_dict(response)
+
+    async def _try_update_listing(
+        self, listing_id: str, changes: dict, semaphore: asyncio.Semaphore
+    ) -> Listing | ListingError:
+        from aiohttp import ClientError
+
+        try:
+            async with semaphore:
+                return await self.update_listing(listing_id, **changes)
+        except (ClientError, asyncio.TimeoutError, CircuitOpen) as e:
+            status = get_aiohttp_status(e)
+            return ListingError({"id": listing_id, **changes}, str(e), status)
+
+    async def _try_delete_listing(
+        self, listing_id: str, semaphore: asyncio.Semaphore
+    ) -> dict | ListingError:
+        from aiohttp import ClientError
+
+        try:
+            async with semaphore:
+                return await self.delete_listing(listing_id)
+        except (ClientError, asyncio.TimeoutError, CircuitOpen) as e:
+            status = get_aiohttp_status(e)
+            return ListingError({"id": listing_id}, str(e), status)
+
+    async def reconcile_listings(
+        self,
+        listings: list[dict],
+        delete: bool = True,
+        batch_size: int = MAX_BATCH_SIZE,
+        concurrency: int = 4,
+    ) -> ReconcileResult:
+        """Make the listings of the account match ``listings``, instead of
+        deleting and creating all of them. Listings which are already up
+        keep their age and are only updated if their price or details
+        changed.
+
+        Args:
+            listings: Keyword arguments of ``create_listing`` for every
+                listing which should be up
+            delete: If listings which are not in ``listings`` are deleted
+            batch_size: Listings created per batch request
+            concurrency: Requests sent at once
+        """
+        live = [listing async for listing in self.aiter_listings()]
+        diff = diff_listings(self._steam_id, listings, live, delete)
+        # shared by every request, so at most concurrency are in flight
+        semaphore = asyncio.Semaphore(concurrency)
+
+        created, updated, deleted = await asyncio.gather(
+            self._create_listings(diff.create, batch_size, semaphore),
+            asyncio.gather(
+                *[
+                    self._try_update_listing(listing_id, changes, semaphore)
+                    for listing_id, changes in diff.update.items()
+                ]
+            ),
+            self._delete_listings(diff.delete, semaphore),
+        )
+
+        return ReconcileResult(diff, created, dict(zip(diff.update, updated)), deleted)
 
     async def delete_all_listings(self) -> dict:
+        if self._cache is not None:
+            self._cache.invalidate("listing")
+
         return await self.request("DELETE", "/v2/classifieds/listings")
 
     async def delete_listing(self, listing_id: str) -> dict:
+        if self._cache is not None:
+            self._cache.invalidate("listing", listing_id)
+
         return await self.request("DELETE", f"/v2/classifieds/listings/{listing_id}")
 
     async def delete_listing_by_asset_id(self, asset_id: int) -> dict:
@@ -239,6 +1027,55 @@ class AsyncBackpackTF:
         item_hash = get_sku_item_hash(sku)
         return await self.delete_listing_by_item_name(item_hash, is_hash=True)
 
+    async def delete_listings(
+        self, listing_ids: Iterable[str], concurrency: int = 4
+    ) -> dict[str, dict | ListingError]:
+        """Delete many listings, sending up to ``concurrency`` requests at
+        once within the rate limit. Returns the response or a
+        ``ListingError`` for every listing id"""
+        semaphore = asyncio.Semaphore(concurrency)
+        return await self._delete_listings(listing_ids, semaphore)
+
+    async def _delete_listings(
+        self, listing_ids: Iterable[str], semaphore: asyncio.Semaphore
+    ) -> dict[str, dict | ListingError]:
+        listing_ids = list(dict.fromkeys(listing_ids))
+        deleted = await asyncio.gather(
+            *[
+                self._try_delete_listing(listing_id, semaphore)
+                for listing_id in listing_ids
+            ]
+        )
+        return dict(zip(listing_ids, deleted))
+
+    async def _delete_listings_by(self, listing_ids: dict, concurrency: int) -> dict:
+        deleted = await self.delete_listings(listing_ids.values(), concurrency)
+        return {key: deleted[listing_id] for key, listing_id in listing_ids.items()}
+
+    async def delete_listings_by_asset_id(
+        self, asset_ids: Iterable[int], concurrency: int = 4
+    ) -> dict[int, dict | ListingError]:
+        """Delete sell listings, see ``delete_listings``. Keyed by asset id"""
+        listing_ids = {asset_id: f"440_{asset_id}" for asset_id in asset_ids}
+        return await self._delete_listings_by(listing_ids, concurrency)
+
+    async def delete_listings_by_item_name(
+        self, item_names: Iterable[str], concurrency: int = 4
+    ) -> dict[str, dict | ListingError]:
+        """Delete buy listings, see ``delete_listings``. Keyed by item name"""
+        listing_ids = {
+            item_name: f"440_{self._steam_id}_{get_item_hash(item_name)}"
+            for item_name in item_names
+        }
+        return await self._delete_listings_by(listing_ids, concurrency)
+
+    async def delete_listings_by_sku(
+        self, skus: Iterable[str], concurrency: int = 4
+    ) -> dict[str, dict | ListingError]:
+        """Delete buy listings, see ``delete_listings``. Keyed by SKU"""
+        listing_ids = {sku: get_listing_id(self._steam_id, sku, "buy") for sku in skus}
+        return await self._delete_listings_by(listing_ids, concurrency)
+
     async def register_user_agent(self) -> dict:
         return await self.request("POST", "/agent/pulse")
 
@@ -0,0 +1,89 @@
+import time
+from collections.abc import Iterable
+from typing import Any
+
+from .orderbook import get_field
+
+
+def get_event_listing_id(event: Any) -> str:
+    return get_field(get_field(event, "payload") or {}, "id", "")
+
+
+class MicroBatcher:
+    def __init__(
+        self, max_size: int = 500, max_latency: float = 0.2, coalesce: bool = False
+    ) -> None:
+        """
+        Groups websocket events into batches which are full once they hold
+        ``max_size`` events or the oldest event waited ``max_latency``
+        seconds, whichever comes first.
+
+        Args:
+            max_size: Maximum number of events in a batch
+            max_latency: Seconds after the first event of a batch it is due
+            coalesce: Only keep the last event for every listing id in a
+                batch, e.g. of a listing bumped many times
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+
+        self.max_size = max_size
+        self.max_latency = max_latency
+        self.coalesce = coalesce
+        self.events = 0
+        self.coalesced = 0
+        self.batches = 0
+        self._batch: dict[str, Any] | list[Any] = {} if coalesce else []
+        self._started_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._batch)
+
+    def time_left(self) -> float | None:
+        """Seconds until the batch is due, None if it is empty"""
+        if not self._batch:
+            return None
+
+        return max(self._started_at + self.max_latency - time.monotonic(), 0.0)
+
+    def is_due(self) -> bool:
+        return bool(self._batch) and (
+            len(self._batch) >= self.max_size
+            or time.monotonic() - self._started_at >= self.max_latency
+        )
+
+    def add(self, events: Iterable[Any]) -> list[list[Any]]:
+        """Add events, returning the batches which filled up"""
+        full = []
+
+        for event in events:
+            if not self._batch:
+                self._started_at = time.monotonic()
+
+            self.events += 1
+
+            if not self.coalesce:
+                self._batch.append(event)
+            else:
+                listing_id = get_event_listing_id(event)
+
+                # moved to the end, so batches are ordered by last change
+                if self._batch.pop(listing_id, None) is not None:
+                    self.coalesced += 1
+
+                self._batch[listing_id] = event
+
+            if len(self._batch) >= self.max_size:
+                full.append(self.flush())
+
+        return full
+
+    def flush(self) -> list[Any]:
+        """Take the events of the current batch, due or not"""
+        batch = list(self._batch.values()) if self.coalesce else self._batch
+
+        if batch:
+            self.batches += 1
+
+        self._batch = {} if self.coalesce else []
+        return batch
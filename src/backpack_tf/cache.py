@@ -0,0 +1,261 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+from concurrent.futures import Future
+from threading import Lock
+from typing import Any, TypeVar
+
+from .instrumentation import Instrumentation
+
+T = TypeVar("T")
+
+# seconds a response is kept for each namespace, override with `ttls`
+DEFAULT_TTLS = {
+    "snapshot": 60.0,
+    "listing": 30.0,
+    "users_info": 300.0,
+}
+
+
+def estimate_size(value: Any) -> int:
+    return len(json.dumps(value, separators=(",", ":")))
+
+
+class _FetchCancelled(Exception):
+    """The task fetching a value shared with other tasks was cancelled"""
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        ttls: dict[str, float] = None,
+        max_entries: int = 10_000,
+        max_bytes: int = None,
+        instrumentation: Instrumentation = None,
+    ) -> None:
+        """
+        TTL and LRU cache for read endpoints. Can be shared between
+        ``BackpackTF`` and ``AsyncBackpackTF`` instances. Identical requests
+        made while one is already in flight wait for that one instead.
+
+        Cached values are shared, so they should not be modified.
+
+        Args:
+            ttls: Namespace to seconds a response stays fresh. Merged with
+                ``DEFAULT_TTLS``, namespaces without a TTL are not cached
+            max_entries: Maximum number of cached responses
+            max_bytes: Maximum total size of cached responses, estimated from
+                their JSON encoding. None for no limit
+            instrumentation: Sink told about every hit and miss
+        """
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.instrumentation = instrumentation
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = 0
+
+        self._entries: OrderedDict[tuple, tuple[float, int, Any]] = OrderedDict()
+        self._pending: dict[tuple, Future] = {}
+        self._pending_async: dict[tuple, asyncio.Future] = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "size": self.size,
+        }
+
+    def _count(self, namespace: str, hits: int, misses: int) -> None:
+        # must hold the lock
+        self.hits += hits
+        self.misses += misses
+
+        if self.instrumentation is not None:
+            self.instrumentation.on_cache(namespace, hits, misses)
+
+    def _lookup(self, key: tuple) -> tuple[bool, Any]:
+        # must hold the lock
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return False, None
+
+        expires_at, size, value = entry
+
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.size -= size
+            return False, None
+
+        self._entries.move_to_end(key)
+        return True, value
+
+    def get(self, namespace: str, key: Hashable) -> tuple[bool, Any]:
+        """Return ``(found, value)`` for a fresh cached response"""
+        with self._lock:
+            found, value = self._lookup((namespace, key))
+            self._count(namespace, int(found), int(not found))
+            return found, value
+
+    def get_many(
+        self, namespace: str, keys: Iterable[Hashable]
+    ) -> tuple[dict[Hashable, Any], list[Hashable]]:
+        """Return fresh cached responses by key and the keys that were missing"""
+        found = {}
+        missing = []
+
+        with self._lock:
+            for key in keys:
+                hit, value = self._lookup((namespace, key))
+
+                if hit:
+                    found[key] = value
+                else:
+                    missing.append(key)
+
+            self._count(namespace, len(found), len(missing))
+
+        return found, missing
+
+    def set(self, namespace: str, key: Hashable, value: Any) -> None:
+        ttl = self.ttls.get(namespace)
+
+        if not ttl:
+            return
+
+        size = estimate_size(value) if self.max_bytes is not None else 0
+
+        with self._lock:
+            old = self._entries.pop((namespace, key), None)
+
+            if old is not None:
+                self.size -= old[1]
+
+            self._entries[(namespace, key)] = (time.monotonic() + ttl, size, value)
+            self.size += size
+            self._evict()
+
+    def _evict(self) -> None:
+        # must hold the lock
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self.size > self.max_bytes
+        ):
+            _, (_, size, _) = self._entries.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+
+    def invalidate(self, namespace: str = None, key: Hashable = None) -> None:
+        """Drop one response, a whole namespace or everything"""
+        with self._lock:
+            if namespace is not None and key is not None:
+                keys = [(namespace, key)]
+            else:
+                keys = [k for k in self._entries if namespace in (None, k[0])]
+
+            for k in keys:
+                entry = self._entries.pop(k, None)
+
+                if entry is not None:
+                    self.size -= entry[1]
+
+    def clear(self) -> None:
+        self.invalidate()
+
+    def get_or_fetch(self, namespace: str, key: Hashable, fetch: Callable[[], T]) -> T:
+        """Return the cached response or call ``fetch``. Threads asking for
+        the same response at the same time share a single call"""
+        cache_key = (namespace, key)
+
+        with self._lock:
+            found, value = self._lookup(cache_key)
+
+            if found:
+                self._count(namespace, 1, 0)
+                return value
+
+            self._count(namespace, 0, 1)
+            future = self._pending.get(cache_key)
+            owner = future is None
+
+            if owner:
+                future = self._pending[cache_key] = Future()
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = fetch()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            self.set(namespace, key, value)
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                del self._pending[cache_key]
+
+    async def get_or_fetch_async(
+        self, namespace: str, key: Hashable, fetch: Callable[[], Awaitable[T]]
+    ) -> T:
+        """Like ``get_or_fetch``, but shares calls between tasks"""
+        cache_key = (namespace, key)
+
+        while True:
+            with self._lock:
+                found, value = self._lookup(cache_key)
+
+                if found:
+                    self._count(namespace, 1, 0)
+                    return value
+
+                self._count(namespace, 0, 1)
+                future = self._pending_async.get(cache_key)
+                owner = future is None
+
+                if owner:
+                    future = asyncio.get_running_loop().create_future()
+                    self._pending_async[cache_key] = future
+
+            if owner:
+                break
+
+            try:
+                return await asyncio.shield(future)
+            except _FetchCancelled:
+                # the task fetching was cancelled, one of the waiters takes over
+                continue
+
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            # cancelling the future would cancel every waiter as well
+            future.set_exception(_FetchCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # avoid "exception was never retrieved" when nobody else waited
+            future.exception()
+            raise
+        else:
+            self.set(namespace, key, value)
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                del self._pending_async[cache_key]
@@ -1,46 +1,117 @@
-from dataclasses import dataclass, field
+import sys
+from dataclasses import dataclass, field, fields
+from functools import cache
 from typing import Any
 
+# values repeated across many listings, shared instead of stored per listing
+INTERNED_KEYS = {"intent", "status", "source", "baseName", "color", "slot"}
 
-@dataclass
+
+@cache
+def get_field_names(cls: type) -> frozenset[str]:
+    return frozenset(f.name for f in fields(cls))
+
+
+def from_dict(
+    cls: type,
+    data: dict[str, Any],
+    nested: dict[str, type] = {},
+    aliases: dict[str, str] = {},
+):
+    """Build a dataclass from an API response, parsing ``nested`` fields into
+    their types and keeping unknown keys in ``extra`` if the class has it"""
+    names = get_field_names(cls)
+    kwargs = {}
+    extra = {}
+
+    for key, value in data.items():
+        key = aliases.get(key, key)
+
+        if key in nested and isinstance(value, dict):
+            value = nested[key].from_dict(value)
+        elif key in INTERNED_KEYS and type(value) is str:
+            value = sys.intern(value)
+
+        if key in names and key != "extra":
+            kwargs[key] = value
+        else:
+            extra[key] = value
+
+    if extra and "extra" in names:
+        kwargs["extra"] = extra
+
+    return cls(**kwargs)
+
+
+@dataclass(slots=True)
 class Currencies:
     keys: int = 0
     metal: float = 0.0
 
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Currencies":
+        return cls(data.get("keys", 0), data.get("metal", 0.0))
 
-@dataclass
+
+@dataclass(slots=True)
 class Entity:
     name: str = ""
     id: int = 0
     color: str = ""
 
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Entity":
+        return from_dict(cls, data)
+
 
-@dataclass
+@dataclass(slots=True)
 class ItemDocument:
-    appid: int
-    baseName: str
-    defindex: int
-    id: str
-    imageUrl: str
-    marketName: str
-    name: str
-    # origin: None
-    originalId: str
-    price: dict
-    quality: Entity
-    summary: str
-    # class: list
-    slot: str
-    tradable: bool
-    craftable: bool
-
-
-@dataclass
+    appid: int = 440
+    baseName: str = ""
+    defindex: int = 0
+    id: str = ""
+    imageUrl: str = ""
+    marketName: str = ""
+    name: str = ""
+    origin: Entity | None = None
+    originalId: str = ""
+    price: dict = field(default_factory=dict)
+    quality: Entity = field(default_factory=Entity)
+    summary: str = ""
+    classes: list[str] = field(default_factory=list)  # "class" in the API
+    slot: str = ""
+    tradable: bool = True
+    craftable: bool = True
+    extra: dict[str, Any] | None = None  # Keys not listed above, e.g. particle
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "ItemDocument":
+        nested = {"quality": Entity, "origin": Entity}
+        return from_dict(cls, data, nested, {"class": "classes"})
+
+
+@dataclass(slots=True)
+class User:
+    id: str = ""
+    name: str = ""
+    avatar: str = ""
+    tradeOfferUrl: str = ""
+    premium: bool = False
+    online: bool = False
+    banned: bool = False
+    extra: dict[str, Any] | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "User":
+        return from_dict(cls, data)
+
+
+@dataclass(slots=True)
 class Listing:
     id: str
     steamid: str
     appid: int
-    currencies: dict[str, Any]
+    currencies: Currencies
     value: dict
     details: str
     listedAt: int
@@ -49,9 +120,23 @@ class Listing:
     count: int
     status: str
     source: str
-    item: dict[str, Any]
-    user: dict = field(default_factory=dict)  # Made optional for API compatibility
+    item: ItemDocument
+    user: User = None  # Made optional for API compatibility
     userAgent: dict = field(default_factory=dict)
     tradeOffersPreferred: bool = None
     buyoutOnly: bool = None
     archived: bool = field(default=False)  # Added for API compatibility
+    extra: dict[str, Any] | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Listing":
+        """Parse a listing returned by the API"""
+        nested = {"currencies": Currencies, "item": ItemDocument, "user": User}
+        return from_dict(cls, data, nested)
+
+
+@dataclass(slots=True)
+class ListingError:
+    listing: dict[str, Any]
+    message: str
+    status: int | None = None
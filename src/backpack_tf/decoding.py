@@ -0,0 +1,46 @@
+import json
+from typing import Any, Callable
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+Decoder = Callable[[str | bytes], Any]
+
+DECODERS: dict[str, Decoder] = {"json": json.loads}
+
+if msgspec is not None:
+    DECODERS["msgspec"] = msgspec.json.decode
+
+if orjson is not None:
+    DECODERS["orjson"] = orjson.loads
+
+
+def get_decoder(decoder: str | Decoder = "auto") -> Decoder:
+    """Get a JSON decoder by name, or pass a callable through.
+
+    "auto" picks orjson, then msgspec, then falls back to the standard library.
+    Every decoder accepts both str and bytes, so frames can be decoded
+    straight from the received bytes.
+    """
+    if callable(decoder):
+        return decoder
+
+    if decoder == "auto":
+        for name in ("orjson", "msgspec", "json"):
+            if name in DECODERS:
+                return DECODERS[name]
+
+    if decoder not in DECODERS:
+        raise ValueError(f"{decoder} must be one of {list(DECODERS)} or auto")
+
+    return DECODERS[decoder]
+
+
+loads = get_decoder()
@@ -0,0 +1,207 @@
+from typing import Any
+
+from .classes import Listing
+from .decoding import loads
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+Number = int | float
+
+LISTING_FIELDS = (
+    "id",
+    "steamid",
+    "appid",
+    "currencies",
+    "value",
+    "details",
+    "listedAt",
+    "bumpedAt",
+    "intent",
+    "count",
+    "status",
+    "source",
+    "tradeOffersPreferred",
+    "buyoutOnly",
+    "archived",
+)
+
+# rarely used nested fields, decoded on access
+LAZY_FIELDS = {"item": "raw_item", "user": "raw_user", "userAgent": "raw_user_agent"}
+
+
+class LazyFieldsMixin:
+    __slots__ = ()
+
+    @property
+    def item(self) -> dict[str, Any]:
+        return self._decode_field(self.raw_item)
+
+    @property
+    def user(self) -> dict[str, Any]:
+        return self._decode_field(self.raw_user)
+
+    @property
+    def userAgent(self) -> dict[str, Any]:
+        return self._decode_field(self.raw_user_agent)
+
+    def to_listing(self) -> Listing:
+        """Parse into a ``Listing``, decoding the nested fields"""
+        data = {key: getattr(self, key) for key in LISTING_FIELDS}
+        data["item"] = self.item
+        data["user"] = self.user or None
+        data["userAgent"] = self.userAgent
+        return Listing.from_dict(data)
+
+
+if msgspec is not None:
+    NULL = msgspec.Raw(b"null")
+
+    class ListingPayload(LazyFieldsMixin, msgspec.Struct, kw_only=True, gc=False):
+        """Listing sent with ``listing-update`` and ``listing-delete`` events.
+
+        ``item``, ``user`` and ``userAgent`` are kept as raw JSON pointing
+        into the received frame and are decoded every time they are accessed.
+        """
+
+        id: str
+        steamid: str = ""
+        appid: int = 440
+        currencies: dict[str, Number] = {}
+        value: dict[str, Any] = {}
+        details: str | None = None
+        listedAt: Number = 0
+        bumpedAt: Number = 0
+        intent: str = ""
+        count: int = 1
+        status: str = ""
+        source: str = ""
+        tradeOffersPreferred: bool | None = None
+        buyoutOnly: bool | None = None
+        archived: bool = False
+        raw_item: msgspec.Raw = msgspec.field(name="item", default=NULL)
+        raw_user: msgspec.Raw = msgspec.field(name="user", default=NULL)
+        raw_user_agent: msgspec.Raw = msgspec.field(name="userAgent", default=NULL)
+
+        @staticmethod
+        def _decode_field(raw: msgspec.Raw) -> dict[str, Any]:
+            return msgspec.json.decode(raw) or {}
+
+    class ListingEvent(msgspec.Struct, gc=False):
+        id: str
+        event: str
+        payload: ListingPayload
+
+    _events_decoder = msgspec.json.Decoder(list[ListingEvent])
+
+    def decode_events(data: str | bytes) -> list[ListingEvent]:
+        """Decode a websocket frame straight into ``ListingEvent`` objects"""
+        return _events_decoder.decode(data)
+
+else:
+
+    class ListingPayload(LazyFieldsMixin):
+        """Listing sent with ``listing-update`` and ``listing-delete`` events.
+
+        Install msgspec to decode frames straight into these objects and keep
+        ``item``, ``user`` and ``userAgent`` undecoded until accessed.
+        """
+
+        __slots__ = (
+            "id",
+            "steamid",
+            "appid",
+            "currencies",
+            "value",
+            "details",
+            "listedAt",
+            "bumpedAt",
+            "intent",
+            "count",
+            "status",
+            "source",
+            "tradeOffersPreferred",
+            "buyoutOnly",
+            "archived",
+            "raw_item",
+            "raw_user",
+            "raw_user_agent",
+        )
+
+        def __init__(
+            self,
+            id: str,
+            steamid: str = "",
+            appid: int = 440,
+            currencies: dict[str, Number] = None,
+            value: dict[str, Any] = None,
+            details: str | None = None,
+            listedAt: Number = 0,
+            bumpedAt: Number = 0,
+            intent: str = "",
+            count: int = 1,
+            status: str = "",
+            source: str = "",
+            tradeOffersPreferred: bool | None = None,
+            buyoutOnly: bool | None = None,
+            archived: bool = False,
+            raw_item: dict[str, Any] = None,
+            raw_user: dict[str, Any] = None,
+            raw_user_agent: dict[str, Any] = None,
+        ) -> None:
+            self.id = id
+            self.steamid = steamid
+            self.appid = appid
+            self.currencies = currencies or {}
+            self.value = value or {}
+            self.details = details
+            self.listedAt = listedAt
+            self.bumpedAt = bumpedAt
+            self.intent = intent
+            self.count = count
+            self.status = status
+            self.source = source
+            self.tradeOffersPreferred = tradeOffersPreferred
+            self.buyoutOnly = buyoutOnly
+            self.archived = archived
+            self.raw_item = raw_item
+            self.raw_user = raw_user
+            self.raw_user_agent = raw_user_agent
+
+        def __repr__(self) -> str:
+            return f"ListingPayload(id={self.id!r}, intent={self.intent!r})"
+
+        @staticmethod
+        def _decode_field(raw: dict[str, Any] | None) -> dict[str, Any]:
+            return raw or {}
+
+        @classmethod
+        def from_dict(cls, data: dict[str, Any]) -> "ListingPayload":
+            fields = {
+                LAZY_FIELDS.get(key, key): value
+                for key, value in data.items()
+                if key in cls.__slots__ or key in LAZY_FIELDS
+            }
+            return cls(**fields)
+
+    class ListingEvent:
+        __slots__ = ("id", "event", "payload")
+
+        def __init__(self, id: str, event: str, payload: ListingPayload) -> None:
+            self.id = id
+            self.event = event
+            self.payload = payload
+
+        def __repr__(self) -> str:
+            return f"ListingEvent(id={self.id!r}, event={self.event!r})"
+
+    def decode_events(data: str | bytes) -> list[ListingEvent]:
+        """Decode a websocket frame into ``ListingEvent`` objects"""
+        return [
+            ListingEvent(
+                event["id"], event["event"], ListingPayload.from_dict(event["payload"])
+            )
+            for event in loads(data)
+        ]
@@ -16,3 +16,7 @@ class InvalidIntent(BackpackTFException):
 
 class UserNotFound(BackpackTFException):
     pass
+
+
+class CircuitOpen(BackpackTFException):
+    pass
@@ -0,0 +1,215 @@
+"""Subscription filters for websocket events.
+
+An ``EventFilter`` is compiled into a predicate which only checks the fields
+it was given. When filtering by item or steamid, frames without any of them
+are skipped by scanning the raw bytes, and with msgspec installed only the
+events containing one of them are decoded.
+"""
+
+import json
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from .decoding import Decoder
+from .orderbook import get_field, get_item_name, get_listing_price
+from .utils import sku_to_name
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# scanning a frame once per needle stops paying off beyond this
+MAX_SCAN_NEEDLES = 32
+
+
+@dataclass(slots=True)
+class EventFilter:
+    """Events to pass to the callback, every field left as None matches
+    everything
+
+    Args:
+        events: Event types, e.g. ``{"listing-update"}``
+        intents: ``{"buy"}`` or ``{"sell"}``
+        items: Item names, e.g. ``{"Strange Team Captain"}``
+        skus: SKUs, resolved to item names with tf2-utils
+        steamids: SteamID64s of listing owners
+        min_price: Lowest price in refined metal
+        max_price: Highest price in refined metal
+        key_price: Refined metal per key, used for listings without a
+            ``value``
+    """
+
+    events: set[str] = None
+    intents: set[str] = None
+    items: set[str] = None
+    skus: set[str] = None
+    steamids: set[str] = None
+    min_price: float = None
+    max_price: float = None
+    key_price: float = 0.0
+
+    def get_item_names(self) -> set[str] | None:
+        if self.items is None and self.skus is None:
+            return None
+
+        return {*(self.items or ()), *map(sku_to_name, self.skus or ())}
+
+    def get_needles(self) -> list[bytes] | None:
+        """Byte strings of which at least one is in every frame with a
+        matching event, None if frames can not be skipped by scanning"""
+        names = self.get_item_names()
+
+        # every event has an item and an owner, so either one narrows it down
+        if names is not None:
+            needles = set()
+
+            for name in names:
+                # quotes, slashes and non-ascii characters may be escaped
+                escaped = json.dumps(name)[1:-1]
+                needles.update(
+                    {
+                        name.encode(),
+                        escaped.encode(),
+                        escaped.replace("/", "\\/").encode(),
+                    }
+                )
+        elif self.steamids is not None:
+            needles = {steamid.encode() for steamid in self.steamids}
+        else:
+            return None
+
+        return list(needles) if len(needles) <= MAX_SCAN_NEEDLES else None
+
+    def compile(self) -> Callable[[Any], bool]:
+        """Predicate taking an event as a dict or ``ListingEvent``"""
+        checks: list[Callable[[str, Any], bool]] = []
+        names = self.get_item_names()
+
+        if self.events is not None:
+            events = frozenset(self.events)
+            checks.append(lambda event, payload: event in events)
+
+        if self.intents is not None:
+            intents = frozenset(self.intents)
+            checks.append(
+                lambda event, payload: get_field(payload, "intent") in intents
+            )
+
+        if names is not None:
+            names = frozenset(names)
+            checks.append(lambda event, payload: get_item_name(payload) in names)
+
+        if self.steamids is not None:
+            steamids = frozenset(self.steamids)
+            checks.append(
+                lambda event, payload: get_field(payload, "steamid") in steamids
+            )
+
+        if self.min_price is not None or self.max_price is not None:
+            low = self.min_price if self.min_price is not None else float("-inf")
+            high = self.max_price if self.max_price is not None else float("inf")
+            key_price = self.key_price
+            checks.append(
+                lambda event, payload: (
+                    low <= get_listing_price(payload, key_price) <= high
+                )
+            )
+
+        if not checks:
+            return lambda event: True
+
+        def predicate(event: Any) -> bool:
+            name = get_field(event, "event")
+            payload = get_field(event, "payload") or {}
+
+            for check in checks:
+                if not check(name, payload):
+                    return False
+
+            return True
+
+        return predicate
+
+
+if msgspec is not None:
+    _raw_decoder = msgspec.json.Decoder(list[msgspec.Raw])
+
+
+class FilteredDecoder:
+    def __init__(self, event_filter: EventFilter, loads: Decoder) -> None:
+        """
+        Decodes frames like ``loads`` does, leaving out events not matching
+        ``event_filter``.
+
+        Args:
+            event_filter: Events to keep
+            loads: Decoder of the kept events, e.g. ``decode_events``
+        """
+        self.event_filter = event_filter
+        self._loads = loads
+        self._predicate = event_filter.compile()
+        self._needles = event_filter.get_needles()
+
+        self.frames = 0
+        self.skipped_frames = 0
+        self.events = 0
+        self.dropped = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "frames": self.frames,
+            "skipped_frames": self.skipped_frames,
+            "events": self.events,
+            "dropped": self.dropped,
+        }
+
+    def _scan(self, data: bytes) -> bool:
+        for needle in self._needles:
+            if needle in data:
+                return True
+
+        return False
+
+    def _decode(self, data: bytes) -> tuple[list, int]:
+        """Events of a frame which may match, and the number of events"""
+        if self._needles is None or msgspec is None:
+            messages = self._loads(data)
+            return messages, len(messages)
+
+        # only events containing a needle are decoded, the frame is just
+        # split into raw events
+        raws = _raw_decoder.decode(data)
+        kept = [raw for raw in map(bytes, raws) if self._scan(raw)]
+
+        if not kept:
+            return [], len(raws)
+
+        if len(kept) == len(raws):
+            return self._loads(data), len(raws)
+
+        return self._loads(b"[" + b",".join(kept) + b"]"), len(raws)
+
+    def __call__(self, data: str | bytes) -> list:
+        if isinstance(data, str):
+            data = data.encode()
+
+        self.frames += 1
+
+        if self._needles is not None and not self._scan(data):
+            self.skipped_frames += 1
+            return []
+
+        messages, events = self._decode(data)
+        kept = [message for message in messages if self._predicate(message)]
+        self.events += events
+        self.dropped += events - len(kept)
+        return kept
+
+
+def filter_events(events: Iterable[Any], event_filter: EventFilter) -> list:
+    """Events matching ``event_filter``, e.g. ones replayed from a journal"""
+    predicate = event_filter.compile()
+    return [event for event in events if predicate(event)]
@@ -0,0 +1,314 @@
+"""Websocket ingest spread over worker processes.
+
+One process owns the socket and splits every frame into one frame per
+worker, routing events by item name so events for the same item always end
+up in the same worker, in the order they were received. Workers decode and
+handle their events on their own cores.
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import time
+import zlib
+from collections.abc import Callable
+from contextlib import suppress
+from typing import Any
+
+from .decoding import Decoder, get_decoder, loads
+from .events import decode_events
+from .filters import EventFilter, FilteredDecoder
+from .journal import Journal
+from .orderbook import get_item_name
+from .websocket import WEBSOCKET_URL
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+logger = logging.getLogger(__name__)
+
+
+if msgspec is not None:
+
+    class _RouteItem(msgspec.Struct):
+        name: str = ""
+
+    class _RoutePayload(msgspec.Struct):
+        item: _RouteItem | None = None
+
+    class _RouteEvent(msgspec.Struct):
+        payload: _RoutePayload | None = None
+
+    _raw_decoder = msgspec.json.Decoder(list[msgspec.Raw])
+    _route_decoder = msgspec.json.Decoder(_RouteEvent)
+
+    def split_events(data: str | bytes) -> list[tuple[str, bytes]]:
+        """Item name and encoded event of every event in a frame. Only the
+        item name is decoded, the events are slices of the frame"""
+        if isinstance(data, str):
+            data = data.encode()
+
+        events = []
+
+        for raw in _raw_decoder.decode(data):
+            payload = _route_decoder.decode(raw).payload
+            item = payload.item if payload is not None else None
+            events.append((item.name if item is not None else "", raw))
+
+        return events
+
+else:
+
+    def split_events(data: str | bytes) -> list[tuple[str, bytes]]:
+        """Item name and encoded event of every event in a frame. Install
+        msgspec to slice events out of the frame instead of encoding them
+        again"""
+        return [
+            (get_item_name(event.get("payload") or {}), json.dumps(event).encode())
+            for event in loads(data)
+        ]
+
+
+def get_shard(name: str, shards: int) -> int:
+    # crc32 instead of hash, which differs between processes
+    return zlib.crc32(name.encode()) % shards
+
+
+def split_frame(data: str | bytes, shards: int) -> list[list[bytes]]:
+    """Encoded events of a frame grouped by shard, events keep their order
+    within every shard"""
+    routed = [[] for _ in range(shards)]
+
+    for name, event in split_events(data):
+        routed[get_shard(name, shards)].append(event)
+
+    return routed
+
+
+def _run_worker(
+    index: int,
+    connection,
+    callback: Callable[[Any], None],
+    as_solo_entries: bool,
+    decoder: str | Decoder,
+    typed: bool,
+    event_filter: EventFilter | None,
+    processed,
+    invalid,
+) -> None:
+    decode = decode_events if typed else get_decoder(decoder)
+
+    if event_filter is not None:
+        decode = FilteredDecoder(event_filter, decode)
+
+    while True:
+        data = connection.recv_bytes()
+
+        # sent by close
+        if not data:
+            break
+
+        try:
+            messages = decode(data)
+        except Exception:
+            # one bad frame should not end the worker
+            invalid[index] += 1
+            logger.exception("Failed to decode frame in worker %s", index)
+            continue
+
+        # every event was filtered out
+        if not messages:
+            continue
+
+        try:
+            if not as_solo_entries:
+                callback(messages)
+            else:
+                for message in messages:
+                    callback(message.payload if typed else message["payload"])
+        except Exception:
+            logger.exception("Websocket callback failed in worker %s", index)
+
+        processed[index] += len(messages)
+
+    connection.close()
+
+
+class ShardedBackpackTFWebsocket:
+    def __init__(
+        self,
+        callback: Callable[[dict | list[dict]], None],
+        workers: int = None,
+        as_solo_entries: bool = True,
+        headers: dict[str, Any] = {"batch-test": True},
+        max_size: int | None = None,
+        settings: dict[str, Any] = {},
+        decoder: str | Decoder = "auto",
+        typed: bool = False,
+        event_filter: EventFilter = None,
+        journal: Journal = None,
+        start_method: str = None,
+        url: str = WEBSOCKET_URL,
+    ) -> None:
+        """
+        Receives frames in this process and handles them in ``workers``
+        worker processes. Frames are passed to workers as raw bytes over
+        pipes, which block when a worker falls behind, so a slow worker
+        slows down reading from the socket instead of buffering without
+        bound.
+
+        Args:
+            callback: Function where the data ends up, called in a worker.
+                Has to be picklable unless workers are forked
+            workers: Number of worker processes, defaults to the CPU count
+            as_solo_entries: If data to callback should be solo entries or
+                the batched list of events a worker got from a frame
+            headers: Additional headers to send to the socket
+            max_size: Maximum size of messages to receive. None for unlimited
+            settings: Additional websocket settings as a dict to be unpacked
+            decoder: JSON decoder name ("auto", "orjson", "msgspec", "json")
+                or a picklable callable taking bytes
+            typed: Pass ``ListingPayload`` objects (or ``ListingEvent``
+                objects if not as solo entries) to callback instead of dicts
+            event_filter: Only pass events matching this filter to callback,
+                applied by the workers
+            journal: Journal to record every received frame in
+            start_method: multiprocessing start method, e.g. "spawn"
+            url: URL of the websocket
+        """
+        self._callback = callback
+        self._workers = workers or os.cpu_count() or 1
+        self._as_solo_entries = as_solo_entries
+        self._headers = headers
+        self._max_size = max_size
+        self._settings = settings
+        self._decoder = decoder
+        self._typed = typed
+        self._event_filter = event_filter
+        self._journal = journal
+        self._context = multiprocessing.get_context(start_method)
+        self._url = url
+
+        self._processes = []
+        self._connections = []
+        self._processed = None
+        self._invalid = None
+
+        self.frames = 0
+        self.events = 0
+        self.routed = [0] * self._workers
+        self.route_time = 0.0
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Frames and events received, events sent to and processed by every
+        worker, frames every worker failed to decode, and the seconds spent
+        splitting frames"""
+        processed = list(self._processed) if self._processed is not None else []
+        invalid = list(self._invalid) if self._invalid is not None else []
+
+        return {
+            "frames": self.frames,
+            "events": self.events,
+            "routed": list(self.routed),
+            "processed": processed,
+            "invalid_frames": invalid,
+            "route_time": self.route_time,
+        }
+
+    def __enter__(self) -> "ShardedBackpackTFWebsocket":
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def start(self) -> None:
+        """Start the worker processes"""
+        if self._processes:
+            return
+
+        # every worker only writes its own slot
+        self._processed = self._context.Array("Q", self._workers, lock=False)
+        self._invalid = self._context.Array("Q", self._workers, lock=False)
+
+        for index in range(self._workers):
+            receiver, sender = self._context.Pipe(duplex=False)
+            process = self._context.Process(
+                target=_run_worker,
+                args=(
+                    index,
+                    receiver,
+                    self._callback,
+                    self._as_solo_entries,
+                    self._decoder,
+                    self._typed,
+                    self._event_filter,
+                    self._processed,
+                    self._invalid,
+                ),
+                name=f"bptf-ingest-{index}",
+                daemon=True,
+            )
+            process.start()
+            receiver.close()
+            self._processes.append(process)
+            self._connections.append(sender)
+
+    def feed(self, data: str | bytes) -> None:
+        """Route a frame to the workers, e.g. one replayed from a journal"""
+        if not self._processes:
+            self.start()
+
+        if self._journal is not None:
+            self._journal.append_frame(data)
+
+        started = time.perf_counter()
+        routed = split_frame(data, self._workers)
+        self.route_time += time.perf_counter() - started
+        self.frames += 1
+
+        for index, events in enumerate(routed):
+            if not events:
+                continue
+
+            self.events += len(events)
+            self.routed[index] += len(events)
+            self._connections[index].send_bytes(b"[" + b",".join(events) + b"]")
+
+    def listen(self) -> None:
+        """Listen for messages from BackpackTF until the socket closes"""
+        from websockets.sync.client import connect
+
+        self.start()
+
+        with connect(
+            self._url,
+            additional_headers=self._headers,
+            max_size=self._max_size,
+            **self._settings,
+        ) as websocket:
+            for data in websocket:
+                self.feed(data)
+
+    def close(self, timeout: float = None) -> None:
+        """Let the workers finish the frames sent to them and stop them"""
+        for connection in self._connections:
+            # the pipe is broken if its worker died
+            with suppress(OSError):
+                connection.send_bytes(b"")
+
+            with suppress(OSError):
+                connection.close()
+
+        for process in self._processes:
+            process.join(timeout)
+
+            if process.is_alive():
+                process.terminate()
+
+        self._connections = []
+        self._processes = []
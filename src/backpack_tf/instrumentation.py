@@ -0,0 +1,338 @@
+"""Hooks for metrics and tracing. Clients, caches, retry policies and
+websockets take an ``instrumentation`` argument and skip all timing and
+accounting when it is None."""
+
+import re
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from threading import Lock
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# listing ids in paths, e.g. /v2/classifieds/listings/440_123
+LISTING_ID = re.compile(r"/\d+_[^/]+")
+
+
+def get_endpoint_label(endpoint: str) -> str:
+    """Endpoint with ids replaced, so it can be used as a metric label"""
+    return LISTING_ID.sub("/{id}", endpoint)
+
+
+class Instrumentation:
+    """Base class for sinks, every hook does nothing. Override the hooks you
+    need. Hooks are called from the thread or task doing the work, so they
+    should be fast and must not raise."""
+
+    def on_request(
+        self,
+        method: str,
+        endpoint: str,
+        status: int | None,
+        duration: float,
+        sent: int,
+        received: int,
+    ) -> None:
+        """An HTTP request finished. ``status`` is None if there was no
+        response, ``sent`` and ``received`` are body sizes in bytes"""
+
+    def on_retry(self, method: str, endpoint: str, status: int | None) -> None:
+        """A request is sent again after failing with ``status``"""
+
+    def on_hedge(self, method: str, endpoint: str, won: bool) -> None:
+        """A slow request was sent a second time"""
+
+    def on_breaker_state(self, state: str) -> None:
+        """The circuit breaker changed to ``state``"""
+
+    def on_cache(self, namespace: str, hits: int, misses: int) -> None:
+        """Responses were looked up in a ``ResponseCache``"""
+
+    def on_frame(self, size: int, events: int, parse_time: float) -> None:
+        """A websocket frame was received and decoded"""
+
+    def on_callback(self, events: int, duration: float) -> None:
+        """The websocket callback was called with ``events`` events"""
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        # the last count is for values above every bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile"""
+        rank = q * self.count
+        seen = 0
+
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+
+            if seen >= rank:
+                return bound
+
+        return float("inf")
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": dict(zip([*self.buckets, float("inf")], self.counts)),
+        }
+
+
+class MetricsRecorder(Instrumentation):
+    """Keeps counters and histograms in memory, read them with ``snapshot``"""
+
+    def __init__(self) -> None:
+        self.latency: dict[tuple[str, str], Histogram] = defaultdict(
+            lambda: Histogram(LATENCY_BUCKETS)
+        )
+        self.counters: dict[tuple, int] = defaultdict(int)
+        self.frame_sizes = Histogram(SIZE_BUCKETS)
+        self.parse_time = Histogram(LATENCY_BUCKETS)
+        self.callback_time = Histogram(LATENCY_BUCKETS)
+        self.breaker_state = "closed"
+        self._lock = Lock()
+
+    def on_request(
+        self,
+        method: str,
+        endpoint: str,
+        status: int | None,
+        duration: float,
+        sent: int,
+        received: int,
+    ) -> None:
+        endpoint = get_endpoint_label(endpoint)
+
+        with self._lock:
+            self.latency[method, endpoint].observe(duration)
+            self.counters["requests", method, endpoint, status] += 1
+            self.counters["bytes_sent", method, endpoint] += sent
+            self.counters["bytes_received", method, endpoint] += received
+
+    def on_retry(self, method: str, endpoint: str, status: int | None) -> None:
+        with self._lock:
+            self.counters["retries", method, get_endpoint_label(endpoint)] += 1
+
+    def on_hedge(self, method: str, endpoint: str, won: bool) -> None:
+        with self._lock:
+            self.counters["hedges", method, get_endpoint_label(endpoint), won] += 1
+
+    def on_breaker_state(self, state: str) -> None:
+        with self._lock:
+            self.breaker_state = state
+            self.counters["breaker", state] += 1
+
+    def on_cache(self, namespace: str, hits: int, misses: int) -> None:
+        with self._lock:
+            self.counters["cache_hits", namespace] += hits
+            self.counters["cache_misses", namespace] += misses
+
+    def on_frame(self, size: int, events: int, parse_time: float) -> None:
+        with self._lock:
+            self.frame_sizes.observe(size)
+            self.parse_time.observe(parse_time)
+            self.counters["frames"] += 1
+            self.counters["events"] += events
+
+    def on_callback(self, events: int, duration: float) -> None:
+        with self._lock:
+            self.callback_time.observe(duration)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "latency": {
+                    f"{method} {endpoint}": histogram.to_dict()
+                    for (method, endpoint), histogram in self.latency.items()
+                },
+                "counters": dict(self.counters),
+                "frame_sizes": self.frame_sizes.to_dict(),
+                "parse_time": self.parse_time.to_dict(),
+                "callback_time": self.callback_time.to_dict(),
+                "breaker_state": self.breaker_state,
+            }
+
+
+class PrometheusInstrumentation(Instrumentation):
+    def __init__(self, registry=None, prefix: str = "bptf") -> None:
+        """
+        Exports counters and histograms with prometheus_client, needs
+        ``pip install prometheus-client``.
+
+        Args:
+            registry: Registry to register the metrics in, defaults to the
+                global one
+            prefix: Prefix of every metric name
+        """
+        from prometheus_client import REGISTRY, Counter, Gauge
+        from prometheus_client import Histogram as PrometheusHistogram
+
+        registry = registry or REGISTRY
+        request_labels = ["method", "endpoint"]
+
+        def counter(name: str, doc: str, labels: list[str] = ()) -> Counter:
+            return Counter(f"{prefix}_{name}", doc, labels, registry=registry)
+
+        def histogram(name: str, doc: str, labels=(), buckets=LATENCY_BUCKETS):
+            return PrometheusHistogram(
+                f"{prefix}_{name}", doc, labels, registry=registry, buckets=buckets
+            )
+
+        self.request_duration = histogram(
+            "request_duration_seconds",
+            "Backpack.tf request latency",
+            [*request_labels, "status"],
+        )
+        self.bytes_sent = counter(
+            "request_sent_bytes", "Request body bytes", request_labels
+        )
+        self.bytes_received = counter(
+            "response_received_bytes", "Response body bytes", request_labels
+        )
+        self.retries = counter(
+            "request_retries", "Requests sent again", [*request_labels, "status"]
+        )
+        self.hedges = counter(
+            "request_hedges", "Slow requests sent twice", [*request_labels, "won"]
+        )
+        self.breaker_state = Gauge(
+            f"{prefix}_breaker_open",
+            "1 if the circuit breaker is open or half open",
+            registry=registry,
+        )
+        self.cache = counter("cache_lookups", "Cache lookups", ["namespace", "result"])
+        self.frames = counter("websocket_frames", "Websocket frames received")
+        self.events = counter("websocket_events", "Websocket events received")
+        self.frame_size = histogram(
+            "websocket_frame_size_bytes",
+            "Websocket frame size",
+            buckets=SIZE_BUCKETS,
+        )
+        self.parse_time = histogram(
+            "websocket_parse_seconds", "Time spent decoding websocket frames"
+        )
+        self.callback_time = histogram(
+            "websocket_callback_seconds", "Time spent in the websocket callback"
+        )
+
+    def on_request(
+        self,
+        method: str,
+        endpoint: str,
+        status: int | None,
+        duration: float,
+        sent: int,
+        received: int,
+    ) -> None:
+        endpoint = get_endpoint_label(endpoint)
+        self.request_duration.labels(method, endpoint, str(status)).observe(duration)
+        self.bytes_sent.labels(method, endpoint).inc(sent)
+        self.bytes_received.labels(method, endpoint).inc(received)
+
+    def on_retry(self, method: str, endpoint: str, status: int | None) -> None:
+        self.retries.labels(method, get_endpoint_label(endpoint), str(status)).inc()
+
+    def on_hedge(self, method: str, endpoint: str, won: bool) -> None:
+        self.hedges.labels(method, get_endpoint_label(endpoint), str(won)).inc()
+
+    def on_breaker_state(self, state: str) -> None:
+        self.breaker_state.set(0 if state == "closed" else 1)
+
+    def on_cache(self, namespace: str, hits: int, misses: int) -> None:
+        if hits:
+            self.cache.labels(namespace, "hit").inc(hits)
+
+        if misses:
+            self.cache.labels(namespace, "miss").inc(misses)
+
+    def on_frame(self, size: int, events: int, parse_time: float) -> None:
+        self.frames.inc()
+        self.events.inc(events)
+        self.frame_size.observe(size)
+        self.parse_time.observe(parse_time)
+
+    def on_callback(self, events: int, duration: float) -> None:
+        self.callback_time.observe(duration)
+
+
+class OpenTelemetryInstrumentation(Instrumentation):
+    def __init__(self, tracer=None, trace_frames: bool = False) -> None:
+        """
+        Records requests as OpenTelemetry spans, needs
+        ``pip install opentelemetry-api``.
+
+        Args:
+            tracer: Tracer to create spans with, defaults to one from the
+                global tracer provider
+            trace_frames: If every websocket frame gets a span as well
+        """
+        from opentelemetry import trace
+
+        self._trace = trace
+        self._tracer = tracer or trace.get_tracer("backpack_tf")
+        self._trace_frames = trace_frames
+
+    def _span(self, name: str, duration: float, attributes: dict, error: bool):
+        end = time.time_ns()
+        span = self._tracer.start_span(
+            name, start_time=end - int(duration * 1e9), attributes=attributes
+        )
+
+        if error:
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR))
+
+        span.end(end_time=end)
+
+    def on_request(
+        self,
+        method: str,
+        endpoint: str,
+        status: int | None,
+        duration: float,
+        sent: int,
+        received: int,
+    ) -> None:
+        endpoint = get_endpoint_label(endpoint)
+        attributes = {
+            "http.request.method": method,
+            "url.path": endpoint,
+            "http.request.body.size": sent,
+            "http.response.body.size": received,
+        }
+
+        if status is not None:
+            attributes["http.response.status_code"] = status
+
+        error = status is None or status >= 400
+        self._span(f"{method} {endpoint}", duration, attributes, error)
+
+    def on_retry(self, method: str, endpoint: str, status: int | None) -> None:
+        self._trace.get_current_span().add_event(
+            "retry", {"url.path": get_endpoint_label(endpoint), "status": str(status)}
+        )
+
+    def on_breaker_state(self, state: str) -> None:
+        self._trace.get_current_span().add_event("circuit_breaker", {"state": state})
+
+    def on_frame(self, size: int, events: int, parse_time: float) -> None:
+        if self._trace_frames:
+            attributes = {"messaging.message.body.size": size, "events": events}
+            self._span("websocket frame", parse_time, attributes, False)
+
+    def on_callback(self, events: int, duration: float) -> None:
+        if self._trace_frames:
+            self._span("websocket callback", duration, {"events": events}, False)
@@ -0,0 +1,214 @@
+"""Append-only journal of raw websocket frames and API responses.
+
+Records are length prefixed and checksummed, and written to numbered
+segment files which are rotated once they reach a size. Segments are
+read back through mmap, so replaying is mostly limited by disk speed.
+"""
+
+import logging
+import mmap
+import os
+import struct
+import time
+import zlib
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+
+from .decoding import loads
+from .events import decode_events
+from .orderbook import OrderBook
+
+MAGIC = b"BPTFJ001"
+SUFFIX = ".journal"
+# payload length, crc32 of tag and payload, timestamp, kind, tag length
+HEADER = struct.Struct("<IIdBH")
+
+FRAME = 1
+RESPONSE = 2
+
+SNAPSHOT_TAG = "GET /classifieds/listings/snapshot"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class JournalRecord:
+    kind: int
+    timestamp: float
+    tag: str
+    data: bytes
+
+
+class Journal:
+    def __init__(
+        self,
+        directory: str | Path,
+        max_segment_size: int = 64 * 1024 * 1024,
+        sync: bool = False,
+    ) -> None:
+        """
+        Writes records to ``directory``, starting a new segment on every
+        open so a torn record at the end of an old segment is never
+        appended to. Can be shared between threads and clients.
+
+        Args:
+            directory: Directory holding the segments, created if missing
+            max_segment_size: Bytes after which a new segment is started
+            sync: If every record is flushed and fsynced, otherwise records
+                are buffered until ``flush``, rotation or ``close``
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_segment_size = max_segment_size
+        self.sync = sync
+        self._lock = Lock()
+        self._file = None
+        self._size = 0
+
+        segments = get_segments(self.directory)
+        self._index = int(segments[-1].stem) + 1 if segments else 0
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _rotate(self) -> None:
+        # must hold the lock
+        if self._file is not None:
+            self._file.close()
+
+        path = self.directory / f"{self._index:010d}{SUFFIX}"
+        self._index += 1
+        self._file = open(path, "xb")
+        self._file.write(MAGIC)
+        self._size = len(MAGIC)
+
+    def append(
+        self,
+        data: bytes | str,
+        kind: int = FRAME,
+        tag: str = "",
+        timestamp: float = None,
+    ) -> None:
+        if isinstance(data, str):
+            data = data.encode()
+
+        tag = tag.encode()
+        crc = zlib.crc32(data, zlib.crc32(tag))
+        header = HEADER.pack(len(data), crc, timestamp or time.time(), kind, len(tag))
+
+        with self._lock:
+            if self._file is None or self._size >= self.max_segment_size:
+                self._rotate()
+
+            self._file.write(header)
+            self._file.write(tag)
+            self._file.write(data)
+            self._size += len(header) + len(tag) + len(data)
+
+            if self.sync:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+
+    def append_frame(self, data: bytes | str) -> None:
+        """Record a frame as received from the websocket"""
+        self.append(data, FRAME)
+
+    def append_response(self, method: str, endpoint: str, body: bytes) -> None:
+        """Record the body of an API response"""
+        self.append(body, RESPONSE, f"{method} {endpoint}")
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def get_segments(directory: str | Path) -> list[Path]:
+    return sorted(Path(directory).glob(f"*{SUFFIX}"))
+
+
+def read_segment(path: str | Path) -> Iterator[JournalRecord]:
+    """Read the records of a segment, stopping at the first torn or corrupt
+    record, e.g. one that was being written when the process died"""
+    with open(path, "rb") as file:
+        if not file.seek(0, 2):
+            return
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            if view[: len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a journal segment")
+
+            offset = len(MAGIC)
+            end = len(view)
+
+            while offset + HEADER.size <= end:
+                length, crc, timestamp, kind, tag_length = HEADER.unpack_from(
+                    view, offset
+                )
+                start = offset + HEADER.size
+                offset = start + tag_length + length
+
+                if offset > end:
+                    logger.warning("Torn record at the end of %s", path)
+                    return
+
+                tag = view[start : start + tag_length]
+                data = view[start + tag_length : offset]
+
+                if zlib.crc32(data, zlib.crc32(tag)) != crc:
+                    logger.warning("Corrupt record in %s, skipping the rest", path)
+                    return
+
+                yield JournalRecord(kind, timestamp, tag.decode(), data)
+
+
+def replay(
+    directory: str | Path, kinds: Iterable[int] = None, since: float = None
+) -> Iterator[JournalRecord]:
+    """Read every record of a journal in the order they were written
+
+    Args:
+        directory: Directory holding the segments
+        kinds: Only read records of these kinds, e.g. ``(FRAME,)``
+        since: Only read records written at or after this timestamp
+    """
+    kinds = set(kinds) if kinds is not None else None
+
+    for path in get_segments(directory):
+        for record in read_segment(path):
+            if kinds is not None and record.kind not in kinds:
+                continue
+
+            if since is not None and record.timestamp < since:
+                continue
+
+            yield record
+
+
+def replay_into(book: OrderBook, directory: str | Path, since: float = None) -> int:
+    """Rebuild an order book from recorded snapshots and websocket frames.
+    Returns the number of records applied"""
+    applied = 0
+
+    for record in replay(directory, since=since):
+        if record.kind == FRAME:
+            book.apply_events(decode_events(record.data))
+        elif record.tag == SNAPSHOT_TAG:
+            book.seed(loads(record.data))
+        else:
+            continue
+
+        applied += 1
+
+    return applied
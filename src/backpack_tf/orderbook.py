@@ -0,0 +1,383 @@
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from .events import ListingEvent
+from .utils import get_buy_listing_id
+
+
+def get_field(listing: Any, key: str, default: Any = None) -> Any:
+    if isinstance(listing, dict):
+        return listing.get(key, default)
+
+    return getattr(listing, key, default)
+
+
+def get_item_name(listing: Any) -> str:
+    item = get_field(listing, "item") or {}
+    return get_field(item, "name", "")
+
+
+def get_listing_version(listing: Any) -> float:
+    """When a listing was last changed, used to order updates"""
+    return get_field(listing, "bumpedAt") or get_field(listing, "listedAt") or 0
+
+
+def snapshot_listing_to_payload(listing: dict, appid: int = 440) -> dict:
+    """Convert a listing from ``get_snapshot`` to the shape of websocket
+    payloads, deriving the listing id the same way Backpack.tf does"""
+    item = listing.get("item", {})
+    steamid = listing.get("steamid", "")
+    intent = listing.get("intent")
+
+    if intent == "sell" and item.get("id"):
+        listing_id = f"{appid}_{item['id']}"
+    else:
+        base_name = item.get("baseName") or item.get("name", "")
+        listing_id = get_buy_listing_id(steamid, base_name, appid)
+
+    payload = {
+        "id": listing_id,
+        "steamid": steamid,
+        "appid": appid,
+        "intent": intent,
+        "currencies": listing.get("currencies", {}),
+        "details": listing.get("details"),
+        "listedAt": listing.get("timestamp", 0),
+        "bumpedAt": listing.get("bump", 0),
+        "item": item,
+        "userAgent": listing.get("userAgent", {}),
+    }
+
+    if listing.get("price") is not None:
+        payload["value"] = {"raw": listing["price"]}
+
+    return payload
+
+
+def get_listing_price(listing: Any, key_price: float) -> float:
+    """Price in refined metal, from ``value.raw`` if the listing has it"""
+    value = get_field(listing, "value") or {}
+    raw = value.get("raw") if isinstance(value, dict) else None
+
+    if raw is not None:
+        return raw
+
+    currencies = get_field(listing, "currencies") or {}
+    keys = get_field(currencies, "keys", 0) or 0
+    metal = get_field(currencies, "metal", 0.0) or 0.0
+    return keys * key_price + metal
+
+
+class OrderEntry:
+    __slots__ = ("id", "key", "intent", "steamid", "price", "version", "listing")
+
+    def __init__(
+        self,
+        id: str,
+        key: str,
+        intent: str,
+        steamid: str,
+        price: float,
+        version: float,
+        listing: Any,
+    ) -> None:
+        self.id = id
+        self.key = key
+        self.intent = intent
+        self.steamid = steamid
+        self.price = price
+        self.version = version
+        self.listing = listing
+
+
+class OrderBook:
+    def __init__(
+        self,
+        key_price: float = 0.0,
+        key: Callable[[Any], str] = get_item_name,
+        max_age: float = 600.0,
+        max_tombstones: int = 100_000,
+    ) -> None:
+        """
+        Listings indexed by item, intent and steamid, built from snapshots
+        and websocket events. Listings can be dicts, ``Listing`` or
+        ``ListingPayload``.
+
+        Updates and deletes are ordered by ``bumpedAt``/``listedAt``, so an
+        event older than what the book holds is ignored and the item is
+        marked as suspect, to be snapshotted again by ``refresh``.
+
+        Args:
+            key_price: Refined price of a key, used to price listings which
+                have no ``value.raw``
+            key: Function returning the item key of a listing, by default
+                the item name. Snapshots are fetched by item name, so only
+                books keyed by item name can be seeded and refreshed
+            max_age: Seconds after which a seeded item is snapshotted again
+            max_tombstones: Number of deleted listing ids remembered, so
+                older snapshots can not bring them back
+        """
+        self.key_price = key_price
+        self.max_age = max_age
+        self.max_tombstones = max_tombstones
+        self.stale_events = 0
+        self._key = key
+        self._listings: dict[str, OrderEntry] = {}
+        # (item key, intent) to price levels sorted by (price, listing id)
+        self._levels: dict[tuple[str, str], list[tuple[float, str]]] = {}
+        self._by_steamid: dict[str, set[str]] = {}
+        self._tombstones: OrderedDict[str, float] = OrderedDict()
+        self._seeded_at: dict[str, float] = {}
+        self._suspect: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._listings)
+
+    def __contains__(self, listing_id: str) -> bool:
+        return listing_id in self._listings
+
+    def get(self, listing_id: str) -> Any:
+        entry = self._listings.get(listing_id)
+        return entry.listing if entry is not None else None
+
+    def _is_stale(
+        self, listing_id: str, version: float, key: str, is_update: bool = False
+    ) -> bool:
+        entry = self._listings.get(listing_id)
+        newest = entry.version if entry is not None else None
+        # an update as old as the delete, e.g. a replayed one, must not bring
+        # the listing back
+        strict = is_update and entry is None
+
+        if newest is None:
+            newest = self._tombstones.get(listing_id)
+
+        if newest is None or version > newest or (version == newest and not strict):
+            return False
+
+        self.stale_events += 1
+        self._suspect.add(key)
+        return True
+
+    def add(self, listing: Any) -> bool:
+        """Add a listing, replacing an older version of it. Returns False if
+        the book already has a newer version or it was deleted since"""
+        listing_id = get_field(listing, "id")
+        version = get_listing_version(listing)
+        key = self._key(listing)
+
+        if self._is_stale(listing_id, version, key, is_update=True):
+            return False
+
+        if listing_id in self._listings:
+            self.remove(listing_id)
+
+        self._tombstones.pop(listing_id, None)
+
+        entry = OrderEntry(
+            listing_id,
+            key,
+            get_field(listing, "intent"),
+            get_field(listing, "steamid"),
+            get_listing_price(listing, self.key_price),
+            version,
+            listing,
+        )
+
+        self._listings[listing_id] = entry
+        insort(
+            self._levels.setdefault((entry.key, entry.intent), []),
+            (entry.price, listing_id),
+        )
+        self._by_steamid.setdefault(entry.steamid, set()).add(listing_id)
+        return True
+
+    def delete(self, listing: Any) -> bool:
+        """Remove a listing unless the book holds a newer version of it, and
+        remember it was deleted. Returns False if the delete was stale"""
+        listing_id = get_field(listing, "id")
+        version = get_listing_version(listing)
+        key = self._key(listing)
+
+        if self._is_stale(listing_id, version, key):
+            return False
+
+        # a seeded item should have had the listing
+        if listing_id not in self._listings and key in self._seeded_at:
+            self._suspect.add(key)
+
+        self.remove(listing_id)
+        self._tombstones[listing_id] = version
+        self._tombstones.move_to_end(listing_id)
+
+        while len(self._tombstones) > self.max_tombstones:
+            self._tombstones.popitem(last=False)
+
+        return True
+
+    def remove(self, listing_id: str) -> Any:
+        """Remove a listing by id, returning it if it was in the book"""
+        entry = self._listings.pop(listing_id, None)
+
+        if entry is None:
+            return None
+
+        level_key = (entry.key, entry.intent)
+        levels = self._levels[level_key]
+        index = bisect_left(levels, (entry.price, listing_id))
+        del levels[index]
+
+        if not levels:
+            del self._levels[level_key]
+
+        ids = self._by_steamid[entry.steamid]
+        ids.discard(listing_id)
+
+        if not ids:
+            del self._by_steamid[entry.steamid]
+
+        return entry.listing
+
+    def apply(self, event: str, payload: Any) -> None:
+        """Apply a ``listing-update`` or ``listing-delete`` event"""
+        if event == "listing-update":
+            self.add(payload)
+        elif event == "listing-delete":
+            self.delete(payload)
+
+    def apply_events(self, events: Iterable[dict | ListingEvent]) -> None:
+        """Apply events as received from the websocket"""
+        for event in events:
+            if isinstance(event, dict):
+                self.apply(event["event"], event["payload"])
+            else:
+                self.apply(event.event, event.payload)
+
+    def _top(self, key: str, intent: str, count: int) -> list[Any]:
+        levels = self._levels.get((key, intent))
+
+        if not levels:
+            return []
+
+        # sells are cheapest first, buys are highest first
+        if intent == "sell":
+            top = levels[:count]
+        else:
+            top = levels[: -count - 1 : -1] if count else []
+
+        return [self._listings[listing_id].listing for _, listing_id in top]
+
+    def best_bid(self, key: str) -> Any:
+        """Highest priced buy listing for an item"""
+        levels = self._levels.get((key, "buy"))
+        return self._listings[levels[-1][1]].listing if levels else None
+
+    def best_ask(self, key: str) -> Any:
+        """Lowest priced sell listing for an item"""
+        levels = self._levels.get((key, "sell"))
+        return self._listings[levels[0][1]].listing if levels else None
+
+    def top_bids(self, key: str, count: int = 10) -> list[Any]:
+        return self._top(key, "buy", count)
+
+    def top_asks(self, key: str, count: int = 10) -> list[Any]:
+        return self._top(key, "sell", count)
+
+    def spread(self, key: str) -> float | None:
+        """Difference between the best ask and best bid price"""
+        bids = self._levels.get((key, "buy"))
+        asks = self._levels.get((key, "sell"))
+
+        if not bids or not asks:
+            return None
+
+        return asks[0][0] - bids[-1][0]
+
+    def get_by_steamid(self, steamid: str) -> list[Any]:
+        ids = self._by_steamid.get(steamid, ())
+        return [self._listings[listing_id].listing for listing_id in ids]
+
+    def entries(self) -> Iterable[OrderEntry]:
+        return self._listings.values()
+
+    def keys(self) -> set[str]:
+        return {key for key, _ in self._levels}
+
+    def _check_seedable(self) -> None:
+        if self._key is not get_item_name:
+            raise ValueError("only books keyed by item name can be seeded")
+
+    def seed(self, snapshot: dict, key: str = None) -> None:
+        """Replace the listings of an item with a snapshot from
+        ``get_snapshot``. Listings changed after the snapshot was created
+        are kept.
+
+        Args:
+            snapshot: Response of ``get_snapshot``
+            key: Item name of the snapshot, defaults to its ``sku``
+        """
+        self._check_seedable()
+        key = key or snapshot.get("sku", "")
+        created_at = snapshot.get("createdAt") or time.time()
+        listings = snapshot.get("listings", [])
+
+        for intent in ("buy", "sell"):
+            for _, listing_id in list(self._levels.get((key, intent), [])):
+                if self._listings[listing_id].version <= created_at:
+                    self.remove(listing_id)
+
+        for listing in listings:
+            self.add(snapshot_listing_to_payload(listing, snapshot.get("appid", 440)))
+
+        self._seeded_at[key] = time.time()
+        self._suspect.discard(key)
+
+    def mark_suspect(self, *keys: str) -> None:
+        """Have items snapshotted again on the next refresh, e.g. after the
+        websocket reconnected"""
+        self._suspect.update(keys)
+
+    def suspect_keys(self) -> set[str]:
+        """Items marked as suspect or seeded more than ``max_age`` ago"""
+        expired = time.time() - self.max_age
+        old = {key for key, seeded_at in self._seeded_at.items() if seeded_at < expired}
+        return self._suspect | old
+
+    def refresh(self, client) -> int:
+        """Snapshot suspect items again using a ``BackpackTF`` client.
+        Returns how many items were seeded"""
+        self._check_seedable()
+        keys = self.suspect_keys()
+
+        for key in keys:
+            self.seed(client.get_snapshot(key), key)
+
+        return len(keys)
+
+    async def refresh_async(self, client, concurrency: int = 10) -> int:
+        """Snapshot suspect items again using an ``AsyncBackpackTF`` client.
+        Items which fail stay suspect. Returns how many items were seeded"""
+        self._check_seedable()
+        seeded = 0
+
+        async for key, snapshot in client.get_snapshots(
+            self.suspect_keys(), concurrency
+        ):
+            if isinstance(snapshot, Exception):
+                continue
+
+            self.seed(snapshot, key)
+            seeded += 1
+
+        return seeded
+
+    def clear(self) -> None:
+        self._listings.clear()
+        self._levels.clear()
+        self._by_steamid.clear()
+        self._tombstones.clear()
+        self._seeded_at.clear()
+        self._suspect.clear()
@@ -0,0 +1,229 @@
+"""Vectorized price statistics, needs numpy (``pip install bptf[pricing]``)"""
+
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+import numpy as np
+
+from .orderbook import OrderBook, get_field, get_item_name, get_listing_version
+
+BUY = 1
+SELL = 0
+
+
+@dataclass(slots=True)
+class ListingColumns:
+    """Listings as columns, one row per listing. ``sku`` holds indexes into
+    ``skus``"""
+
+    skus: list[str]
+    sku: np.ndarray
+    keys: np.ndarray
+    metal: np.ndarray
+    intent: np.ndarray
+    timestamp: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.sku)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple[str, int, float, float, float]]):
+        """Build from ``(sku, intent, keys, metal, timestamp)`` rows where
+        intent is ``BUY`` or ``SELL``"""
+        codes = {}
+        sku, intent, keys, metal, timestamp = [], [], [], [], []
+
+        for row_sku, row_intent, row_keys, row_metal, row_timestamp in rows:
+            sku.append(codes.setdefault(row_sku, len(codes)))
+            intent.append(row_intent)
+            keys.append(row_keys)
+            metal.append(row_metal)
+            timestamp.append(row_timestamp)
+
+        return cls(
+            list(codes),
+            np.array(sku, dtype=np.int32),
+            np.array(keys, dtype=np.float64),
+            np.array(metal, dtype=np.float64),
+            np.array(intent, dtype=np.int8),
+            np.array(timestamp, dtype=np.float64),
+        )
+
+    @classmethod
+    def from_snapshots(cls, snapshots: Iterable[dict]) -> "ListingColumns":
+        """Build from ``get_snapshot`` responses, keyed by their ``sku``"""
+        skus, counts = [], []
+        intent, keys, metal, timestamp = [], [], [], []
+
+        for snapshot in snapshots:
+            listings = snapshot.get("listings", [])
+            currencies = [listing.get("currencies") or {} for listing in listings]
+
+            skus.append(snapshot["sku"])
+            counts.append(len(listings))
+            intent += [listing.get("intent") == "buy" for listing in listings]
+            keys += [c.get("keys", 0) for c in currencies]
+            metal += [c.get("metal", 0.0) for c in currencies]
+            timestamp += [
+                listing.get("bump") or listing.get("timestamp") or 0
+                for listing in listings
+            ]
+
+        return cls(
+            skus,
+            np.repeat(np.arange(len(skus), dtype=np.int32), counts),
+            np.array(keys, dtype=np.float64),
+            np.array(metal, dtype=np.float64),
+            np.array(intent, dtype=np.int8),
+            np.array(timestamp, dtype=np.float64),
+        )
+
+    @classmethod
+    def from_listings(
+        cls, listings: Iterable[Any], key: Callable[[Any], str] = get_item_name
+    ) -> "ListingColumns":
+        """Build from dicts, ``Listing`` or ``ListingPayload`` objects"""
+
+        def rows():
+            for listing in listings:
+                currencies = get_field(listing, "currencies") or {}
+                yield (
+                    key(listing),
+                    BUY if get_field(listing, "intent") == "buy" else SELL,
+                    get_field(currencies, "keys", 0) or 0,
+                    get_field(currencies, "metal", 0.0) or 0.0,
+                    get_listing_version(listing),
+                )
+
+        return cls.from_rows(rows())
+
+    @classmethod
+    def from_order_book(cls, book: OrderBook) -> "ListingColumns":
+        """Build from the price levels of an order book. Prices are already
+        in refined, so they end up in ``metal``"""
+        return cls.from_rows(
+            (
+                entry.key,
+                BUY if entry.intent == "buy" else SELL,
+                0,
+                entry.price,
+                entry.version,
+            )
+            for entry in book.entries()
+        )
+
+    def to_refined(self, key_price: float) -> np.ndarray:
+        """Prices of every listing in refined metal"""
+        return self.keys * key_price + self.metal
+
+
+@dataclass(slots=True)
+class PriceStats:
+    sku: str
+    buy_count: int = 0
+    sell_count: int = 0
+    # quantile to price in refined, after trimming
+    buy: dict[float, float] = field(default_factory=dict)
+    sell: dict[float, float] = field(default_factory=dict)
+    best_buy: float | None = None
+    best_sell: float | None = None
+
+    @property
+    def spread(self) -> float | None:
+        if self.best_buy is None or self.best_sell is None:
+            return None
+
+        return self.best_sell - self.best_buy
+
+
+def group_quantiles(
+    groups: np.ndarray, values: np.ndarray, quantiles: Iterable[float], trim: float
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Quantiles of ``values`` per group, both sorted by group then value.
+
+    Returns group ids, their counts, minimums, maximums and a quantile by
+    group matrix. ``trim`` is the fraction dropped from each end of a group.
+    """
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    counts = np.diff(np.r_[starts, len(groups)])
+    cut = np.floor(counts * trim).astype(np.int64)
+    # never trim a group down to nothing
+    cut = np.where(counts - 2 * cut > 0, cut, 0)
+    low = starts + cut
+    high = starts + counts - cut - 1
+
+    result = []
+
+    for quantile in quantiles:
+        position = low + quantile * (high - low)
+        below = np.floor(position).astype(np.int64)
+        above = np.minimum(below + 1, high)
+        fraction = position - below
+        result.append(values[below] + (values[above] - values[below]) * fraction)
+
+    return groups[starts], counts, values[low], values[high], np.array(result)
+
+
+def sort_by_group(groups: np.ndarray, prices: np.ndarray) -> np.ndarray:
+    """Indexes sorting by group, then price.
+
+    Packs both into one float key, which sorts several times faster than
+    ``np.lexsort``. The key only decides the order, values are read from
+    ``prices``, so rounding can at worst swap nearly equal prices.
+    """
+    low = prices.min()
+    scale = 2.0 ** np.ceil(np.log2(prices.max() - low + 1))
+    return np.argsort(groups * scale + (prices - low))
+
+
+def get_price_stats(
+    columns: ListingColumns,
+    key_price: float,
+    quantiles: Iterable[float] = (0.25, 0.5, 0.75),
+    trim: float = 0.1,
+    since: float = None,
+) -> dict[str, PriceStats]:
+    """Price quantiles, best prices and spreads for every SKU
+
+    Args:
+        columns: Listings to compute statistics for
+        key_price: Refined price of a key
+        quantiles: Quantiles to compute, between 0 and 1
+        trim: Fraction of listings to drop as outliers from each end of
+            every SKU and intent, before anything is computed
+        since: Only use listings bumped at or after this timestamp
+    """
+    quantiles = tuple(quantiles)
+    prices = columns.to_refined(key_price)
+    groups = columns.sku.astype(np.int64) * 2 + columns.intent
+
+    if since is not None:
+        mask = columns.timestamp >= since
+        prices = prices[mask]
+        groups = groups[mask]
+
+    stats = {sku: PriceStats(sku) for sku in columns.skus}
+
+    if not len(prices):
+        return stats
+
+    order = sort_by_group(groups, prices)
+    group_ids, counts, lows, highs, values = group_quantiles(
+        groups[order], prices[order], quantiles, trim
+    )
+
+    for i, group in enumerate(group_ids.tolist()):
+        sku_stats = stats[columns.skus[group // 2]]
+        by_quantile = dict(zip(quantiles, values[:, i].tolist()))
+
+        if group % 2 == BUY:
+            sku_stats.buy_count = int(counts[i])
+            sku_stats.buy = by_quantile
+            sku_stats.best_buy = float(highs[i])
+        else:
+            sku_stats.sell_count = int(counts[i])
+            sku_stats.sell = by_quantile
+            sku_stats.best_sell = float(lows[i])
+
+    return stats
@@ -0,0 +1,207 @@
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from typing import Mapping
+
+# (requests, per seconds, burst) for each bucket, override with `limits`
+DEFAULT_LIMITS = {
+    "classifieds_write": (60, 60, 10),
+    "snapshot": (60, 60, 5),
+    "users_info": (60, 60, 5),
+}
+
+# seconds before resending a request answered with 429 which no bucket
+# covers and which has no Retry-After, doubled on every retry
+RETRY_BACKOFF = 1.0
+MAX_RETRY_BACKOFF = 30.0
+
+# (methods, endpoint prefix, bucket name), first match wins
+DEFAULT_RULES = [
+    (("GET",), "/classifieds/listings/snapshot", "snapshot"),
+    (("GET",), "/users/info", "users_info"),
+    (("POST", "PATCH", "DELETE"), "/v2/classifieds/listings", "classifieds_write"),
+]
+
+
+def parse_retry_after(value: str) -> float:
+    """Parse a ``Retry-After`` header given in seconds or as an HTTP date"""
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float) -> None:
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum amount of tokens, i.e. the allowed burst
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated_at
+
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated_at = now
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Take tokens and return how many seconds to wait before using them.
+
+        Tokens are allowed to go negative, so every caller is handed its own
+        slot and callers are spaced exactly at the refill rate.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= tokens
+            paused = max(self._paused_until - now, 0.0)
+
+            if self._tokens >= 0:
+                return paused
+
+            return paused - self._tokens / self.rate
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for the next ``seconds`` seconds. Overlapping
+        pauses end with the latest one instead of adding up"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = min(self._tokens, 0.0)
+            # nothing is refilled until the pause is over
+            self._updated_at = max(self._updated_at, self._paused_until)
+
+    def limit_to(self, remaining: float) -> None:
+        """Never hold more tokens than the server says are left"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, remaining)
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        limits: dict[str, tuple[float, float, float]] = None,
+        rules: list[tuple[tuple[str, ...], str, str]] = None,
+        max_retries: int = 3,
+    ) -> None:
+        """
+        Can be shared between ``BackpackTF`` and ``AsyncBackpackTF`` instances,
+        threads and tasks in the same process.
+
+        Args:
+            limits: Bucket name to (requests, per seconds, burst). Merged with
+                ``DEFAULT_LIMITS``, set a bucket to None to disable it
+            rules: (methods, endpoint prefix, bucket name) used to map requests
+                to buckets, first match wins. Defaults to ``DEFAULT_RULES``
+            max_retries: How many times a request answered with 429 is resent
+        """
+        limits = {**DEFAULT_LIMITS, **(limits or {})}
+
+        self.rules = DEFAULT_RULES if rules is None else rules
+        self.max_retries = max_retries
+        self.buckets: dict[str, TokenBucket] = {}
+
+        for name, limit in limits.items():
+            if limit is None:
+                continue
+
+            requests, per, burst = limit
+            self.buckets[name] = TokenBucket(requests / per, burst)
+
+    def get_bucket(self, method: str, endpoint: str) -> TokenBucket | None:
+        method = method.upper()
+
+        for methods, prefix, name in self.rules:
+            if method in methods and endpoint.startswith(prefix):
+                return self.buckets.get(name)
+
+        return None
+
+    def reserve(self, method: str, endpoint: str) -> float:
+        bucket = self.get_bucket(method, endpoint)
+
+        if bucket is None:
+            return 0.0
+
+        return bucket.reserve()
+
+    def acquire(self, method: str, endpoint: str) -> None:
+        delay = self.reserve(method, endpoint)
+
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, method: str, endpoint: str) -> None:
+        delay = self.reserve(method, endpoint)
+
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def get_retry_delay(
+        self, method: str, endpoint: str, headers: Mapping[str, str], retries: int
+    ) -> float:
+        """Seconds to wait before resending a request answered with 429.
+        Requests with a bucket wait for it in ``acquire`` instead"""
+        if self.get_bucket(method, endpoint) is not None:
+            return 0.0
+
+        retry_after = headers.get("Retry-After")
+
+        if retry_after is not None:
+            return parse_retry_after(retry_after)
+
+        return min(RETRY_BACKOFF * 2 ** (retries - 1), MAX_RETRY_BACKOFF)
+
+    def update(
+        self, method: str, endpoint: str, status: int, headers: Mapping[str, str]
+    ) -> None:
+        """Sync the bucket with the rate limit headers of a response"""
+        bucket = self.get_bucket(method, endpoint)
+
+        if bucket is None:
+            return
+
+        retry_after = headers.get("Retry-After")
+
+        if retry_after is not None:
+            bucket.pause(parse_retry_after(retry_after))
+            return
+
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+
+        if remaining is not None:
+            bucket.limit_to(float(remaining))
+
+        if reset is not None and (status == 429 or remaining == "0"):
+            reset = float(reset)
+
+            # either an epoch timestamp or seconds until reset
+            if reset > 1e9:
+                reset -= time.time()
+
+            bucket.pause(max(reset, 0.0))
+        elif status == 429:
+            bucket.pause(1 / bucket.rate)
@@ -0,0 +1,140 @@
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from math import ceil
+
+from .classes import Currencies, Listing, ListingError
+from .utils import construct_listings, get_listing_id
+
+
+@dataclass(slots=True)
+class ListingDiff:
+    """Changes needed to turn live listings into the desired ones"""
+
+    # keyword arguments of ``create_listing``
+    create: list[dict] = field(default_factory=list)
+    # listing id to the currencies and details it should have
+    update: dict[str, dict] = field(default_factory=dict)
+    delete: list[str] = field(default_factory=list)
+    unchanged: int = 0
+    errors: list[ListingError] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.create) + len(self.update) + len(self.delete)
+
+    def calls(self, batch_size: int = 100) -> int:
+        """Number of write requests needed to apply the diff"""
+        return ceil(len(self.create) / batch_size) + len(self.update) + len(self.delete)
+
+
+@dataclass(slots=True)
+class ReconcileResult:
+    diff: ListingDiff
+    created: list[Listing | ListingError] = field(default_factory=list)
+    updated: dict[str, Listing | ListingError] = field(default_factory=dict)
+    deleted: dict[str, dict | ListingError] = field(default_factory=dict)
+
+    @property
+    def errors(self) -> list[ListingError]:
+        results = [*self.created, *self.updated.values(), *self.deleted.values()]
+        return self.diff.errors + [r for r in results if isinstance(r, ListingError)]
+
+
+def get_changes(desired: dict, live: Listing) -> dict:
+    """Currencies and details to update ``live`` with, empty if it already
+    matches ``desired``"""
+    currencies = Currencies.from_dict(desired["currencies"])
+    details = desired.get("details") or ""
+    changes = {}
+
+    if currencies != live.currencies:
+        changes["currencies"] = {"keys": currencies.keys, "metal": currencies.metal}
+
+    if details != (live.details or ""):
+        changes["details"] = details
+
+    return changes
+
+
+def get_desired_listing_id(steam_id: str, listing: dict) -> str | None:
+    """Id of a desired listing, None if it can not be worked out"""
+    intent = listing.get("intent")
+
+    if intent not in ("buy", "sell") or not isinstance(listing.get("sku"), str):
+        return None
+
+    try:
+        return get_listing_id(
+            steam_id, listing["sku"], intent, listing.get("asset_id", 0)
+        )
+    except Exception:
+        return None
+
+
+def diff_listings(
+    steam_id: str,
+    desired: Iterable[dict],
+    live: Iterable[Listing],
+    delete: bool = True,
+) -> ListingDiff:
+    """Compare desired listings to live ones by listing id. Desired
+    listings with the id of an earlier one are reported in ``errors``
+
+    Args:
+        steam_id: SteamID64 of the account the listings belong to
+        desired: Keyword arguments of ``create_listing`` for every listing
+            which should be up
+        live: Listings currently up, e.g. from ``get_listings``
+        delete: If live listings which are not desired should be deleted
+    """
+    desired = list(desired)
+    constructed, errors = construct_listings(desired)
+    diff = ListingDiff(errors=list(errors.values()))
+    by_id = {}
+    # ids of invalid listings, their live version is kept as it is
+    kept = set()
+
+    for index, _ in constructed:
+        listing = desired[index]
+        listing_id = get_listing_id(
+            steam_id, listing["sku"], listing["intent"], listing.get("asset_id", 0)
+        )
+
+        # e.g. two buy listings of the same item, the first one is applied
+        if listing_id in by_id:
+            error = ListingError(listing, f"Duplicate of listing {listing_id}")
+            diff.errors.append(error)
+            continue
+
+        by_id[listing_id] = listing
+
+    for index in errors:
+        listing_id = get_desired_listing_id(steam_id, desired[index])
+
+        if listing_id is not None:
+            kept.add(listing_id)
+
+    live_by_id = {listing.id: listing for listing in live}
+
+    for listing_id, listing in by_id.items():
+        current = live_by_id.get(listing_id)
+
+        # archived listings have to be listed again to show up
+        if current is None or current.archived:
+            diff.create.append(listing)
+            continue
+
+        changes = get_changes(listing, current)
+
+        if changes:
+            diff.update[listing_id] = changes
+        else:
+            diff.unchanged += 1
+
+    if delete:
+        diff.delete = [
+            listing_id
+            for listing_id in live_by_id
+            if listing_id not in by_id and listing_id not in kept
+        ]
+
+    return diff
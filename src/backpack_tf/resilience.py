@@ -0,0 +1,377 @@
+import asyncio
+import logging
+import random
+import time
+from collections.abc import Awaitable, Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from threading import Lock
+from typing import TypeVar
+
+from .exceptions import CircuitOpen
+from .instrumentation import Instrumentation
+
+T = TypeVar("T")
+
+# 429 is left to the RateLimiter, which knows when the limit resets
+RETRY_STATUSES = {500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+HEDGE_ENDPOINTS = ("/classifieds/listings/snapshot",)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        instrumentation: Instrumentation = None,
+    ) -> None:
+        """
+        Fails requests fast once the API keeps failing, instead of letting
+        every caller wait for its own timeouts and retries.
+
+        Args:
+            failure_threshold: Consecutive failures after which the circuit
+                opens and requests are rejected
+            reset_timeout: Seconds the circuit stays open before a single
+                trial request is let through
+            instrumentation: Sink told about every state change
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.instrumentation = instrumentation
+        self.state = CLOSED
+        self.failures = 0
+        self.opens = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = Lock()
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            logger.warning("Circuit breaker %s -> %s", self.state, state)
+            self.state = state
+
+            if self.instrumentation is not None:
+                self.instrumentation.on_breaker_state(state)
+
+    def before_call(self) -> None:
+        """Raise ``CircuitOpen`` if the request should not be sent"""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+
+            if (
+                self.state == OPEN
+                and time.monotonic() - self._opened_at >= self.reset_timeout
+            ):
+                self._set_state(HALF_OPEN)
+
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return
+
+            self.rejected += 1
+
+        raise CircuitOpen("Backpack.tf is failing, not sending requests")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._trial_running = False
+            self._set_state(CLOSED)
+
+    def release(self) -> None:
+        """Let another trial request through, the last one ended without a
+        result, e.g. it was cancelled"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.opens += 1
+
+                self._opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_retries: int = 3,
+        min_backoff: float = 0.5,
+        max_backoff: float = 10.0,
+        retry_statuses: set[int] = RETRY_STATUSES,
+        idempotent_methods: set[str] = IDEMPOTENT_METHODS,
+        hedge_delay: float = None,
+        hedge_endpoints: tuple[str, ...] = HEDGE_ENDPOINTS,
+        breaker: CircuitBreaker = None,
+        instrumentation: Instrumentation = None,
+    ) -> None:
+        """
+        How ``BackpackTF`` and ``AsyncBackpackTF`` handle failed requests.
+        Can be shared between clients, threads and tasks.
+
+        Args:
+            max_retries: How many times a failed request is resent
+            min_backoff: Seconds to wait before the first retry, doubled for
+                every retry and fully jittered
+            max_backoff: Maximum seconds to wait between retries
+            retry_statuses: Statuses worth retrying, connection errors and
+                timeouts are always retried
+            idempotent_methods: Only requests with these methods are
+                retried, as resending them can not create duplicates
+            hedge_delay: Seconds after which a slow GET to one of
+                ``hedge_endpoints`` is sent a second time, the first response
+                wins. None disables hedging
+            hedge_endpoints: Endpoint prefixes which are hedged
+            breaker: Circuit breaker shared by every request
+            instrumentation: Sink told about every retry and hedge
+        """
+        self.max_retries = max_retries
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.retry_statuses = retry_statuses
+        self.idempotent_methods = idempotent_methods
+        self.hedge_delay = hedge_delay
+        self.hedge_endpoints = hedge_endpoints
+        self.breaker = breaker
+        self.instrumentation = instrumentation
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._executor = None
+        self._executor_lock = Lock()
+
+    @property
+    def stats(self) -> dict[str, int | str]:
+        stats = {
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+        }
+
+        if self.breaker is not None:
+            stats["breaker_state"] = self.breaker.state
+            stats["breaker_opens"] = self.breaker.opens
+            stats["breaker_rejected"] = self.breaker.rejected
+
+        return stats
+
+    def get_backoff(self, attempt: int) -> float:
+        delay = min(self.max_backoff, self.min_backoff * 2**attempt)
+        return random.uniform(0, delay)
+
+    def is_transient(self, status: int | None) -> bool:
+        """If a request failed because of the API, None meaning the request
+        never got a response"""
+        return status is None or status in self.retry_statuses
+
+    def should_hedge(self, method: str, endpoint: str) -> bool:
+        return (
+            self.hedge_delay is not None
+            and method.upper() == "GET"
+            and endpoint.startswith(self.hedge_endpoints)
+        )
+
+    def _should_retry(self, method: str, attempt: int, status: int | None) -> bool:
+        return (
+            attempt < self.max_retries
+            and method.upper() in self.idempotent_methods
+            and self.is_transient(status)
+        )
+
+    def _record_error(self, status: int | None) -> None:
+        if self.breaker is None:
+            return
+
+        # a client error still means the API is up
+        if self.is_transient(status):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def _record_retry(self, method: str, endpoint: str, status: int | None) -> None:
+        self.retries += 1
+
+        if self.instrumentation is not None:
+            self.instrumentation.on_retry(method, endpoint, status)
+
+    def _record_hedge(self, method: str, endpoint: str, won: bool) -> None:
+        self.hedge_wins += won
+
+        if self.instrumentation is not None:
+            self.instrumentation.on_hedge(method, endpoint, won)
+
+    def _submit(self, send: Callable[[], T]) -> Future:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(thread_name_prefix="bptf-hedge")
+
+            return self._executor.submit(send)
+
+    def close(self) -> None:
+        """Stop the threads sending hedged requests. They are started again
+        if the policy is used after closing, e.g. by another client"""
+        with self._executor_lock:
+            executor = self._executor
+            self._executor = None
+
+        # requests which lost a hedge are not waited for
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def _hedge(self, method: str, endpoint: str, send: Callable[[], T]) -> T:
+        first = self._submit(send)
+        done, _ = wait([first], timeout=self.hedge_delay)
+
+        if done:
+            return first.result()
+
+        self.hedges += 1
+        second = self._submit(send)
+        pending: set[Future] = {first, second}
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                if future.exception() is None:
+                    self._record_hedge(method, endpoint, future is second)
+                    return future.result()
+
+        # both failed, raise the error of the original request
+        return first.result()
+
+    def call(
+        self,
+        method: str,
+        endpoint: str,
+        send: Callable[[], T],
+        errors: tuple[type[Exception], ...],
+        get_status: Callable[[Exception], int | None],
+    ) -> T:
+        """Send a request, retrying and hedging it as configured
+
+        Args:
+            method: HTTP method of the request
+            endpoint: Endpoint of the request
+            send: Sends the request once, raising on failure
+            errors: Exceptions ``send`` raises when the request failed
+            get_status: Status code of such an exception, None if there was
+                no response
+        """
+        attempt = 0
+        hedge = self.should_hedge(method, endpoint)
+
+        while True:
+            if self.breaker is not None:
+                self.breaker.before_call()
+
+            try:
+                result = self._hedge(method, endpoint, send) if hedge else send()
+            except errors as e:
+                status = get_status(e)
+                self._record_error(status)
+
+                if not self._should_retry(method, attempt, status):
+                    raise
+
+                time.sleep(self.get_backoff(attempt))
+                attempt += 1
+                self._record_retry(method, endpoint, status)
+                continue
+            except BaseException:
+                if self.breaker is not None:
+                    self.breaker.release()
+
+                raise
+
+            if self.breaker is not None:
+                self.breaker.record_success()
+
+            return result
+
+    async def _hedge_async(
+        self, method: str, endpoint: str, send: Callable[[], Awaitable[T]]
+    ) -> T:
+        first = asyncio.ensure_future(send())
+        pending = {first}
+
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self.hedge_delay)
+
+            if done:
+                return first.result()
+
+            self.hedges += 1
+            second = asyncio.ensure_future(send())
+            pending.add(second)
+
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                for task in done:
+                    if task.exception() is None:
+                        self._record_hedge(method, endpoint, task is second)
+                        return task.result()
+
+            return first.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def call_async(
+        self,
+        method: str,
+        endpoint: str,
+        send: Callable[[], Awaitable[T]],
+        errors: tuple[type[Exception], ...],
+        get_status: Callable[[Exception], int | None],
+    ) -> T:
+        """Same as ``call``, for coroutines"""
+        attempt = 0
+        hedge = self.should_hedge(method, endpoint)
+
+        while True:
+            if self.breaker is not None:
+                self.breaker.before_call()
+
+            try:
+                result = await (
+                    self._hedge_async(method, endpoint, send) if hedge else send()
+                )
+            except errors as e:
+                status = get_status(e)
+                self._record_error(status)
+
+                if not self._should_retry(method, attempt, status):
+                    raise
+
+                await asyncio.sleep(self.get_backoff(attempt))
+                attempt += 1
+                self._record_retry(method, endpoint, status)
+                continue
+            except BaseException:
+                if self.breaker is not None:
+                    self.breaker.release()
+
+                raise
+
+            if self.breaker is not None:
+                self.breaker.record_success()
+
+            return result
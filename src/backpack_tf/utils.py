@@ -1,28 +1,102 @@
+from collections.abc import Iterable
+from dataclasses import asdict
+from functools import lru_cache
 from hashlib import md5
 
-from tf2_utils import sku_is_craftable, sku_to_quality
-from tf2_utils.instances import schema
+from .classes import Currencies, Listing, ListingError
+from .exceptions import (
+    BackpackTFException,
+    InvalidIntent,
+    NeedsAPIKey,
+    NoTokenProvided,
+)
 
-from .classes import Currencies
-from .exceptions import InvalidIntent, NeedsAPIKey, NoTokenProvided
+# SKUs relisted every cycle are resolved once, see warmup
+MAX_CACHED_SKUS = 8192
 
 
+@lru_cache(maxsize=MAX_CACHED_SKUS)
 def get_item_hash(item_name: str) -> str:
     return md5(item_name.encode()).hexdigest()
 
 
+@lru_cache(maxsize=MAX_CACHED_SKUS)
+def sku_to_base_name(sku: str) -> str:
+    # loading the schema is slow, so it is only done once a SKU is resolved
+    from tf2_utils.instances import schema
+
+    return schema.sku_to_base_name(sku)
+
+
+@lru_cache(maxsize=MAX_CACHED_SKUS)
+def sku_to_name(sku: str) -> str:
+    """Full item name, e.g. "Strange Team Captain", as sent in listings"""
+    from tf2_utils.instances import schema
+
+    return schema.sku_to_name(sku)
+
+
+@lru_cache(maxsize=MAX_CACHED_SKUS)
+def get_listing_item_fields(sku: str) -> tuple[str, bool, int]:
+    from tf2_utils import sku_is_craftable, sku_to_quality
+
+    return sku_to_base_name(sku), sku_is_craftable(sku), sku_to_quality(sku)
+
+
 def get_sku_item_hash(sku: str) -> str:
-    item_name = schema.sku_to_base_name(sku)
+    item_name = sku_to_base_name(sku)
     return get_item_hash(item_name)
 
 
+def get_buy_listing_id(steam_id: str, base_name: str, appid: int = 440) -> str:
+    """Id Backpack.tf gives a buy listing, keyed by owner and the base name
+    of the item, e.g. "Team Captain" for a Strange Team Captain"""
+    return f"{appid}_{steam_id}_{get_item_hash(base_name)}"
+
+
+def get_listing_id(steam_id: str, sku: str, intent: str, asset_id: int = 0) -> str:
+    """Id Backpack.tf gives a listing, sell listings are keyed by asset id
+    and buy listings by owner and item"""
+    if intent == "sell":
+        return f"440_{asset_id}"
+
+    return get_buy_listing_id(steam_id, sku_to_base_name(sku))
+
+
 def construct_listing_item(sku: str) -> dict:
+    base_name, craftable, quality = get_listing_item_fields(sku)
+
     return {
-        "baseName": schema.sku_to_base_name(sku),
-        "craftable": sku_is_craftable(sku),
+        "baseName": base_name,
+        "craftable": craftable,
         "tradable": True,
-        "quality": {"id": sku_to_quality(sku)},
+        "quality": {"id": quality},
+    }
+
+
+def warmup(skus: Iterable[str]) -> None:
+    """Resolve SKUs ahead of time, e.g. the inventory at startup"""
+    for sku in skus:
+        get_listing_item_fields(sku)
+        get_sku_item_hash(sku)
+
+
+def get_cache_stats() -> dict[str, dict[str, int]]:
+    """Hits, misses, size and maximum size of every SKU cache"""
+    caches = {
+        "item_hash": get_item_hash,
+        "base_name": sku_to_base_name,
+        "name": sku_to_name,
+        "listing_item": get_listing_item_fields,
     }
+    return {name: func.cache_info()._asdict() for name, func in caches.items()}
+
+
+def clear_sku_cache() -> None:
+    """Forget resolved SKUs, call after the tf2-utils schema was updated"""
+    sku_to_base_name.cache_clear()
+    sku_to_name.cache_clear()
+    get_listing_item_fields.cache_clear()
 
 
 def construct_listing(
@@ -37,7 +111,7 @@ def construct_listing(
         "offers": True,
         "promoted": False,
         "details": details,
-        "currencies": Currencies(**currencies).__dict__,
+        "currencies": asdict(Currencies(**currencies)),
     }
 
     if intent == "sell":
@@ -46,6 +120,66 @@ def construct_listing(
     return listing
 
 
+def chunk_list(items: list, size: int) -> list[list]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def construct_listings(
+    listings: list[dict],
+) -> tuple[list[tuple[int, dict]], dict[int, ListingError]]:
+    """Construct listings, returning the valid ones with their index and
+    errors for the rest by index"""
+    constructed = []
+    errors = {}
+
+    for index, listing in enumerate(listings):
+        try:
+            constructed.append((index, construct_listing(**listing)))
+        except (BackpackTFException, TypeError) as e:
+            errors[index] = ListingError(listing, str(e))
+
+    return constructed, errors
+
+
+def parse_batch_response(
+    listings: list[dict], response: list[dict]
+) -> list[Listing | ListingError]:
+    results = []
+
+    for listing, item in zip(listings, response):
+        if "result" in item:
+            results.append(Listing.from_dict(item["result"]))
+            continue
+
+        error = item.get("error") or {}
+        message = error.get("message", str(item)) if isinstance(error, dict) else error
+        results.append(ListingError(listing, str(message)))
+
+    # server returned fewer results than listings sent
+    for listing in listings[len(response) :]:
+        results.append(ListingError(listing, "Missing from batch response"))
+
+    return results
+
+
+def merge_batch_results(
+    total: int,
+    errors: dict[int, ListingError],
+    batches: list[list[tuple[int, dict]]],
+    results: list[list[Listing | ListingError]],
+) -> list[Listing | ListingError]:
+    merged = [None] * total
+
+    for index, error in errors.items():
+        merged[index] = error
+
+    for batch, batch_results in zip(batches, results):
+        for (index, _), result in zip(batch, batch_results):
+            merged[index] = result
+
+    return merged
+
+
 def needs_token(func):
     def wrapper(self, *args, **kwargs):
         if not self._token:
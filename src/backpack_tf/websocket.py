@@ -1,7 +1,21 @@
-import json
-from typing import Any, Callable
+import asyncio
+import inspect
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable
 
-from websockets.sync.client import connect
+from .batching import MicroBatcher
+from .decoding import Decoder, get_decoder
+from .events import decode_events
+from .filters import EventFilter, FilteredDecoder
+from .instrumentation import Instrumentation
+from .journal import Journal
+
+WEBSOCKET_URL = "wss://ws.backpack.tf/events"
+OVERFLOW_POLICIES = ("block", "drop-oldest", "drop-newest")
+
+logger = logging.getLogger(__name__)
 
 
 class BackpackTFWebsocket:
@@ -12,6 +26,16 @@ class BackpackTFWebsocket:
         headers: dict[str, Any] = {"batch-test": True},
         max_size: int | None = None,
         settings: dict[str, Any] = {},
+        decoder: str | Decoder = "auto",
+        decode_bytes: bool = True,
+        typed: bool = False,
+        event_filter: EventFilter = None,
+        batch_size: int = None,
+        batch_latency: float = 0.2,
+        coalesce: bool = False,
+        instrumentation: Instrumentation = None,
+        journal: Journal = None,
+        url: str = WEBSOCKET_URL,
     ) -> None:
         """
         Args:
@@ -20,32 +44,419 @@ class BackpackTFWebsocket:
             headers: Additional headers to send to the socket
             max_size: Maximum size of messages to receive. None for unlimited
             settings: Additional websocket settings as a dict to be unpacked
+            decoder: JSON decoder name ("auto", "orjson", "msgspec", "json")
+                or a callable taking str or bytes
+            decode_bytes: Decode frames straight from the received bytes
+                instead of decoding them to str first
+            typed: Pass ``ListingPayload`` objects (or ``ListingEvent`` objects
+                if not as solo entries) to callback instead of dicts. Ignores
+                ``decoder``
+            event_filter: Only pass events matching this filter to callback,
+                others are dropped before they are fully decoded
+            batch_size: Pass events to callback in batches of up to this
+                many events instead, ignoring ``as_solo_entries``
+            batch_latency: Seconds after which a batch is passed to callback
+                even if it is not full
+            coalesce: Only keep the last event for every listing id in a
+                batch
+            instrumentation: Sink for frame sizes, parse and callback times
+            journal: Journal to record every received frame in
+            url: URL of the websocket
         """
         self._callback = callback
         self._as_solo_entries = as_solo_entries
         self._headers = headers
         self._max_size = max_size
         self._settings = settings
+        self._loads = decode_events if typed else get_decoder(decoder)
+
+        if event_filter is not None:
+            self._loads = FilteredDecoder(event_filter, self._loads)
+
+        self._typed = typed
+        self._batcher = (
+            MicroBatcher(batch_size, batch_latency, coalesce) if batch_size else None
+        )
+        self._decode = False if decode_bytes else None
+        self._instrumentation = instrumentation
+        self._journal = journal
+        self._url = url
+        self.invalid_frames = 0
+
+    def _get_timeout(self) -> float | None:
+        # wake up when the current batch is due
+        return self._batcher.time_left() if self._batcher is not None else None
+
+    def _flush(self) -> None:
+        batch = self._batcher.flush()
+
+        if batch:
+            self._callback(batch)
 
-    def _process_messages(self, data: str) -> None:
-        messages = json.loads(data)
+    def _dispatch(self, messages: list) -> None:
+        if self._batcher is not None:
+            for batch in self._batcher.add(messages):
+                self._callback(batch)
+
+            if self._batcher.is_due():
+                self._flush()
+
+            return
+
+        # e.g. every event was filtered out
+        if not messages:
+            return
 
         if not self._as_solo_entries:
             self._callback(messages)
             return
 
         for message in messages:
-            payload = message["payload"]
+            payload = message.payload if self._typed else message["payload"]
             self._callback(payload)
 
+    def _process_messages(self, data: str | bytes) -> None:
+        metrics = self._instrumentation
+
+        if self._journal is not None:
+            self._journal.append_frame(data)
+
+        started = time.perf_counter()
+
+        try:
+            messages = self._loads(data)
+        except Exception:
+            # one bad frame should not end listening
+            self.invalid_frames += 1
+            logger.exception("Failed to decode websocket frame")
+            return
+
+        if metrics is None:
+            self._dispatch(messages)
+            return
+
+        parsed = time.perf_counter()
+        metrics.on_frame(len(data), len(messages), parsed - started)
+
+        self._dispatch(messages)
+        metrics.on_callback(len(messages), time.perf_counter() - parsed)
+
     def listen(self) -> None:
         """Listen for messages from BackpackTF"""
+        from websockets.sync.client import connect
+
         with connect(
-            "wss://ws.backpack.tf/events",
+            self._url,
             additional_headers=self._headers,
             max_size=self._max_size,
             **self._settings,
         ) as websocket:
-            while True:
-                data = websocket.recv()
-                self._process_messages(data)
+            try:
+                while True:
+                    timeout = self._get_timeout()
+
+                    try:
+                        data = websocket.recv(timeout, decode=self._decode)
+                    except TimeoutError:
+                        self._flush()
+                        continue
+
+                    self._process_messages(data)
+            finally:
+                if self._batcher is not None:
+                    self._flush()
+
+
+class AsyncBackpackTFWebsocket:
+    def __init__(
+        self,
+        callback: Callable[[dict | list[dict]], Awaitable[None] | None],
+        as_solo_entries: bool = True,
+        headers: dict[str, Any] = {"batch-test": True},
+        max_size: int | None = None,
+        settings: dict[str, Any] = {},
+        decoder: str | Decoder = "auto",
+        decode_bytes: bool = True,
+        typed: bool = False,
+        event_filter: EventFilter = None,
+        batch_size: int = None,
+        batch_latency: float = 0.2,
+        coalesce: bool = False,
+        instrumentation: Instrumentation = None,
+        journal: Journal = None,
+        consumers: int = 1,
+        queue_size: int = 10_000,
+        overflow: str = "block",
+        reconnect: bool = True,
+        min_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        url: str = WEBSOCKET_URL,
+    ) -> None:
+        """
+        Args:
+            callback: Function or coroutine function where the data ends up
+            as_solo_entries: If data to callback should be solo entries or a batched list
+            headers: Additional headers to send to the socket
+            max_size: Maximum size of messages to receive. None for unlimited
+            settings: Additional websocket settings as a dict to be unpacked
+            decoder: JSON decoder name ("auto", "orjson", "msgspec", "json")
+                or a callable taking str or bytes
+            decode_bytes: Decode frames straight from the received bytes
+                instead of decoding them to str first
+            typed: Pass ``ListingPayload`` objects (or ``ListingEvent`` objects
+                if not as solo entries) to callback instead of dicts. Ignores
+                ``decoder``
+            event_filter: Only pass events matching this filter to callback,
+                others are dropped before they are fully decoded
+            batch_size: Pass events to callback in batches of up to this
+                many events instead, ignoring ``as_solo_entries``
+            batch_latency: Seconds after which a batch is passed to callback
+                even if it is not full
+            coalesce: Only keep the last event for every listing id in a
+                batch
+            instrumentation: Sink for frame sizes, parse and callback times
+            journal: Journal to record every received frame in
+            consumers: Number of tasks running the callback concurrently
+            queue_size: Maximum number of entries waiting for a consumer
+            overflow: What to do when the queue is full. "block" stops reading
+                from the socket, "drop-oldest" and "drop-newest" drop entries
+            reconnect: If the socket should be reconnected when it closes
+            min_backoff: Seconds to wait before the first reconnect attempt
+            max_backoff: Maximum seconds to wait between reconnect attempts
+            url: URL of the websocket
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"{overflow} must be one of {OVERFLOW_POLICIES}")
+
+        self._callback = callback
+        self._as_solo_entries = as_solo_entries
+        self._headers = headers
+        self._max_size = max_size
+        self._settings = settings
+        self._loads = decode_events if typed else get_decoder(decoder)
+
+        if event_filter is not None:
+            self._loads = FilteredDecoder(event_filter, self._loads)
+
+        self._typed = typed
+        self._batcher = (
+            MicroBatcher(batch_size, batch_latency, coalesce) if batch_size else None
+        )
+        self._decode = False if decode_bytes else None
+        self._instrumentation = instrumentation
+        self._journal = journal
+        self._consumers = consumers
+        self._queue_size = queue_size
+        self._overflow = overflow
+        self._reconnect = reconnect
+        self._min_backoff = min_backoff
+        self._max_backoff = max_backoff
+        self._url = url
+
+        self._queue: asyncio.Queue | None = None
+        self._websocket = None
+        self._running = False
+
+        self.received = 0
+        self.dropped = 0
+        self.processed = 0
+        self.errors = 0
+        self.invalid_frames = 0
+        self.reconnects = 0
+        self.lag = 0.0
+
+    @property
+    def stats(self) -> dict[str, int | float]:
+        """Counters for entries received, dropped and processed, and ``lag``,
+        the seconds the last processed entry waited in the queue"""
+        return {
+            "received": self.received,
+            "dropped": self.dropped,
+            "processed": self.processed,
+            "errors": self.errors,
+            "invalid_frames": self.invalid_frames,
+            "reconnects": self.reconnects,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "lag": self.lag,
+            "filtered": getattr(self._loads, "dropped", 0),
+            "coalesced": self._batcher.coalesced if self._batcher is not None else 0,
+        }
+
+    async def _enqueue(self, entry: dict | list[dict]) -> None:
+        self.received += 1
+        item = (time.monotonic(), entry)
+
+        if self._overflow == "block":
+            await self._queue.put(item)
+            return
+
+        if self._queue.full():
+            self.dropped += 1
+
+            if self._overflow == "drop-newest":
+                return
+
+            self._queue.get_nowait()
+            self._queue.task_done()
+
+        self._queue.put_nowait(item)
+
+    def _get_timeout(self) -> float | None:
+        # wake up when the current batch is due
+        return self._batcher.time_left() if self._batcher is not None else None
+
+    async def _flush(self) -> None:
+        batch = self._batcher.flush()
+
+        if batch:
+            await self._enqueue(batch)
+
+    async def _process_messages(self, data: str | bytes) -> None:
+        if self._journal is not None:
+            self._journal.append_frame(data)
+
+        started = time.perf_counter()
+
+        try:
+            messages = self._loads(data)
+        except Exception:
+            # one bad frame should not end listening
+            self.invalid_frames += 1
+            logger.exception("Failed to decode websocket frame")
+            return
+
+        if self._instrumentation is not None:
+            parse_time = time.perf_counter() - started
+            self._instrumentation.on_frame(len(data), len(messages), parse_time)
+
+        if self._batcher is not None:
+            for batch in self._batcher.add(messages):
+                await self._enqueue(batch)
+
+            if self._batcher.is_due():
+                await self._flush()
+
+            return
+
+        if not self._as_solo_entries:
+            if messages:
+                await self._enqueue(messages)
+
+            return
+
+        for message in messages:
+            payload = message.payload if self._typed else message["payload"]
+            await self._enqueue(payload)
+
+    async def _consume(self) -> None:
+        while True:
+            received_at, entry = await self._queue.get()
+            self.lag = time.monotonic() - received_at
+            started = time.perf_counter()
+
+            try:
+                result = self._callback(entry)
+
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                self.errors += 1
+                logger.exception("Websocket callback failed")
+            finally:
+                self.processed += 1
+                self._queue.task_done()
+
+                if self._instrumentation is not None:
+                    events = len(entry) if isinstance(entry, list) else 1
+                    duration = time.perf_counter() - started
+                    self._instrumentation.on_callback(events, duration)
+
+    def _get_backoff(self, attempt: int) -> float:
+        # full jitter, see "Exponential Backoff And Jitter" by AWS
+        delay = min(self._max_backoff, self._min_backoff * 2**attempt)
+        return random.uniform(0, delay)
+
+    async def _receive(self) -> None:
+        from websockets.asyncio.client import connect as connect_async
+        from websockets.exceptions import (
+            ConnectionClosed,
+            ConnectionClosedOK,
+            InvalidHandshake,
+        )
+
+        attempt = 0
+
+        while self._running:
+            try:
+                async with connect_async(
+                    self._url,
+                    additional_headers=self._headers,
+                    max_size=self._max_size,
+                    **self._settings,
+                ) as websocket:
+                    self._websocket = websocket
+
+                    while True:
+                        timeout = self._get_timeout()
+
+                        try:
+                            data = await asyncio.wait_for(
+                                websocket.recv(decode=self._decode), timeout
+                            )
+                        except asyncio.TimeoutError:
+                            await self._flush()
+                            continue
+
+                        attempt = 0
+                        await self._process_messages(data)
+            except ConnectionClosedOK:
+                pass
+            except (
+                ConnectionClosed,
+                InvalidHandshake,
+                OSError,
+                asyncio.TimeoutError,
+            ) as e:
+                if self._running and not self._reconnect:
+                    raise
+
+                logger.warning("Websocket disconnected: %r", e)
+            finally:
+                self._websocket = None
+
+            if not self._running or not self._reconnect:
+                break
+
+            await asyncio.sleep(self._get_backoff(attempt))
+            attempt += 1
+            self.reconnects += 1
+
+    async def listen(self) -> None:
+        """Listen for messages from BackpackTF until ``stop`` is called"""
+        self._queue = asyncio.Queue(self._queue_size)
+        self._running = True
+        consumers = [
+            asyncio.create_task(self._consume()) for _ in range(self._consumers)
+        ]
+
+        try:
+            await self._receive()
+
+            if self._batcher is not None:
+                await self._flush()
+
+            await self._queue.join()
+        finally:
+            self._running = False
+
+            for task in consumers:
+                task.cancel()
+
+            await asyncio.gather(*consumers, return_exceptions=True)
+
+    async def stop(self) -> None:
+        """Stop listening and close the socket"""
+        self._running = False
+
+        if self._websocket is not None:
+            await self._websocket.close()
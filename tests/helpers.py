@@ -0,0 +1,27 @@
+STEAM_ID = "76561198253325712"
+
+
+def make_listing(
+    listing_id: str,
+    intent: str = "sell",
+    currencies: dict = None,
+    details: str = "",
+    **fields,
+) -> dict:
+    """Listing as returned by the API"""
+    return {
+        "id": listing_id,
+        "steamid": STEAM_ID,
+        "appid": 440,
+        "currencies": currencies if currencies is not None else {"metal": 1},
+        "value": {},
+        "details": details,
+        "listedAt": 1,
+        "bumpedAt": 1,
+        "intent": intent,
+        "count": 1,
+        "status": "active",
+        "source": "userAgent",
+        "item": {},
+        **fields,
+    }
@@ -1,14 +1,22 @@
+import asyncio
+
 import pytest
-from aiohttp import ClientSession
-from aiohttp.client_exceptions import ClientResponseError
+from aiohttp import ClientSession, RequestInfo
+from aiohttp.client_exceptions import ClientConnectionError, ClientResponseError
+from yarl import URL
 
 from src.backpack_tf import (
     AsyncBackpackTF,
+    Currencies,
+    ItemDocument,
     Listing,
+    ListingError,
     NeedsAPIKey,
     __title__,
     __version__,
+    get_item_hash,
 )
+from tests.helpers import make_listing
 
 user_agent = f"Listing goin' up! | {__title__} v{__version__}"
 listing_id = None
@@ -39,20 +47,20 @@ async def test_create_listing(
     listing = await bptf.create_listing(sku, intent, currencies, details)
 
     assert isinstance(listing, Listing)
-    assert isinstance(listing.item, dict)
-    assert isinstance(listing.currencies, dict)
+    assert isinstance(listing.item, ItemDocument)
+    assert isinstance(listing.currencies, Currencies)
     assert listing.steamid == steam_id
     assert listing.intent == "buy"
     assert listing.appid == 440
     assert listing.listedAt > 0
-    assert listing.currencies == {"metal": 0.11}
+    assert listing.currencies == Currencies(metal=0.11)
     assert listing.details == "my test description"
-    assert listing.item["craftable"]
-    assert listing.item["quality"]["name"] == "Unique"
-    assert listing.item["quality"]["id"] == 6
-    assert listing.item["tradable"]
-    assert listing.item["baseName"] == "Ellis' Cap"
-    assert listing.item["defindex"] == 263
+    assert listing.item.craftable
+    assert listing.item.quality.name == "Unique"
+    assert listing.item.quality.id == 6
+    assert listing.item.tradable
+    assert listing.item.baseName == "Ellis' Cap"
+    assert listing.item.defindex == 263
     assert listing.userAgent["client"] == user_agent
     assert listing.userAgent["lastPulse"] > 0
 
@@ -105,6 +113,242 @@ async def test_get_snapshot(
     assert listings["createdAt"] > 0
 
 
+async def test_get_snapshots() -> None:
+    bptf = AsyncBackpackTF(None, "token", "76561198253325712")
+    attempts = {}
+
+    async def get_snapshot(sku: str) -> dict:
+        attempts[sku] = attempts.get(sku, 0) + 1
+
+        if sku == "broken":
+            raise ValueError(sku)
+
+        return {"sku": sku}
+
+    bptf.get_snapshot = get_snapshot
+    skus = [f"{i};6" for i in range(50)] + ["broken"]
+    results = {}
+
+    async for sku, snapshot in bptf.get_snapshots(skus, concurrency=4):
+        results[sku] = snapshot
+
+    assert len(results) == len(skus)
+    assert results["1;6"] == {"sku": "1;6"}
+    assert isinstance(results["broken"], ValueError)
+    assert attempts["broken"] == 1
+
+    def failing_skus():
+        yield "1;6"
+        raise KeyError("sku")
+
+    # a worker failing must not leave the consumer waiting for it
+    with pytest.raises(KeyError):
+        async for _ in bptf.get_snapshots(failing_skus(), concurrency=4):
+            pass
+
+
+async def test_aiter_listings() -> None:
+    bptf = AsyncBackpackTF(None, "token", "76561198253325712")
+    pages = []
+
+    async def get_listings(skip: int = 0, limit: int = 100) -> dict:
+        pages.append(skip)
+        results = [
+            make_listing(f"440_{i}", listedAt=i, bumpedAt=i)
+            for i in range(skip, min(skip + limit, 250))
+        ]
+        return {"results": results, "cursor": {"skip": skip, "total": 250}}
+
+    bptf.get_listings = get_listings
+    listings = [listing async for listing in bptf.aiter_listings()]
+
+    assert [listing.id for listing in listings] == [f"440_{i}" for i in range(250)]
+    assert pages == [0, 100, 200]
+
+    pages.clear()
+    listings = [listing async for listing in bptf.aiter_listings(50, 75)]
+    assert len(listings) == 75
+    assert pages == [0, 50]
+
+
+async def test_aiter_listings_stops_early() -> None:
+    bptf = AsyncBackpackTF(None, "token", "76561198253325712")
+
+    async def get_listings(skip: int = 0, limit: int = 100) -> dict:
+        await asyncio.sleep(1 if skip else 0)
+        results = [make_listing(f"440_{i}") for i in range(skip, skip + limit)]
+        return {"results": results, "cursor": {"skip": skip, "total": 1000}}
+
+    bptf.get_listings = get_listings
+    listings = bptf.aiter_listings(page_size=10)
+
+    async for _ in listings:
+        break
+
+    await listings.aclose()
+
+    # the prefetch was cancelled and awaited, not left pending
+    assert asyncio.all_tasks() == {asyncio.current_task()}
+
+
+async def test_reconcile_listings() -> None:
+    bptf = AsyncBackpackTF(None, "token", "76561198253325712")
+    live = [make_listing(f"440_{asset_id}") for asset_id in (1, 2)]
+    requests = []
+
+    async def request(method: str, endpoint: str, params: dict = {}, **kwargs):
+        requests.append((method, endpoint))
+
+        if method == "GET":
+            return {"results": live, "cursor": {"total": len(live)}}
+
+        if method == "PATCH":
+            raise ClientConnectionError()
+
+        return {}
+
+    bptf.request = request
+    desired = [
+        {
+            "sku": "263;6",
+            "intent": "sell",
+            "currencies": {"metal": 2},
+            "details": "",
+            "asset_id": 1,
+        }
+    ]
+    result = await bptf.reconcile_listings(desired)
+
+    assert list(result.updated) == ["440_1"]
+    assert list(result.deleted) == ["440_2"]
+    assert result.created == []
+    assert len(result.errors) == 1
+    assert ("DELETE", "/v2/classifieds/listings/440_2") in requests
+
+
+async def test_create_listings() -> None:
+    bptf = AsyncBackpackTF(None, "token", "76561198253325712")
+    batches = []
+    running = [0, 0]
+
+    async def request(method: str, endpoint: str, params: dict = {}, **kwargs):
+        asset_ids = [listing["id"] for listing in kwargs["json"]]
+        batches.append(asset_ids)
+        running[0] += 1
+        running[1] = max(running)
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+
+        if 6 in asset_ids:
+            raise ClientConnectionError("Connection reset")
+
+        # the second listing of the first batch is rejected
+        return [
+            {"error": {"message": "Already listed"}}
+            if asset_id == 1
+            else {"result": make_listing(f"440_{asset_id}")}
+            for asset_id in asset_ids
+        ]
+
+    bptf.request = request
+    listings = [
+        {
+            "sku": "263;6",
+            "intent": "sell" if asset_id != 3 else "trade",
+            "currencies": {"metal": 1},
+            "details": "",
+            "asset_id": asset_id,
+        }
+        for asset_id in range(8)
+    ]
+    results = await bptf.create_listings(listings, batch_size=2, concurrency=2)
+
+    assert sorted(batches) == [[0, 1], [2, 4], [5, 6], [7]]
+    assert running[1] == 2
+    assert [result.id for result in results if isinstance(result, Listing)] == [
+        "440_0",
+        "440_2",
+        "440_4",
+        "440_7",
+    ]
+    assert results[1].message == "Already listed"
+    assert "trade" in results[3].message
+    assert "Connection reset" in results[5].message
+    assert "Connection reset" in results[6].message
+    assert all(isinstance(results[i], ListingError) for i in (1, 3, 5, 6))
+
+
+async def test_reconcile_listings_concurrency() -> None:
+    bptf = AsyncBackpackTF(None, "token", "76561198253325712")
+    live = [make_listing(f"440_{asset_id}") for asset_id in range(4)]
+    running = [0, 0]
+
+    async def request(method: str, endpoint: str, params: dict = {}, **kwargs):
+        if method == "GET":
+            return {"results": live, "cursor": {"total": len(live)}}
+
+        running[0] += 1
+        running[1] = max(running)
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+
+        if method == "POST":
+            return [{"result": make_listing("440_9")} for _ in kwargs["json"]]
+
+        return make_listing(endpoint.rsplit("/", 1)[1])
+
+    bptf.request = request
+    desired = [
+        {
+            "sku": "263;6",
+            "intent": "sell",
+            "currencies": {"metal": 2},
+            "details": "",
+            "asset_id": asset_id,
+        }
+        for asset_id in (0, 1, 5, 6, 7, 8)
+    ]
+    result = await bptf.reconcile_listings(desired, batch_size=1, concurrency=2)
+
+    assert len(result.created) == 4
+    assert list(result.updated) == ["440_0", "440_1"]
+    assert list(result.deleted) == ["440_2", "440_3"]
+    assert result.errors == []
+    # creates, updates and deletes share the bound
+    assert running[1] == 2
+
+
+async def test_delete_listings() -> None:
+    bptf = AsyncBackpackTF(None, "token", "76561198253325712")
+    requests = []
+
+    async def request(method: str, endpoint: str, params: dict = {}, **kwargs):
+        requests.append((method, endpoint))
+
+        if endpoint.endswith("440_2"):
+            info = RequestInfo(URL(endpoint), method, {}, URL(endpoint))
+            raise ClientResponseError(info, (), status=404)
+
+        return {}
+
+    bptf.request = request
+    result = await bptf.delete_listings(["440_1", "440_2", "440_1"])
+
+    assert list(result) == ["440_1", "440_2"]
+    assert result["440_1"] == {}
+    assert isinstance(result["440_2"], ListingError)
+    assert result["440_2"].status == 404
+    assert len(requests) == 2
+
+    result = await bptf.delete_listings_by_asset_id([1, 3])
+    assert result == {1: {}, 3: {}}
+
+    result = await bptf.delete_listings_by_item_name(["Ellis' Cap"])
+    item_hash = get_item_hash("Ellis' Cap")
+    assert requests[-1][1].endswith(f"440_76561198253325712_{item_hash}")
+    assert list(result) == ["Ellis' Cap"]
+
+
 async def test_is_banned(
     aiohttp_session: ClientSession,
     backpack_tf_token: str,
@@ -1,15 +1,24 @@
+import time
+from threading import Lock
+
 import pytest
-from requests.exceptions import HTTPError
+from requests import Response
+from requests.exceptions import ConnectionError, HTTPError
 
 from src.backpack_tf import (
     BackpackTF,
+    Currencies,
+    ItemDocument,
     Listing,
+    ListingError,
     NeedsAPIKey,
+    ResponseCache,
     __title__,
     __version__,
     construct_listing,
     construct_listing_item,
 )
+from tests.helpers import make_listing
 
 bptf = None
 user_agent = f"Listing goin' up! | {__title__} v{__version__}"
@@ -21,6 +30,177 @@ def test_initiate_backpack_tf(backpack_tf_token: str, steam_id: str) -> None:
     bptf = BackpackTF(backpack_tf_token, steam_id)
 
 
+def test_session_pool() -> None:
+    with BackpackTF("token", "76561198253325712", pool_size=4) as client:
+        adapter = client._session.get_adapter("https://api.backpack.tf")
+        assert adapter._pool_maxsize == 4
+
+    assert not adapter.poolmanager.pools
+
+
+def test_are_banned() -> None:
+    client = BackpackTF("token", "76561198253325712", "key", cache=ResponseCache())
+    requested = []
+
+    def request(method: str, endpoint: str, params: dict = {}, **kwargs) -> dict:
+        steam_ids = params["steamids"].split(",")
+        requested.append(steam_ids)
+        bans = {"all": {"reason": "scammer"}}
+        return {
+            "users": {
+                steam_id: {"bans": bans} if steam_id.endswith("1") else {}
+                for steam_id in steam_ids
+            }
+        }
+
+    client.request = request
+    steam_ids = [76561198000000000 + i for i in range(250)]
+    banned = client.are_banned(steam_ids)
+
+    assert sorted(len(batch) for batch in requested) == [50, 100, 100]
+    assert banned["76561198000000001"]
+    assert not banned["76561198000000000"]
+    assert len(banned) == 250
+
+    assert client.are_banned(steam_ids[:10]) == dict(list(banned.items())[:10])
+    assert client.is_banned(steam_ids[1])
+    assert len(requested) == 3
+
+
+def test_iter_listings() -> None:
+    client = BackpackTF("token", "76561198253325712")
+    pages = []
+
+    def get_listings(skip: int = 0, limit: int = 100) -> dict:
+        pages.append(skip)
+        results = [
+            make_listing(f"440_{i}", listedAt=i, bumpedAt=i)
+            for i in range(skip, min(skip + limit, 250))
+        ]
+        return {"results": results, "cursor": {"skip": skip, "total": 250}}
+
+    client.get_listings = get_listings
+    listings = list(client.iter_listings())
+
+    assert [listing.id for listing in listings] == [f"440_{i}" for i in range(250)]
+    assert pages == [0, 100, 200]
+
+    pages.clear()
+    assert len(list(client.iter_listings(max_listings=120))) == 120
+    assert pages == [0, 100]
+
+    pages.clear()
+
+    for listing in client.iter_listings(page_size=10):
+        if listing.id == "440_5":
+            break
+
+    # at most the prefetched page was requested
+    assert pages in ([0], [0, 10])
+
+
+def test_iter_listings_stops_early() -> None:
+    client = BackpackTF("token", "76561198253325712")
+
+    def get_listings(skip: int = 0, limit: int = 100) -> dict:
+        if skip:
+            time.sleep(0.5)
+
+        results = [make_listing(f"440_{i}") for i in range(skip, skip + limit)]
+        return {"results": results, "cursor": {"skip": skip, "total": 1000}}
+
+    client.get_listings = get_listings
+    started = time.perf_counter()
+
+    for _ in client.iter_listings(page_size=10):
+        # the next page is being requested by now
+        time.sleep(0.05)
+        break
+
+    # the prefetched page is not waited for
+    assert time.perf_counter() - started < 0.3
+
+
+def test_delete_listings() -> None:
+    client = BackpackTF("token", "76561198253325712")
+    deleted = []
+
+    def delete_listing(listing_id: str) -> dict:
+        if listing_id == "440_2":
+            response = Response()
+            response.status_code = 404
+            raise HTTPError("Not found", response=response)
+
+        deleted.append(listing_id)
+        return {}
+
+    client.delete_listing = delete_listing
+    result = client.delete_listings_by_asset_id([1, 2, 3])
+
+    assert sorted(deleted) == ["440_1", "440_3"]
+    assert result[1] == {}
+    assert result[2].status == 404
+    assert list(result) == [1, 2, 3]
+
+
+def test_create_listings() -> None:
+    client = BackpackTF("token", "76561198253325712")
+    lock = Lock()
+    batches = []
+    running = [0, 0]
+
+    def request(method: str, endpoint: str, params: dict = {}, **kwargs) -> list:
+        asset_ids = [listing["id"] for listing in kwargs["json"]]
+
+        with lock:
+            batches.append(asset_ids)
+            running[0] += 1
+            running[1] = max(running)
+
+        time.sleep(0.02)
+
+        with lock:
+            running[0] -= 1
+
+        if 6 in asset_ids:
+            raise ConnectionError("Connection reset")
+
+        # the second listing of the first batch is rejected
+        return [
+            {"error": {"message": "Already listed"}}
+            if asset_id == 1
+            else {"result": make_listing(f"440_{asset_id}")}
+            for asset_id in asset_ids
+        ]
+
+    client.request = request
+    listings = [
+        {
+            "sku": "263;6",
+            "intent": "sell" if asset_id != 3 else "trade",
+            "currencies": {"metal": 1},
+            "details": "",
+            "asset_id": asset_id,
+        }
+        for asset_id in range(8)
+    ]
+    results = client.create_listings(listings, batch_size=2, concurrency=2)
+
+    assert sorted(batches) == [[0, 1], [2, 4], [5, 6], [7]]
+    assert running[1] == 2
+    assert [result.id for result in results if isinstance(result, Listing)] == [
+        "440_0",
+        "440_2",
+        "440_4",
+        "440_7",
+    ]
+    assert results[1].message == "Already listed"
+    assert "trade" in results[3].message
+    assert "Connection reset" in results[5].message
+    assert "Connection reset" in results[6].message
+    assert all(isinstance(results[i], ListingError) for i in (1, 3, 5, 6))
+
+
 def test_construct_listing_item() -> None:
     assert construct_listing_item("263;6") == {
         "baseName": "Ellis' Cap",
@@ -85,20 +265,20 @@ def test_create_listing(steam_id: str) -> None:
     )
 
     assert isinstance(listing, Listing)
-    assert isinstance(listing.item, dict)
-    assert isinstance(listing.currencies, dict)
+    assert isinstance(listing.item, ItemDocument)
+    assert isinstance(listing.currencies, Currencies)
     assert listing.steamid == steam_id
     assert listing.intent == "buy"
     assert listing.appid == 440
     assert listing.listedAt > 0
-    assert listing.currencies == {"metal": 0.11}
+    assert listing.currencies == Currencies(metal=0.11)
     assert listing.details == "my test description"
-    assert listing.item["craftable"]
-    assert listing.item["quality"]["name"] == "Unique"
-    assert listing.item["quality"]["id"] == 6
-    assert listing.item["tradable"]
-    assert listing.item["baseName"] == "Ellis' Cap"
-    assert listing.item["defindex"] == 263
+    assert listing.item.craftable
+    assert listing.item.quality.name == "Unique"
+    assert listing.item.quality.id == 6
+    assert listing.item.tradable
+    assert listing.item.baseName == "Ellis' Cap"
+    assert listing.item.defindex == 263
     assert listing.userAgent["client"] == user_agent
     assert listing.userAgent["lastPulse"] > 0
 
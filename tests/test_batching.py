@@ -0,0 +1,98 @@
+import asyncio
+import json
+import time
+
+from websockets.asyncio.server import serve
+
+from src.backpack_tf import AsyncBackpackTFWebsocket, BackpackTFWebsocket, MicroBatcher
+
+
+def make_event(listing_id: str, bumped_at: int = 0) -> dict:
+    return {
+        "event": "listing-update",
+        "payload": {"id": listing_id, "bumpedAt": bumped_at},
+    }
+
+
+def get_ids(batch: list) -> list[str]:
+    return [event["payload"]["id"] for event in batch]
+
+
+def test_batcher() -> None:
+    batcher = MicroBatcher(max_size=3, max_latency=0.05)
+
+    assert batcher.time_left() is None
+    assert batcher.add([make_event("440_1"), make_event("440_2")]) == []
+    assert not batcher.is_due()
+
+    full = batcher.add([make_event("440_3"), make_event("440_4")])
+
+    assert [get_ids(batch) for batch in full] == [["440_1", "440_2", "440_3"]]
+    assert len(batcher) == 1
+
+    time.sleep(0.05)
+
+    assert batcher.is_due()
+    assert batcher.time_left() == 0
+    assert get_ids(batcher.flush()) == ["440_4"]
+    assert batcher.flush() == []
+    assert batcher.batches == 2
+
+
+def test_coalesce() -> None:
+    batcher = MicroBatcher(max_size=3, coalesce=True)
+    events = [make_event(f"440_{i % 2}", i) for i in range(5)]
+    events.append(make_event("440_2"))
+
+    assert batcher.add(events[:5]) == []
+    assert batcher.coalesced == 3
+
+    batch = batcher.add(events[5:])[0]
+
+    assert get_ids(batch) == ["440_1", "440_0", "440_2"]
+    assert batch[1]["payload"]["bumpedAt"] == 4
+
+
+def test_websocket_batches() -> None:
+    batches = []
+    socket = BackpackTFWebsocket(batches.append, batch_size=2, batch_latency=60)
+    frame = json.dumps([make_event("440_1"), make_event("440_2"), make_event("440_3")])
+
+    socket._process_messages(frame)
+    assert [get_ids(batch) for batch in batches] == [["440_1", "440_2"]]
+
+    socket._flush()
+    assert get_ids(batches[-1]) == ["440_3"]
+
+
+async def test_async_websocket_flushes_after_latency() -> None:
+    batches = []
+
+    async def handler(websocket) -> None:
+        await websocket.send(json.dumps([make_event("440_1"), make_event("440_1")]))
+        await asyncio.sleep(0.3)
+        await websocket.send(json.dumps([make_event("440_2")]))
+        await websocket.wait_closed()
+
+    async def callback(batch: list) -> None:
+        batches.append((time.monotonic(), get_ids(batch)))
+
+        if len(batches) == 2:
+            await socket.stop()
+
+    async with serve(handler, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        socket = AsyncBackpackTFWebsocket(
+            callback,
+            batch_size=10,
+            batch_latency=0.05,
+            coalesce=True,
+            url=f"ws://127.0.0.1:{port}",
+        )
+        started = time.monotonic()
+        await asyncio.wait_for(socket.listen(), 5)
+
+    # the first batch did not wait for the second frame
+    assert batches[0][0] - started < 0.25
+    assert [ids for _, ids in batches] == [["440_1"], ["440_2"]]
+    assert socket.stats["coalesced"] == 1
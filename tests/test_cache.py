@@ -0,0 +1,131 @@
+import asyncio
+import time
+from threading import Thread
+
+import pytest
+
+from src.backpack_tf import ResponseCache
+
+
+def test_ttl() -> None:
+    cache = ResponseCache({"snapshot": 0.05})
+    cache.set("snapshot", "263;6", {"listings": []})
+
+    assert cache.get("snapshot", "263;6") == (True, {"listings": []})
+
+    time.sleep(0.06)
+
+    assert cache.get("snapshot", "263;6") == (False, None)
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 1
+
+
+def test_lru_eviction() -> None:
+    cache = ResponseCache(max_entries=2)
+    cache.set("listing", "a", 1)
+    cache.set("listing", "b", 2)
+    cache.get("listing", "a")
+    cache.set("listing", "c", 3)
+
+    assert cache.get("listing", "b") == (False, None)
+    assert cache.get("listing", "a") == (True, 1)
+    assert cache.evictions == 1
+
+
+def test_max_bytes() -> None:
+    cache = ResponseCache(max_bytes=20)
+    cache.set("listing", "a", "x" * 10)
+    cache.set("listing", "b", "x" * 10)
+
+    assert len(cache) == 1
+    assert cache.size == 12
+
+
+def test_invalidate() -> None:
+    cache = ResponseCache()
+    cache.set("listing", "a", 1)
+    cache.set("snapshot", "a", 1)
+    cache.invalidate("listing")
+
+    assert cache.get("listing", "a") == (False, None)
+    assert cache.get("snapshot", "a") == (True, 1)
+
+
+def test_coalescing() -> None:
+    cache = ResponseCache()
+    calls = []
+
+    def fetch() -> dict:
+        calls.append(1)
+        time.sleep(0.05)
+        return {"users": {}}
+
+    threads = [
+        Thread(target=cache.get_or_fetch, args=("users_info", "1", fetch))
+        for _ in range(5)
+    ]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert cache.get_or_fetch("users_info", "1", fetch) == {"users": {}}
+    assert len(calls) == 1
+
+
+async def test_async_coalescing() -> None:
+    cache = ResponseCache()
+    calls = []
+
+    async def fetch() -> dict:
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"sku": "263;6"}
+
+    results = await asyncio.gather(
+        *[cache.get_or_fetch_async("snapshot", "263;6", fetch) for _ in range(5)]
+    )
+
+    assert len(calls) == 1
+    assert all(result == {"sku": "263;6"} for result in results)
+
+
+async def test_async_errors_are_not_cached() -> None:
+    cache = ResponseCache()
+
+    async def fetch() -> dict:
+        raise ValueError("failed")
+
+    with pytest.raises(ValueError):
+        await cache.get_or_fetch_async("snapshot", "263;6", fetch)
+
+    assert cache.get("snapshot", "263;6") == (False, None)
+
+
+async def test_async_owner_cancelled() -> None:
+    cache = ResponseCache()
+    calls = []
+
+    async def fetch() -> dict:
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"sku": "263;6"}
+
+    owner = asyncio.create_task(cache.get_or_fetch_async("snapshot", "263;6", fetch))
+    await asyncio.sleep(0)
+    waiters = [
+        asyncio.create_task(cache.get_or_fetch_async("snapshot", "263;6", fetch))
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    owner.cancel()
+
+    # a waiter takes over the fetch instead of being cancelled as well
+    results = await asyncio.gather(*waiters)
+
+    assert owner.cancelled()
+    assert len(calls) == 2
+    assert all(result == {"sku": "263;6"} for result in results)
@@ -1,7 +1,45 @@
-from src.backpack_tf import Currencies
+from dataclasses import asdict
+
+from src.backpack_tf import Currencies, Entity, ItemDocument, Listing, User
 
 
 def test_currencies() -> None:
-    assert Currencies().__dict__ == {"keys": 0, "metal": 0.0}
-    assert Currencies(1, 1.5).__dict__ == {"keys": 1, "metal": 1.5}
-    assert Currencies(**{"metal": 10.55}).__dict__ == {"keys": 0, "metal": 10.55}
+    assert asdict(Currencies()) == {"keys": 0, "metal": 0.0}
+    assert asdict(Currencies(1, 1.5)) == {"keys": 1, "metal": 1.5}
+    assert asdict(Currencies(**{"metal": 10.55})) == {"keys": 0, "metal": 10.55}
+    assert Currencies.from_dict({"metal": 0.11}) == Currencies(0, 0.11)
+
+
+def test_listing_from_dict() -> None:
+    listing = Listing.from_dict(
+        {
+            "id": "440_76561198253325712_9e89a4a85aae68266ec992c22b0d52e2",
+            "steamid": "76561198253325712",
+            "appid": 440,
+            "currencies": {"metal": 0.11},
+            "value": {"raw": 0.11},
+            "details": "my test description",
+            "listedAt": 1700000000,
+            "bumpedAt": 1700000000,
+            "intent": "buy",
+            "count": 1,
+            "status": "active",
+            "source": "userAgent",
+            "item": {
+                "baseName": "Ellis' Cap",
+                "defindex": 263,
+                "quality": {"id": 6, "name": "Unique", "color": "#FFD700"},
+                "particle": {"id": 13},
+            },
+            "user": {"id": "76561198253325712", "tradeOfferUrl": "url"},
+            "promoted": False,
+        }
+    )
+
+    assert listing.currencies == Currencies(metal=0.11)
+    assert isinstance(listing.item, ItemDocument)
+    assert listing.item.quality == Entity("Unique", 6, "#FFD700")
+    assert listing.item.extra == {"particle": {"id": 13}}
+    assert listing.user == User(id="76561198253325712", tradeOfferUrl="url")
+    assert listing.extra == {"promoted": False}
+    assert not hasattr(listing, "__dict__")
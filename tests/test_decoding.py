@@ -0,0 +1,21 @@
+import json
+
+import pytest
+
+from src.backpack_tf.decoding import DECODERS, get_decoder
+
+
+def test_decoders() -> None:
+    frame = '[{"event": "listing-update", "payload": {"id": "440_1"}}]'
+
+    for loads in DECODERS.values():
+        assert loads(frame) == loads(frame.encode()) == json.loads(frame)
+
+
+def test_get_decoder() -> None:
+    assert get_decoder("json") is json.loads
+    assert get_decoder(len) is len
+    assert get_decoder() in DECODERS.values()
+
+    with pytest.raises(ValueError):
+        get_decoder("yaml")
@@ -0,0 +1,103 @@
+import importlib
+import json
+import sys
+
+from src.backpack_tf import BackpackTFWebsocket, ListingPayload, decode_events, events
+
+FRAME = json.dumps(
+    [
+        {
+            "id": "65a1",
+            "event": "listing-update",
+            "payload": {
+                "id": "440_76561198253325712_9e89a4a85aae68266ec992c22b0d52e2",
+                "steamid": "76561198253325712",
+                "appid": 440,
+                "currencies": {"keys": 1, "metal": 1.55},
+                "intent": "buy",
+                "listedAt": 1700000000,
+                "bumpedAt": 1700000100,
+                "value": {"raw": 71.55},
+                "details": "",
+                "count": 1,
+                "status": "active",
+                "source": "userAgent",
+                "item": {"baseName": "Ellis' Cap", "quality": {"id": 6}},
+                "user": {"tradeOfferUrl": "https://steamcommunity.com/tradeoffer"},
+            },
+        },
+        {"id": "65a2", "event": "listing-delete", "payload": {"id": "440_1"}},
+    ]
+).encode()
+
+
+def test_decode_events() -> None:
+    update, delete = decode_events(FRAME)
+    payload = update.payload
+
+    assert update.event == "listing-update"
+    assert isinstance(payload, ListingPayload)
+    assert payload.steamid == "76561198253325712"
+    assert payload.currencies == {"keys": 1, "metal": 1.55}
+    assert payload.bumpedAt == 1700000100
+    assert payload.item["baseName"] == "Ellis' Cap"
+    assert payload.user["tradeOfferUrl"] == "https://steamcommunity.com/tradeoffer"
+    assert payload.userAgent == {}
+    assert not hasattr(payload, "__dict__")
+
+    listing = payload.to_listing()
+
+    assert listing.item.baseName == "Ellis' Cap"
+    assert listing.currencies.keys == 1
+    assert listing.user.tradeOfferUrl == "https://steamcommunity.com/tradeoffer"
+
+    assert delete.event == "listing-delete"
+    assert delete.payload.id == "440_1"
+    assert delete.payload.item == {}
+
+
+def test_typed_websocket() -> None:
+    payloads = []
+    socket = BackpackTFWebsocket(payloads.append, typed=True)
+    socket._process_messages(FRAME)
+
+    assert [payload.id for payload in payloads][1] == "440_1"
+    assert all(isinstance(payload, ListingPayload) for payload in payloads)
+
+
+def test_typed_websocket_invalid_frame() -> None:
+    payloads = []
+    socket = BackpackTFWebsocket(payloads.append, typed=True)
+
+    # the listing id should be a string
+    socket._process_messages(
+        b'[{"id": "1", "event": "listing-update", "payload": {"id": 1}}]'
+    )
+    socket._process_messages(FRAME)
+
+    assert socket.invalid_frames == 1
+    assert [payload.id for payload in payloads][1] == "440_1"
+
+
+def test_decode_events_without_msgspec(monkeypatch) -> None:
+    monkeypatch.setitem(sys.modules, "msgspec", None)
+
+    try:
+        fallback = importlib.reload(events)
+        update, delete = fallback.decode_events(FRAME)
+        payload = update.payload
+
+        assert fallback.msgspec is None
+        assert isinstance(payload, fallback.ListingPayload)
+        assert payload.currencies == {"keys": 1, "metal": 1.55}
+        assert payload.item["baseName"] == "Ellis' Cap"
+        assert payload.userAgent == {}
+        assert not hasattr(payload, "__dict__")
+        assert payload.to_listing().user.tradeOfferUrl == (
+            "https://steamcommunity.com/tradeoffer"
+        )
+        assert delete.payload.id == "440_1"
+        assert delete.payload.item == {}
+    finally:
+        monkeypatch.undo()
+        importlib.reload(events)
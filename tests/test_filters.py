@@ -0,0 +1,92 @@
+import json
+
+from src.backpack_tf import BackpackTFWebsocket, EventFilter, decode_events
+from src.backpack_tf.filters import FilteredDecoder, filter_events
+
+
+def make_event(index: int, name: str, intent: str = "sell", price: float = 10.0):
+    return {
+        "id": str(index),
+        "event": "listing-update" if index % 5 else "listing-delete",
+        "payload": {
+            "id": f"440_{index}",
+            "steamid": str(76561198000000000 + index % 3),
+            "intent": intent,
+            "value": {"raw": price},
+            "currencies": {"metal": price},
+            "item": {"name": name},
+        },
+    }
+
+
+EVENTS = [
+    make_event(1, "Team Captain", "sell", 5.0),
+    make_event(2, "Team Captain", "buy", 4.0),
+    make_event(3, "Ellis' Cap", "sell", 12.0),
+    make_event(4, "Strange Part: Kills", "buy", 20.0),
+    make_event(5, "Team Captain", "sell", 6.0),
+]
+FRAME = json.dumps(EVENTS).encode()
+
+
+def get_ids(events: list) -> list[str]:
+    return [event["payload"]["id"] for event in events]
+
+
+def test_predicate() -> None:
+    assert get_ids(filter_events(EVENTS, EventFilter())) == get_ids(EVENTS)
+
+    event_filter = EventFilter(items={"Team Captain"}, intents={"sell"})
+    assert get_ids(filter_events(EVENTS, event_filter)) == ["440_1", "440_5"]
+
+    event_filter = EventFilter(events={"listing-update"}, min_price=5, max_price=15)
+    assert get_ids(filter_events(EVENTS, event_filter)) == ["440_1", "440_3"]
+
+    event_filter = EventFilter(steamids={"76561198000000001"})
+    assert get_ids(filter_events(EVENTS, event_filter)) == ["440_1", "440_4"]
+
+    # typed events are filtered the same way
+    event_filter = EventFilter(intents={"buy"})
+    assert [
+        e.payload.id for e in filter_events(decode_events(FRAME), event_filter)
+    ] == [
+        "440_2",
+        "440_4",
+    ]
+
+
+def test_filtered_decoder() -> None:
+    loads = FilteredDecoder(EventFilter(items={"Ellis' Cap"}), json.loads)
+
+    assert get_ids(loads(FRAME)) == ["440_3"]
+    assert loads.stats == {
+        "frames": 1,
+        "skipped_frames": 0,
+        "events": 5,
+        "dropped": 4,
+    }
+
+    # frames without any of the items are not decoded at all
+    assert loads(json.dumps(EVENTS[:2])) == []
+    assert loads.skipped_frames == 1
+
+    # escaped slashes still match
+    loads = FilteredDecoder(EventFilter(items={"A/B"}), json.loads)
+    frame = json.dumps([make_event(6, "A/B")]).replace("/", "\\/")
+    assert get_ids(loads(frame)) == ["440_6"]
+
+    loads = FilteredDecoder(EventFilter(intents={"buy"}), decode_events)
+    assert [event.payload.id for event in loads(FRAME)] == ["440_2", "440_4"]
+
+
+def test_websocket_filter() -> None:
+    received = []
+    socket = BackpackTFWebsocket(
+        received.append,
+        as_solo_entries=False,
+        event_filter=EventFilter(intents={"buy"}, max_price=10),
+    )
+    socket._process_messages(FRAME)
+    socket._process_messages(json.dumps(EVENTS[2:3]))
+
+    assert [get_ids(events) for events in received] == [["440_2"]]
@@ -0,0 +1,66 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+HEAVY_MODULES = {"requests", "aiohttp", "websockets", "tf2_utils"}
+
+
+def imported_modules(code: str) -> set[str]:
+    """Names of every module loaded after running ``code``"""
+    result = subprocess.run(
+        [sys.executable, "-c", f"{code}; import sys; print(*sys.modules)"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(result.stdout.split())
+
+
+def test_import_is_lazy() -> None:
+    modules = imported_modules(
+        "import src.backpack_tf as bptf; bptf.get_item_hash('Team Captain')"
+    )
+    package = {module for module in modules if module.startswith("src.backpack_tf")}
+
+    assert not HEAVY_MODULES & modules
+    assert package == {
+        "src.backpack_tf",
+        "src.backpack_tf.classes",
+        "src.backpack_tf.exceptions",
+        "src.backpack_tf.utils",
+    }
+
+
+def test_client_imports() -> None:
+    modules = imported_modules(
+        "from src.backpack_tf import BackpackTF, AsyncBackpackTF"
+    )
+    assert not HEAVY_MODULES & modules
+
+    modules = imported_modules("from src.backpack_tf import Listing, OrderBook")
+    assert not HEAVY_MODULES & modules
+
+
+def test_lazy_attributes() -> None:
+    import src.backpack_tf as bptf
+
+    assert bptf.BackpackTF.__name__ == "BackpackTF"
+    assert "BackpackTF" in dir(bptf)
+    assert issubclass(bptf.UserNotFound, bptf.BackpackTFException)
+
+    with pytest.raises(AttributeError):
+        bptf.NotAThing
+
+
+def test_star_import() -> None:
+    namespace = {}
+    exec("from src.backpack_tf import *", namespace)
+
+    assert namespace["BackpackTF"].__name__ == "BackpackTF"
+    assert namespace["BackpackTFWebsocket"].__name__ == "BackpackTFWebsocket"
+    assert issubclass(namespace["UserNotFound"], namespace["BackpackTFException"])
+    assert "import_module" not in namespace
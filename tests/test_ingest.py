@@ -0,0 +1,93 @@
+import json
+from functools import partial
+from multiprocessing import Queue
+
+from src.backpack_tf import ShardedBackpackTFWebsocket
+from src.backpack_tf.ingest import get_shard, split_frame
+
+ITEMS = ["Team Captain", "Ellis' Cap", "Siberian Sweater", "Refined Metal"]
+
+
+def make_frame(start: int, count: int) -> bytes:
+    events = [
+        {
+            "id": str(i),
+            "event": "listing-update",
+            "payload": {"id": f"440_{i}", "item": {"name": ITEMS[i % len(ITEMS)]}},
+        }
+        for i in range(start, start + count)
+    ]
+    return json.dumps(events).encode()
+
+
+def record(queue: Queue, payload: dict) -> None:
+    queue.put((payload["item"]["name"], payload["id"]))
+
+
+def record_id(queue: Queue, payload) -> None:
+    queue.put(payload.id)
+
+
+def test_split_frame() -> None:
+    routed = split_frame(make_frame(0, 20), 3)
+
+    assert sum(map(len, routed)) == 20
+
+    for shard, events in enumerate(routed):
+        events = [json.loads(bytes(event)) for event in events]
+
+        for event in events:
+            assert get_shard(event["payload"]["item"]["name"], 3) == shard
+
+        ids = [int(event["id"]) for event in events]
+        assert ids == sorted(ids)
+
+    # events without an item go to the shard of ""
+    routed = split_frame(b'[{"event": "listing-delete", "payload": {}}]', 3)
+    assert len(routed[get_shard("", 3)]) == 1
+
+
+def test_workers_keep_item_order() -> None:
+    queue = Queue()
+
+    with ShardedBackpackTFWebsocket(partial(record, queue), workers=2) as socket:
+        for start in range(0, 100, 10):
+            socket.feed(make_frame(start, 10))
+
+    received = [queue.get(timeout=5) for _ in range(100)]
+
+    for name in ITEMS:
+        ids = [int(i[4:]) for item, i in received if item == name]
+        assert ids == sorted(ids)
+        assert len(ids) == 25
+
+    assert socket.stats["events"] == 100
+    assert sum(socket.stats["processed"]) == 100
+    assert socket.stats["routed"] == socket.stats["processed"]
+
+
+def test_workers_skip_invalid_frames() -> None:
+    queue = Queue()
+    # the listing id should be a string
+    invalid = b'[{"id": "1", "event": "listing-update", "payload": {"id": 1}}]'
+
+    with ShardedBackpackTFWebsocket(
+        partial(record_id, queue), workers=1, typed=True
+    ) as socket:
+        socket.feed(invalid)
+        socket.feed(make_frame(0, 2))
+
+    assert [queue.get(timeout=5) for _ in range(2)] == ["440_0", "440_1"]
+    assert socket.stats["invalid_frames"] == [1]
+
+
+def test_close_with_dead_worker() -> None:
+    socket = ShardedBackpackTFWebsocket(print, workers=2)
+    socket.start()
+    processes = list(socket._processes)
+    processes[0].kill()
+    processes[0].join(5)
+
+    socket.close(timeout=5)
+
+    assert not any(process.is_alive() for process in processes)
@@ -0,0 +1,299 @@
+import copy
+import json
+import sys
+from types import ModuleType, SimpleNamespace
+
+import pytest
+import requests
+
+from src.backpack_tf import (
+    BackpackTF,
+    BackpackTFWebsocket,
+    CircuitBreaker,
+    CircuitOpen,
+    MetricsRecorder,
+    OpenTelemetryInstrumentation,
+    PrometheusInstrumentation,
+    ResponseCache,
+    RetryPolicy,
+)
+from src.backpack_tf.instrumentation import Histogram, get_endpoint_label
+
+
+class FakeSession:
+    def __init__(self, *statuses: int) -> None:
+        self.statuses = list(statuses)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        response = requests.Response()
+        response.status_code = self.statuses.pop(0) if self.statuses else 200
+        response._content = b'{"id": "440_1"}'
+        response.request = requests.Request(method, url, json=kwargs.get("json"))
+        response.request = response.request.prepare()
+        return response
+
+
+def test_get_endpoint_label() -> None:
+    assert get_endpoint_label("/v2/classifieds/listings/440_123") == (
+        "/v2/classifieds/listings/{id}"
+    )
+    assert get_endpoint_label("/v2/classifieds/listings/440_76561198_abc/x") == (
+        "/v2/classifieds/listings/{id}/x"
+    )
+    assert get_endpoint_label("/users/info/v1") == "/users/info/v1"
+
+
+def test_histogram() -> None:
+    histogram = Histogram((1, 2, 5))
+
+    for value in (0.5, 1.5, 1.5, 4, 10):
+        histogram.observe(value)
+
+    assert histogram.counts == [1, 2, 1, 1]
+    assert histogram.quantile(0.5) == 2
+    assert histogram.quantile(1.0) == float("inf")
+    assert histogram.to_dict()["sum"] == 17.5
+
+
+def test_client_metrics() -> None:
+    metrics = MetricsRecorder()
+    cache = ResponseCache(instrumentation=metrics)
+    client = BackpackTF(
+        "token",
+        "76561198253325712",
+        session=FakeSession(),
+        cache=cache,
+        instrumentation=metrics,
+    )
+
+    client.get_listing("440_1")
+    client.get_listing("440_1")
+    client.request("PATCH", "/v2/classifieds/listings/440_1", json={"details": "hi"})
+
+    snapshot = metrics.snapshot()
+    counters = snapshot["counters"]
+    endpoint = "/v2/classifieds/listings/{id}"
+
+    assert counters["requests", "GET", endpoint, 200] == 1
+    assert counters["requests", "PATCH", endpoint, 200] == 1
+    assert counters["bytes_sent", "PATCH", endpoint] == len(b'{"details": "hi"}')
+    assert counters["bytes_received", "GET", endpoint] == 15
+    assert counters["cache_hits", "listing"] == 1
+    assert counters["cache_misses", "listing"] == 1
+    assert snapshot["latency"][f"GET {endpoint}"]["count"] == 1
+
+
+def test_retry_metrics() -> None:
+    metrics = MetricsRecorder()
+    breaker = CircuitBreaker(failure_threshold=1, instrumentation=metrics)
+    policy = RetryPolicy(min_backoff=0, breaker=breaker, instrumentation=metrics)
+    client = BackpackTF(
+        "token",
+        "76561198253325712",
+        session=FakeSession(502, 200),
+        retry_policy=policy,
+        instrumentation=metrics,
+    )
+
+    # the first failure opens the circuit, so the retry is rejected
+    with pytest.raises(CircuitOpen):
+        client.get_listings()
+
+    counters = metrics.snapshot()["counters"]
+
+    assert counters["requests", "GET", "/v2/classifieds/listings", 502] == 1
+    assert counters["retries", "GET", "/v2/classifieds/listings"] == 1
+    assert counters["breaker", "open"] == 1
+    assert metrics.breaker_state == "open"
+
+
+def test_websocket_metrics() -> None:
+    metrics = MetricsRecorder()
+    received = []
+    frame = json.dumps(
+        [{"event": "listing-update", "payload": {"id": f"440_{i}"}} for i in range(3)]
+    )
+    socket = BackpackTFWebsocket(received.append, instrumentation=metrics)
+    socket._process_messages(frame)
+
+    snapshot = metrics.snapshot()
+
+    assert len(received) == 3
+    assert snapshot["counters"]["frames"] == 1
+    assert snapshot["counters"]["events"] == 3
+    assert snapshot["frame_sizes"]["sum"] == len(frame)
+    assert snapshot["callback_time"]["count"] == 1
+
+
+def drive(metrics) -> None:
+    """Send a cached request, a retried request and a websocket frame
+    through ``metrics``"""
+    policy = RetryPolicy(min_backoff=0, instrumentation=metrics)
+    client = BackpackTF(
+        "token",
+        "76561198253325712",
+        session=FakeSession(502, 200),
+        cache=ResponseCache(instrumentation=metrics),
+        retry_policy=policy,
+        instrumentation=metrics,
+    )
+    client.get_listings()
+    client.get_listing("440_1")
+    client.get_listing("440_1")
+
+    frame = json.dumps(
+        [{"event": "listing-update", "payload": {"id": f"440_{i}"}} for i in range(3)]
+    )
+    socket = BackpackTFWebsocket(lambda payload: None, instrumentation=metrics)
+    socket._process_messages(frame)
+
+
+class FakeRegistry:
+    def __init__(self) -> None:
+        self.metrics = {}
+
+
+class FakeMetric:
+    """Stands in for the Counter, Gauge and Histogram of prometheus_client"""
+
+    def __init__(
+        self, name: str, documentation: str, labelnames=(), registry=None, **kwargs
+    ) -> None:
+        self.labelnames = tuple(labelnames)
+        self.samples = {}
+        self._key = ()
+        registry.metrics[name] = self
+
+    def labels(self, *values: str) -> "FakeMetric":
+        assert len(values) == len(self.labelnames)
+        child = copy.copy(self)
+        child._key = values
+        return child
+
+    def inc(self, amount: float = 1) -> None:
+        self.samples.setdefault(self._key, []).append(amount)
+
+    observe = set = inc
+
+
+def test_prometheus_instrumentation(monkeypatch) -> None:
+    prometheus_client = ModuleType("prometheus_client")
+    prometheus_client.REGISTRY = FakeRegistry()
+    prometheus_client.Counter = FakeMetric
+    prometheus_client.Gauge = FakeMetric
+    prometheus_client.Histogram = FakeMetric
+    monkeypatch.setitem(sys.modules, "prometheus_client", prometheus_client)
+
+    registry = FakeRegistry()
+    drive(PrometheusInstrumentation(registry))
+    metrics = registry.metrics
+    listings = ("GET", "/v2/classifieds/listings")
+    listing = ("GET", "/v2/classifieds/listings/{id}")
+
+    assert not prometheus_client.REGISTRY.metrics
+    assert set(metrics["bptf_request_duration_seconds"].samples) == {
+        (*listings, "502"),
+        (*listings, "200"),
+        (*listing, "200"),
+    }
+    assert metrics["bptf_request_retries"].samples == {(*listings, "502"): [1]}
+    assert metrics["bptf_response_received_bytes"].samples[listing] == [15]
+    assert metrics["bptf_cache_lookups"].samples == {
+        ("listing", "miss"): [1],
+        ("listing", "hit"): [1],
+    }
+    assert metrics["bptf_websocket_frames"].samples == {(): [1]}
+    assert metrics["bptf_websocket_events"].samples == {(): [3]}
+    assert len(metrics["bptf_websocket_callback_seconds"].samples[()]) == 1
+
+
+class FakeSpan:
+    def __init__(self, name: str, start_time: int = 0, attributes=None) -> None:
+        self.name = name
+        self.start_time = start_time
+        self.attributes = attributes or {}
+        self.status = None
+        self.end_time = None
+        self.events = []
+
+    def set_status(self, status) -> None:
+        self.status = status
+
+    def end(self, end_time: int) -> None:
+        self.end_time = end_time
+
+    def add_event(self, name: str, attributes: dict) -> None:
+        self.events.append((name, attributes))
+
+
+class FakeTracer:
+    def __init__(self) -> None:
+        self.spans = []
+
+    def start_span(self, name: str, **kwargs) -> FakeSpan:
+        span = FakeSpan(name, **kwargs)
+        self.spans.append(span)
+        return span
+
+
+def test_opentelemetry_instrumentation(monkeypatch) -> None:
+    current_span = FakeSpan("current")
+    trace = ModuleType("opentelemetry.trace")
+    trace.get_tracer = lambda name: FakeTracer()
+    trace.get_current_span = lambda: current_span
+    trace.Status = lambda code: SimpleNamespace(status_code=code)
+    trace.StatusCode = SimpleNamespace(ERROR="ERROR")
+    opentelemetry = ModuleType("opentelemetry")
+    opentelemetry.trace = trace
+    monkeypatch.setitem(sys.modules, "opentelemetry", opentelemetry)
+    monkeypatch.setitem(sys.modules, "opentelemetry.trace", trace)
+
+    tracer = FakeTracer()
+    drive(OpenTelemetryInstrumentation(tracer, trace_frames=True))
+    failed, retried, listing, frame, callback = tracer.spans
+
+    assert failed.name == retried.name == "GET /v2/classifieds/listings"
+    assert failed.attributes["http.response.status_code"] == 502
+    assert failed.status.status_code == "ERROR"
+    assert retried.status is None
+    assert listing.name == "GET /v2/classifieds/listings/{id}"
+    assert listing.attributes["http.response.body.size"] == 15
+    assert frame.name == "websocket frame"
+    assert frame.attributes["events"] == 3
+    assert callback.name == "websocket callback"
+    assert all(span.start_time <= span.end_time for span in tracer.spans)
+    assert current_span.events == [
+        ("retry", {"url.path": "/v2/classifieds/listings", "status": "502"})
+    ]
+
+
+def test_prometheus_client() -> None:
+    prometheus_client = pytest.importorskip("prometheus_client")
+    registry = prometheus_client.CollectorRegistry()
+    drive(PrometheusInstrumentation(registry))
+    labels = {"method": "GET", "endpoint": "/v2/classifieds/listings"}
+
+    assert (
+        registry.get_sample_value(
+            "bptf_request_retries_total", {**labels, "status": "502"}
+        )
+        == 1
+    )
+    assert registry.get_sample_value("bptf_websocket_events_total") == 3
+
+
+def test_opentelemetry_sdk() -> None:
+    sdk_trace = pytest.importorskip("opentelemetry.sdk.trace")
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+        InMemorySpanExporter,
+    )
+
+    exporter = InMemorySpanExporter()
+    provider = sdk_trace.TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    drive(OpenTelemetryInstrumentation(provider.get_tracer("test"), True))
+    names = [span.name for span in exporter.get_finished_spans()]
+
+    assert names.count("GET /v2/classifieds/listings") == 2
+    assert "websocket frame" in names
@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+from src.backpack_tf import Journal, OrderBook
+from src.backpack_tf.journal import (
+    FRAME,
+    RESPONSE,
+    get_segments,
+    read_segment,
+    replay,
+    replay_into,
+)
+
+
+def make_frame(index: int, event: str = "listing-update") -> str:
+    payload = {
+        "id": f"440_{index}",
+        "steamid": "76561198253325712",
+        "intent": "sell",
+        "currencies": {"metal": index},
+        "bumpedAt": index,
+        "item": {"name": "Team Captain"},
+    }
+    return json.dumps([{"id": str(index), "event": event, "payload": payload}])
+
+
+def test_append_and_replay(tmp_path) -> None:
+    with Journal(tmp_path, max_segment_size=1024) as journal:
+        for i in range(50):
+            journal.append_frame(make_frame(i))
+
+        journal.append_response("GET", "/agent/status", b'{"status": "active"}')
+
+    records = list(replay(tmp_path))
+
+    assert len(get_segments(tmp_path)) > 1
+    assert len(records) == 51
+    assert records[0].data == make_frame(0).encode()
+    assert records[-1].kind == RESPONSE
+    assert records[-1].tag == "GET /agent/status"
+    assert len(list(replay(tmp_path, kinds=(FRAME,)))) == 50
+
+    # reopening starts a new segment
+    segments = len(get_segments(tmp_path))
+
+    with Journal(tmp_path) as journal:
+        journal.append_frame(make_frame(50))
+
+    assert len(get_segments(tmp_path)) == segments + 1
+    assert len(list(replay(tmp_path))) == 52
+
+
+def test_torn_record(tmp_path) -> None:
+    with Journal(tmp_path) as journal:
+        journal.append_frame(make_frame(0))
+        journal.append_frame(make_frame(1))
+
+    path = get_segments(tmp_path)[0]
+    data = path.read_bytes()
+    path.write_bytes(data[:-5])
+
+    assert [record.data for record in read_segment(path)] == [make_frame(0).encode()]
+
+    # a flipped byte fails the checksum
+    path.write_bytes(data[:-5] + b"x" + data[-4:])
+    assert len(list(read_segment(path))) == 1
+
+    path.write_bytes(b"not a journal")
+    with pytest.raises(ValueError):
+        list(read_segment(path))
+
+
+def test_replay_into(tmp_path) -> None:
+    snapshot = {
+        "sku": "Team Captain",
+        "appid": 440,
+        "createdAt": 0,
+        "listings": [
+            {
+                "steamid": "76561198000000000",
+                "intent": "buy",
+                "currencies": {"metal": 1},
+                "bump": 0,
+                "timestamp": 0,
+                "item": {"name": "Team Captain"},
+            }
+        ],
+    }
+
+    with Journal(tmp_path) as journal:
+        body = json.dumps(snapshot).encode()
+        journal.append_response("GET", "/classifieds/listings/snapshot", body)
+        journal.append_response("GET", "/agent/status", b"{}")
+
+        for i in range(1, 4):
+            journal.append_frame(make_frame(i))
+
+        journal.append_frame(make_frame(1, "listing-delete"))
+
+    book = OrderBook()
+
+    assert replay_into(book, tmp_path) == 5
+    assert len(book) == 3
+    assert book.best_ask("Team Captain").id == "440_2"
+    assert book.best_bid("Team Captain")["steamid"] == "76561198000000000"
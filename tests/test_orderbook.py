@@ -0,0 +1,186 @@
+import pytest
+
+from src.backpack_tf import OrderBook, decode_events, get_item_hash, get_listing_id
+from src.backpack_tf.orderbook import get_item_name
+
+
+def make_listing(
+    listing_id: str, intent: str, metal: float, steamid: str = "1", keys: int = 0
+) -> dict:
+    return {
+        "id": listing_id,
+        "steamid": steamid,
+        "intent": intent,
+        "currencies": {"keys": keys, "metal": metal},
+        "item": {"name": "Team Captain"},
+    }
+
+
+def test_best_prices() -> None:
+    book = OrderBook(key_price=60)
+
+    for listing in [
+        make_listing("b1", "buy", 10),
+        make_listing("b2", "buy", 12),
+        make_listing("b3", "buy", 11, steamid="2"),
+        make_listing("s1", "sell", 0, keys=1),
+        make_listing("s2", "sell", 14),
+    ]:
+        book.add(listing)
+
+    assert book.best_bid("Team Captain")["id"] == "b2"
+    assert book.best_ask("Team Captain")["id"] == "s2"
+    assert [bid["id"] for bid in book.top_bids("Team Captain", 2)] == ["b2", "b3"]
+    assert [ask["id"] for ask in book.top_asks("Team Captain")] == ["s2", "s1"]
+    assert book.spread("Team Captain") == 2
+    assert [listing["id"] for listing in book.get_by_steamid("2")] == ["b3"]
+    assert book.best_bid("Ellis' Cap") is None
+
+
+def test_apply_events() -> None:
+    book = OrderBook()
+    book.apply("listing-update", make_listing("b1", "buy", 10))
+    book.apply("listing-update", make_listing("b1", "buy", 9))
+    book.apply("listing-update", make_listing("b2", "buy", 8, steamid="2"))
+
+    assert len(book) == 2
+    assert book.best_bid("Team Captain")["currencies"]["metal"] == 9
+
+    book.apply_events([{"event": "listing-delete", "payload": {"id": "b1"}}])
+    book.apply("listing-delete", {"id": "unknown"})
+
+    assert "b1" not in book
+    assert book.best_bid("Team Captain")["id"] == "b2"
+    assert book.get_by_steamid("1") == []
+
+
+def test_typed_events() -> None:
+    frame = (
+        b'[{"id": "1", "event": "listing-update", "payload": {"id": "b1",'
+        b' "steamid": "1", "intent": "buy", "value": {"raw": 10.5},'
+        b' "item": {"name": "Team Captain"}}}]'
+    )
+    book = OrderBook()
+    book.apply_events(decode_events(frame))
+
+    assert book.best_bid("Team Captain").id == "b1"
+    assert book.spread("Team Captain") is None
+
+
+def make_snapshot(created_at: int, *listings: dict) -> dict:
+    return {
+        "listings": list(listings),
+        "appid": 440,
+        "sku": "Team Captain",
+        "createdAt": created_at,
+    }
+
+
+def make_snapshot_listing(steamid: str, intent: str, price: float, bump: int) -> dict:
+    item = {"name": "Team Captain"}
+
+    if intent == "sell":
+        item["id"] = steamid + "0"
+
+    return {
+        "steamid": steamid,
+        "intent": intent,
+        "price": price,
+        "currencies": {"metal": price},
+        "timestamp": bump,
+        "bump": bump,
+        "item": item,
+    }
+
+
+def test_seed() -> None:
+    book = OrderBook()
+    book.seed(
+        make_snapshot(
+            100,
+            make_snapshot_listing("1", "buy", 10, 90),
+            make_snapshot_listing("2", "sell", 15, 95),
+        )
+    )
+
+    buy_id = "440_1_a893c93bf986b65690e9e8b00bfc28e1"
+
+    assert book.best_bid("Team Captain")["id"] == buy_id
+    assert book.best_ask("Team Captain")["id"] == "440_20"
+    assert book.suspect_keys() == set()
+
+    # newer websocket data wins over an older snapshot
+    book.apply("listing-update", {**book.get(buy_id), "bumpedAt": 120})
+    book.apply("listing-delete", {**book.get("440_20"), "bumpedAt": 120})
+    book.seed(
+        make_snapshot(
+            110,
+            make_snapshot_listing("1", "buy", 10, 90),
+            make_snapshot_listing("2", "sell", 15, 95),
+        )
+    )
+
+    assert book.get(buy_id)["bumpedAt"] == 120
+    assert "440_20" not in book
+    assert book.stale_events == 2
+
+
+def test_seed_ids_match_websocket() -> None:
+    listing = make_snapshot_listing("1", "buy", 10, 90)
+    listing["item"] = {"name": "Strange Team Captain", "baseName": "Team Captain"}
+    book = OrderBook()
+    book.seed({**make_snapshot(100, listing), "sku": "Strange Team Captain"})
+
+    # buy listings are keyed by the base name, not the full name
+    listing_id = get_listing_id("1", "378;11", "buy")
+    book.apply(
+        "listing-update",
+        {**book.get(listing_id), "currencies": {"metal": 11}, "bumpedAt": 120},
+    )
+
+    assert len(book) == 1
+    assert book.best_bid("Strange Team Captain")["currencies"]["metal"] == 11
+
+
+def test_seed_needs_item_name_key() -> None:
+    # listings would end up under hashes, the snapshot under its item name
+    book = OrderBook(key=lambda listing: get_item_hash(get_item_name(listing)))
+
+    with pytest.raises(ValueError):
+        book.seed(make_snapshot(100, make_snapshot_listing("1", "buy", 10, 90)))
+
+    assert len(book) == 0
+
+
+def test_update_as_old_as_delete() -> None:
+    book = OrderBook()
+    book.apply("listing-update", {**make_listing("b1", "buy", 10), "bumpedAt": 100})
+    book.apply("listing-delete", {"id": "b1", "bumpedAt": 200})
+    book.apply("listing-update", {**make_listing("b1", "buy", 10), "bumpedAt": 200})
+
+    assert "b1" not in book
+    assert book.stale_events == 1
+
+    book.apply("listing-update", {**make_listing("b1", "buy", 11), "bumpedAt": 201})
+    assert book.best_bid("Team Captain")["currencies"]["metal"] == 11
+
+
+def test_stale_events_mark_suspect() -> None:
+    book = OrderBook()
+    book.apply("listing-update", {**make_listing("b1", "buy", 10), "bumpedAt": 200})
+    book.apply("listing-update", {**make_listing("b1", "buy", 5), "bumpedAt": 100})
+
+    assert book.best_bid("Team Captain")["currencies"]["metal"] == 10
+    assert book.suspect_keys() == {"Team Captain"}
+
+    snapshots = []
+
+    class Client:
+        def get_snapshot(self, sku: str) -> dict:
+            snapshots.append(sku)
+            return make_snapshot(300)
+
+    assert book.refresh(Client()) == 1
+    assert snapshots == ["Team Captain"]
+    assert len(book) == 0
+    assert book.suspect_keys() == set()
@@ -0,0 +1,57 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from src.backpack_tf import OrderBook
+from src.backpack_tf.pricing import ListingColumns, get_price_stats
+
+
+def make_snapshot(sku: str, buys: list[float], sells: list[float]) -> dict:
+    listings = [
+        {"intent": intent, "currencies": {"metal": price}, "bump": 100}
+        for intent, prices in [("buy", buys), ("sell", sells)]
+        for price in prices
+    ]
+    return {"sku": sku, "listings": listings}
+
+
+def test_price_stats() -> None:
+    columns = ListingColumns.from_snapshots(
+        [
+            make_snapshot("Team Captain", [1, 2, 3, 4, 100], [5, 6, 7]),
+            make_snapshot("Ellis' Cap", [0.11], []),
+        ]
+    )
+    stats = get_price_stats(columns, key_price=60, quantiles=(0.5,), trim=0.2)
+    team_captain = stats["Team Captain"]
+
+    assert len(columns) == 9
+    assert team_captain.buy_count == 5
+    assert team_captain.buy == {0.5: 3}
+    # 1 and 100 are trimmed
+    assert team_captain.best_buy == 4
+    assert team_captain.best_sell == 5
+    assert team_captain.spread == 1
+    assert stats["Ellis' Cap"].best_buy == 0.11
+    assert stats["Ellis' Cap"].spread is None
+
+
+def test_key_conversion() -> None:
+    book = OrderBook(key_price=60)
+    book.add(
+        {
+            "id": "1",
+            "steamid": "1",
+            "intent": "sell",
+            "currencies": {"keys": 1, "metal": 5},
+            "item": {"name": "Team Captain"},
+        }
+    )
+    listing = {**book.get("1"), "id": "2", "currencies": {"keys": 2}}
+    columns = ListingColumns.from_listings([book.get("1"), listing])
+    stats = get_price_stats(columns, key_price=60, quantiles=(0, 1), trim=0)
+
+    assert stats["Team Captain"].sell == {0: 65, 1: 120}
+    stats = get_price_stats(ListingColumns.from_order_book(book), key_price=60)
+
+    assert stats["Team Captain"].best_sell == 65
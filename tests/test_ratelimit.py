@@ -0,0 +1,104 @@
+import time
+
+import requests
+
+from src.backpack_tf import BackpackTF, RateLimiter, TokenBucket
+
+
+def test_token_bucket() -> None:
+    bucket = TokenBucket(rate=10, capacity=2)
+
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert 0.09 < bucket.reserve() <= 0.1
+    assert 0.19 < bucket.reserve() <= 0.2
+
+
+def test_token_bucket_pause() -> None:
+    bucket = TokenBucket(rate=10, capacity=5)
+    bucket.pause(1)
+
+    assert 1.09 < bucket.reserve() <= 1.1
+
+
+def test_get_bucket() -> None:
+    limiter = RateLimiter()
+
+    snapshot = limiter.get_bucket("GET", "/classifieds/listings/snapshot")
+    write = limiter.get_bucket("post", "/v2/classifieds/listings/batch")
+
+    assert snapshot is limiter.buckets["snapshot"]
+    assert write is limiter.buckets["classifieds_write"]
+    assert limiter.get_bucket("GET", "/v2/classifieds/listings") is None
+    assert RateLimiter({"snapshot": None}).buckets.get("snapshot") is None
+
+
+def test_update_from_headers() -> None:
+    limiter = RateLimiter({"snapshot": (10, 1, 10)})
+    endpoint = "/classifieds/listings/snapshot"
+
+    limiter.update("GET", endpoint, 200, {"X-RateLimit-Remaining": "2"})
+    assert limiter.reserve("GET", endpoint) == 0.0
+    assert limiter.reserve("GET", endpoint) == 0.0
+    assert limiter.reserve("GET", endpoint) > 0.0
+
+    limiter.update("GET", endpoint, 429, {"Retry-After": "3"})
+    assert limiter.reserve("GET", endpoint) > 3.0
+
+
+def test_token_bucket_pauses_overlap() -> None:
+    bucket = TokenBucket(rate=10, capacity=5)
+
+    # e.g. concurrent requests answered with 429 and the same Retry-After
+    for _ in range(5):
+        bucket.pause(3)
+
+    assert 3.09 < bucket.reserve() <= 3.1
+    assert 3.19 < bucket.reserve() <= 3.2
+
+
+def test_get_retry_delay() -> None:
+    limiter = RateLimiter()
+    endpoint = "/v2/classifieds/listings"
+
+    assert limiter.get_retry_delay("GET", endpoint, {"Retry-After": "2"}, 1) == 2.0
+    assert limiter.get_retry_delay("GET", endpoint, {}, 1) == 1.0
+    assert limiter.get_retry_delay("GET", endpoint, {}, 3) == 4.0
+
+    # the bucket is paused by update instead
+    snapshot = "/classifieds/listings/snapshot"
+    assert limiter.get_retry_delay("GET", snapshot, {"Retry-After": "2"}, 1) == 0.0
+
+
+class RateLimitedSession:
+    def __init__(self, *headers: dict) -> None:
+        self.headers = list(headers)
+        self.requests = 0
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        self.requests += 1
+        response = requests.Response()
+        response._content = b"{}"
+        response.request = requests.Request(method, url).prepare()
+
+        if self.headers:
+            response.status_code = 429
+            response.headers.update(self.headers.pop(0))
+        else:
+            response.status_code = 200
+
+        return response
+
+
+def test_429_without_bucket_waits(monkeypatch) -> None:
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    session = RateLimitedSession({"Retry-After": "3"}, {})
+    client = BackpackTF(
+        "token", "76561198253325712", session=session, rate_limiter=RateLimiter()
+    )
+
+    assert client.request("GET", "/v2/classifieds/listings/440_1") == {}
+    assert session.requests == 3
+    # Retry-After, then the backoff of the second retry
+    assert sleeps == [3.0, 2.0]
@@ -0,0 +1,161 @@
+from src.backpack_tf import (
+    BackpackTF,
+    Listing,
+    ListingError,
+    diff_listings,
+    get_listing_id,
+)
+from tests.helpers import STEAM_ID, make_listing
+
+
+def make_live(listing_id: str, intent: str, currencies: dict, details: str) -> Listing:
+    item = {"name": "Ellis' Cap"}
+    return Listing.from_dict(
+        make_listing(listing_id, intent, currencies, details, item=item)
+    )
+
+
+def test_diff_listings() -> None:
+    desired = [
+        # unchanged
+        {"sku": "263;6", "intent": "buy", "currencies": {"metal": 5}, "details": ""},
+        # price changed
+        {
+            "sku": "263;6",
+            "intent": "sell",
+            "currencies": {"keys": 1},
+            "details": "hi",
+            "asset_id": 11,
+        },
+        # new
+        {
+            "sku": "5021;6",
+            "intent": "sell",
+            "currencies": {"metal": 60},
+            "details": "",
+            "asset_id": 12,
+        },
+        # invalid
+        {"sku": "5021;6", "intent": "trade", "currencies": {}, "details": ""},
+    ]
+    buy_id = get_listing_id(STEAM_ID, "263;6", "buy")
+    live = [
+        make_live(buy_id, "buy", {"metal": 5.0}, None),
+        make_live("440_11", "sell", {"keys": 1, "metal": 2.0}, "hi"),
+        make_live("440_99", "sell", {"keys": 1}, ""),
+    ]
+
+    diff = diff_listings(STEAM_ID, desired, live)
+
+    assert buy_id == "440_76561198253325712_9e89a4a85aae68266ec992c22b0d52e2"
+    assert diff.unchanged == 1
+    assert diff.update == {"440_11": {"currencies": {"keys": 1, "metal": 0.0}}}
+    assert [listing["asset_id"] for listing in diff.create] == [12]
+    assert diff.delete == ["440_99"]
+    assert len(diff.errors) == 1
+    assert len(diff) == 3
+    assert diff.calls() == 3
+
+    assert diff_listings(STEAM_ID, desired, live, delete=False).delete == []
+
+
+def test_duplicate_listings() -> None:
+    desired = [
+        {"sku": "263;6", "intent": "buy", "currencies": {"metal": 5}, "details": ""},
+        {"sku": "263;6", "intent": "buy", "currencies": {"metal": 6}, "details": ""},
+    ]
+    buy_id = get_listing_id(STEAM_ID, "263;6", "buy")
+    diff = diff_listings(STEAM_ID, desired, [])
+
+    assert [listing["currencies"] for listing in diff.create] == [{"metal": 5}]
+    assert len(diff.errors) == 1
+    assert diff.errors[0].listing == desired[1]
+    assert buy_id in diff.errors[0].message
+
+
+def test_invalid_listing_is_not_deleted() -> None:
+    desired = [
+        {
+            "sku": "263;6",
+            "intent": "sell",
+            "currencies": {"metal": 5, "usd": 1},
+            "details": "",
+            "asset_id": 77,
+        }
+    ]
+    live = [make_live("440_77", "sell", {"metal": 5.0}, "")]
+
+    diff = diff_listings(STEAM_ID, desired, live)
+
+    assert len(diff.errors) == 1
+    assert diff.delete == []
+    assert diff.create == []
+
+
+def test_reconcile_listings() -> None:
+    client = BackpackTF("token", STEAM_ID)
+    live = [
+        make_listing(f"440_{asset_id}", "sell", {"metal": 1}, "")
+        for asset_id in range(250)
+    ]
+    requests = []
+
+    def request(method: str, endpoint: str, params: dict = {}, **kwargs) -> dict:
+        requests.append((method, endpoint))
+
+        if method == "GET":
+            skip, limit = params["skip"], params["limit"]
+            return {
+                "results": live[skip : skip + limit],
+                "cursor": {"skip": skip, "limit": limit, "total": len(live)},
+            }
+
+        if method == "PATCH":
+            listing_id = endpoint.rsplit("/", 1)[1]
+            return make_listing(listing_id, "sell", kwargs["json"]["currencies"], "")
+
+        if method == "POST":
+            return [
+                {"result": make_listing(f"440_{listing['id']}", "sell", {}, "")}
+                for listing in kwargs["json"]
+            ]
+
+        return {}
+
+    client.request = request
+    desired = [
+        {
+            "sku": "263;6",
+            "intent": "sell",
+            "currencies": {"metal": 1},
+            "details": "",
+            "asset_id": asset_id,
+        }
+        for asset_id in range(1, 252)
+    ]
+    desired[0]["currencies"] = {"metal": 2}
+
+    result = client.reconcile_listings(desired)
+
+    assert result.diff.unchanged == 248
+    assert list(result.updated) == ["440_1"]
+    assert list(result.deleted) == ["440_0"]
+    assert len(result.created) == 2
+    assert not result.errors
+    # 3 pages, 1 batch create, 1 update and 1 delete
+    assert len(requests) == 6
+
+
+def test_reconcile_errors() -> None:
+    client = BackpackTF("token", STEAM_ID)
+
+    def request(method: str, endpoint: str, params: dict = {}, **kwargs) -> dict:
+        return {"results": [], "cursor": {"total": 0}}
+
+    client.request = request
+    result = client.reconcile_listings(
+        [{"sku": "263;6", "intent": "trade", "currencies": {}, "details": ""}]
+    )
+
+    assert isinstance(result.errors[0], ListingError)
+    assert result.created == []
@@ -0,0 +1,264 @@
+import asyncio
+import time
+
+import pytest
+import requests
+
+from src.backpack_tf import (
+    AsyncBackpackTF,
+    BackpackTF,
+    CircuitBreaker,
+    CircuitOpen,
+    ListingError,
+    RetryPolicy,
+)
+from tests.helpers import STEAM_ID, make_listing
+
+
+class StatusError(Exception):
+    def __init__(self, status: int | None) -> None:
+        self.status = status
+
+
+def get_status(error: StatusError) -> int | None:
+    return error.status
+
+
+def failing(*statuses: int | None):
+    """Raise ``StatusError`` for every status, then return "ok" """
+    statuses = list(statuses)
+    calls = []
+
+    def send() -> str:
+        calls.append(time.monotonic())
+
+        if statuses:
+            raise StatusError(statuses.pop(0))
+
+        return "ok"
+
+    return send, calls
+
+
+def test_retries() -> None:
+    policy = RetryPolicy(min_backoff=0)
+    send, calls = failing(502, None)
+
+    assert policy.call("GET", "/", send, (StatusError,), get_status) == "ok"
+    assert len(calls) == 3
+    assert policy.stats["retries"] == 2
+
+
+def test_no_retries() -> None:
+    policy = RetryPolicy(max_retries=2, min_backoff=0)
+
+    # client errors are not retried
+    send, calls = failing(404)
+    with pytest.raises(StatusError):
+        policy.call("GET", "/", send, (StatusError,), get_status)
+    assert len(calls) == 1
+
+    # neither are methods which are not idempotent
+    send, calls = failing(503)
+    with pytest.raises(StatusError):
+        policy.call("POST", "/", send, (StatusError,), get_status)
+    assert len(calls) == 1
+
+    send, calls = failing(503, 503, 503)
+    with pytest.raises(StatusError):
+        policy.call("GET", "/", send, (StatusError,), get_status)
+    assert len(calls) == 3
+
+
+def test_circuit_breaker() -> None:
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    policy = RetryPolicy(max_retries=0, breaker=breaker)
+    send, calls = failing(500, 500, 500)
+
+    for _ in range(2):
+        with pytest.raises(StatusError):
+            policy.call("GET", "/", send, (StatusError,), get_status)
+
+    assert breaker.state == "open"
+
+    with pytest.raises(CircuitOpen):
+        policy.call("GET", "/", send, (StatusError,), get_status)
+
+    assert len(calls) == 2
+
+    # the trial request fails, so the circuit opens again
+    time.sleep(0.05)
+    with pytest.raises(StatusError):
+        policy.call("GET", "/", send, (StatusError,), get_status)
+    assert breaker.state == "open"
+
+    time.sleep(0.05)
+    assert policy.call("GET", "/", send, (StatusError,), get_status) == "ok"
+    assert policy.stats["breaker_state"] == "closed"
+    assert policy.stats["breaker_opens"] == 2
+    assert policy.stats["breaker_rejected"] == 1
+
+
+def test_hedging() -> None:
+    policy = RetryPolicy(hedge_delay=0.01, hedge_endpoints=("/slow",))
+    calls = []
+
+    def send() -> int:
+        calls.append(None)
+        call = len(calls)
+
+        # only the first request is slow
+        if call == 1:
+            time.sleep(0.2)
+
+        return call
+
+    assert policy.call("GET", "/slow", send, (StatusError,), get_status) == 2
+    assert policy.stats["hedges"] == 1
+    assert policy.stats["hedge_wins"] == 1
+
+    calls.clear()
+    assert policy.call("GET", "/fast", send, (StatusError,), get_status) == 1
+
+
+def test_close_stops_hedge_threads() -> None:
+    policy = RetryPolicy(hedge_delay=0, hedge_endpoints=("/",))
+
+    with BackpackTF("token", STEAM_ID, retry_policy=policy) as client:
+        client._send = lambda method, endpoint, params, **kwargs: {}
+        client.request("GET", "/classifieds/listings/snapshot")
+        threads = list(policy._executor._threads)
+
+    assert policy._executor is None
+    assert threads
+
+    for thread in threads:
+        thread.join(1)
+        assert not thread.is_alive()
+
+    # usable again, e.g. by another client sharing the policy
+    assert policy.call("GET", "/", lambda: "ok", (StatusError,), get_status) == "ok"
+    policy.close()
+
+
+async def test_call_async() -> None:
+    policy = RetryPolicy(min_backoff=0, hedge_delay=0.01, hedge_endpoints=("/",))
+    statuses = [502]
+    calls = []
+
+    async def send() -> int:
+        calls.append(None)
+        call = len(calls)
+
+        if statuses:
+            raise StatusError(statuses.pop())
+
+        if call == 2:
+            await asyncio.sleep(1)
+
+        return call
+
+    assert await policy.call_async("GET", "/", send, (StatusError,), get_status) == 3
+    assert policy.stats == {"retries": 1, "hedges": 1, "hedge_wins": 1}
+
+
+def test_client_retries() -> None:
+    client = BackpackTF("token", "76561198253325712", retry_policy=RetryPolicy())
+    attempts = []
+
+    def send(method: str, endpoint: str, params: dict, **kwargs) -> dict:
+        attempts.append(endpoint)
+
+        if len(attempts) == 1:
+            raise requests.ConnectionError()
+
+        return {"ok": True}
+
+    client._send = send
+    client._retry_policy.min_backoff = 0
+
+    assert client.get_listings() == {"ok": True}
+    assert len(attempts) == 2
+
+
+def make_half_open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    # the next request is the trial
+    breaker._opened_at -= 60
+    return breaker
+
+
+def batch_response(listings: list[dict]) -> list[dict]:
+    return [{"result": make_listing(f"440_{listing['id']}")} for listing in listings]
+
+
+def test_open_circuit_listing_errors() -> None:
+    policy = RetryPolicy(max_retries=0, breaker=make_half_open_breaker())
+    client = BackpackTF("token", STEAM_ID, retry_policy=policy)
+    sent = []
+
+    def send(method: str, endpoint: str, params: dict, **kwargs):
+        sent.append(method)
+
+        # the trial batch succeeds, the next one opens the circuit again
+        if len(sent) == 2:
+            response = requests.Response()
+            response.status_code = 503
+            raise requests.HTTPError("Unavailable", response=response)
+
+        return batch_response(kwargs["json"]) if method == "POST" else {}
+
+    client._send = send
+    listings = [
+        {
+            "sku": "263;6",
+            "intent": "sell",
+            "currencies": {"metal": 1},
+            "details": "",
+            "asset_id": asset_id,
+        }
+        for asset_id in range(3)
+    ]
+    results = client.create_listings(listings, batch_size=1, concurrency=1)
+
+    assert results[0].id == "440_0"
+    assert results[1].status == 503
+    assert "failing" in results[2].message
+    assert len(sent) == 2
+
+    deleted = client.delete_listings(["440_0", "440_1"])
+
+    assert all(isinstance(result, ListingError) for result in deleted.values())
+    assert len(sent) == 2
+
+
+async def test_open_circuit_listing_errors_async() -> None:
+    policy = RetryPolicy(max_retries=0, breaker=make_half_open_breaker())
+    client = AsyncBackpackTF(None, "token", STEAM_ID, retry_policy=policy)
+    sent = []
+
+    async def send(method: str, endpoint: str, params: dict, **kwargs):
+        sent.append(method)
+        return batch_response(kwargs["json"]) if method == "POST" else {}
+
+    client._send = send
+    policy.breaker._trial_running = True
+    listings = [
+        {
+            "sku": "263;6",
+            "intent": "sell",
+            "currencies": {"metal": 1},
+            "details": "",
+            "asset_id": asset_id,
+        }
+        for asset_id in range(3)
+    ]
+
+    # a trial is already running, so every batch is rejected
+    results = await client.create_listings(listings, batch_size=1)
+    deleted = await client.delete_listings(["440_0"])
+
+    assert all(isinstance(result, ListingError) for result in results)
+    assert isinstance(deleted["440_0"], ListingError)
+    assert sent == []
@@ -1,4 +1,19 @@
-from src.backpack_tf import construct_listing, construct_listing_item, get_item_hash
+from src.backpack_tf import (
+    ListingError,
+    clear_sku_cache,
+    construct_listing,
+    construct_listing_item,
+    get_cache_stats,
+    get_item_hash,
+    get_sku_item_hash,
+    warmup,
+)
+from src.backpack_tf.utils import (
+    chunk_list,
+    construct_listings,
+    merge_batch_results,
+    parse_batch_response,
+)
 
 
 def test_item_hash() -> None:
@@ -55,3 +70,56 @@ def test_construct_listing() -> None:
         "currencies": {"keys": 1, "metal": 1.55},
         "details": "my description",
     }
+
+
+def test_sku_cache() -> None:
+    clear_sku_cache()
+    warmup(["263;6", "5021;6"])
+    stats = get_cache_stats()
+
+    assert stats["listing_item"]["currsize"] == 2
+    assert stats["base_name"]["misses"] == 2
+
+    assert get_sku_item_hash("263;6") == "9e89a4a85aae68266ec992c22b0d52e2"
+    assert construct_listing_item("263;6")["baseName"] == "Ellis' Cap"
+    assert get_cache_stats()["listing_item"]["hits"] == 1
+
+    # cached items are not shared between listings
+    construct_listing_item("263;6")["quality"]["id"] = 11
+    assert construct_listing_item("263;6")["quality"] == {"id": 6}
+
+    clear_sku_cache()
+    assert get_cache_stats()["listing_item"]["currsize"] == 0
+
+
+def test_chunk_list() -> None:
+    assert chunk_list([1, 2, 3, 4, 5], 2) == [[1, 2], [3, 4], [5]]
+    assert chunk_list([], 2) == []
+
+
+def test_merge_batch_results() -> None:
+    listings = [
+        {"sku": "263;6", "intent": "buy", "currencies": {"metal": 1}, "details": ""},
+        {"sku": "263;6", "intent": "trade", "currencies": {}, "details": ""},
+        {"sku": "263;6", "intent": "buy", "currencies": {"metal": 2}, "details": ""},
+    ]
+    constructed, errors = construct_listings(listings)
+
+    assert [index for index, _ in constructed] == [0, 2]
+    assert list(errors) == [1]
+
+    batches = chunk_list(constructed, 1)
+    results = [
+        [ListingError(constructed[0][1], "Rate limited", 429)],
+        parse_batch_response(
+            [constructed[1][1]], [{"error": {"message": "Item is invalid"}}]
+        ),
+    ]
+    merged = merge_batch_results(len(listings), errors, batches, results)
+
+    assert [result.message for result in merged] == [
+        "Rate limited",
+        "trade must be buy or sell",
+        "Item is invalid",
+    ]
+    assert merged[0].status == 429
@@ -0,0 +1,121 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+from src.backpack_tf import AsyncBackpackTFWebsocket
+
+FRAME = json.dumps(
+    [
+        {"event": "listing-update", "payload": {"id": "440_1"}},
+        {"event": "listing-update", "payload": {"id": "440_2"}},
+    ]
+)
+
+
+async def test_overflow_policies() -> None:
+    for overflow, expected in [("drop-oldest", "440_2"), ("drop-newest", "440_1")]:
+        socket = AsyncBackpackTFWebsocket(print, queue_size=1, overflow=overflow)
+        socket._queue = asyncio.Queue(1)
+        await socket._process_messages(FRAME)
+
+        assert socket._queue.get_nowait()[1]["id"] == expected
+        assert socket.received == 2
+        assert socket.dropped == 1
+
+    with pytest.raises(ValueError):
+        AsyncBackpackTFWebsocket(print, overflow="drop-everything")
+
+
+async def test_listen_reconnects() -> None:
+    received = []
+
+    async def handler(websocket) -> None:
+        await websocket.send(FRAME)
+        await websocket.close()
+
+    async def callback(payload: dict) -> None:
+        received.append(payload["id"])
+
+        if len(received) == 4:
+            await socket.stop()
+
+    async with serve(handler, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        socket = AsyncBackpackTFWebsocket(
+            callback, consumers=2, min_backoff=0.01, url=f"ws://127.0.0.1:{port}"
+        )
+        await asyncio.wait_for(socket.listen(), 5)
+
+    assert sorted(received) == ["440_1", "440_1", "440_2", "440_2"]
+    assert socket.reconnects >= 1
+    assert socket.stats["processed"] == 4
+
+
+async def test_listen_retries_failed_handshake() -> None:
+    received = []
+    attempts = []
+
+    def process_request(connection, request):
+        attempts.append(1)
+
+        # e.g. the server is restarting
+        if len(attempts) == 1:
+            return connection.respond(HTTPStatus.SERVICE_UNAVAILABLE, "")
+
+    async def handler(websocket) -> None:
+        await websocket.send("not json")
+        await websocket.send(FRAME)
+        await websocket.wait_closed()
+
+    async def callback(payload: dict) -> None:
+        received.append(payload["id"])
+
+        if len(received) == 2:
+            await socket.stop()
+
+    async with serve(
+        handler, "127.0.0.1", 0, process_request=process_request
+    ) as server:
+        port = server.sockets[0].getsockname()[1]
+        socket = AsyncBackpackTFWebsocket(
+            callback, min_backoff=0.01, url=f"ws://127.0.0.1:{port}"
+        )
+        await asyncio.wait_for(socket.listen(), 5)
+
+    assert received == ["440_1", "440_2"]
+    assert len(attempts) == 2
+    assert socket.reconnects == 1
+    assert socket.stats["invalid_frames"] == 1
+
+
+async def test_listen_without_reconnect() -> None:
+    async def closing_handler(websocket) -> None:
+        await websocket.send(FRAME)
+        await websocket.close()
+
+    async def failing_handler(websocket) -> None:
+        await websocket.close(1011, "internal error")
+
+    for handler, error in [
+        (closing_handler, None),
+        (failing_handler, ConnectionClosed),
+    ]:
+        async with serve(handler, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            socket = AsyncBackpackTFWebsocket(
+                print, reconnect=False, url=f"ws://127.0.0.1:{port}"
+            )
+
+            # a clean close ends listening, anything else is raised
+            if error is None:
+                await asyncio.wait_for(socket.listen(), 5)
+                assert socket.received == 2
+            else:
+                with pytest.raises(error):
+                    await asyncio.wait_for(socket.listen(), 5)
+
+            assert socket.reconnects == 0